@@ -0,0 +1,304 @@
+# ===========================================
+# ANALÍTICA DE FLOTA - SISTEMA AUTOMOTORES
+# ===========================================
+#
+# Kilómetros, rendimiento de combustible y costo por kilómetro por vehículo
+# y por mes. Los totales mensuales se guardan en resumen_flota_mensual y los
+# actualizan triggers cuando un viaje se cierra (tiene kilometraje de llegada)
+# o cambia un mantenimiento; las consultas solo agregan ese resumen y calculan
+# los cocientes y las series con funciones de ventana.
+#
+# Verificar (y opcionalmente reconstruir) el resumen de una base:
+#   python analitica.py [automotores.db] [--reparar]
+
+import argparse
+import re
+import sqlite3
+import sys
+from typing import Dict, List, Optional
+
+from filas import filas_a_dict
+from resumenes import _filas_iguales
+
+TABLA = '''
+    CREATE TABLE IF NOT EXISTS resumen_flota_mensual (
+        vehiculo_id INTEGER NOT NULL,
+        mes TEXT NOT NULL,                      -- AAAA-MM
+        viajes INTEGER NOT NULL DEFAULT 0,
+        km REAL NOT NULL DEFAULT 0,
+        litros REAL NOT NULL DEFAULT 0,
+        km_con_litros REAL NOT NULL DEFAULT 0,  -- km de los viajes con combustible registrado
+        costo_combustible REAL NOT NULL DEFAULT 0,
+        km_con_costo REAL NOT NULL DEFAULT 0,   -- km de los viajes con costo registrado
+        mantenimientos INTEGER NOT NULL DEFAULT 0,
+        costo_mantenimiento REAL NOT NULL DEFAULT 0,
+        km_mantenimiento REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (vehiculo_id, mes)
+    ) WITHOUT ROWID
+'''
+
+# Un viaje cuenta desde que tiene kilometraje de llegada válido
+_VIAJE_CERRADO = ('{fila}.kilometraje_llegada IS NOT NULL '
+                  'AND {fila}.kilometraje_llegada >= {fila}.kilometraje_salida')
+
+# Aporte de un viaje: (viajes, km, litros, km_con_litros, costo, km_con_costo)
+_APORTE_VIAJE = '''
+    1,
+    {fila}.kilometraje_llegada - {fila}.kilometraje_salida,
+    COALESCE({fila}.combustible_consumido, 0),
+    CASE WHEN {fila}.combustible_consumido IS NULL THEN 0
+         ELSE {fila}.kilometraje_llegada - {fila}.kilometraje_salida END,
+    COALESCE({fila}.costo_combustible, 0),
+    CASE WHEN {fila}.costo_combustible IS NULL THEN 0
+         ELSE {fila}.kilometraje_llegada - {fila}.kilometraje_salida END
+'''
+
+_SUMAR_VIAJE = '''
+    INSERT INTO resumen_flota_mensual (vehiculo_id, mes, viajes, km, litros, km_con_litros,
+                                       costo_combustible, km_con_costo)
+    VALUES ({fila}.vehiculo_id, substr({fila}.fecha_salida, 1, 7), ''' + _APORTE_VIAJE + ''')
+    ON CONFLICT (vehiculo_id, mes) DO UPDATE SET
+        viajes = viajes + excluded.viajes, km = km + excluded.km,
+        litros = litros + excluded.litros, km_con_litros = km_con_litros + excluded.km_con_litros,
+        costo_combustible = costo_combustible + excluded.costo_combustible,
+        km_con_costo = km_con_costo + excluded.km_con_costo;
+'''
+_RESTAR_VIAJE = '''
+    UPDATE resumen_flota_mensual SET
+        viajes = viajes - 1,
+        km = km - ({fila}.kilometraje_llegada - {fila}.kilometraje_salida),
+        litros = litros - COALESCE({fila}.combustible_consumido, 0),
+        km_con_litros = km_con_litros - CASE WHEN {fila}.combustible_consumido IS NULL THEN 0
+                                              ELSE {fila}.kilometraje_llegada - {fila}.kilometraje_salida END,
+        costo_combustible = costo_combustible - COALESCE({fila}.costo_combustible, 0),
+        km_con_costo = km_con_costo - CASE WHEN {fila}.costo_combustible IS NULL THEN 0
+                                            ELSE {fila}.kilometraje_llegada - {fila}.kilometraje_salida END
+    WHERE vehiculo_id = {fila}.vehiculo_id AND mes = substr({fila}.fecha_salida, 1, 7);
+'''
+_SUMAR_MANTENIMIENTO = '''
+    INSERT INTO resumen_flota_mensual (vehiculo_id, mes, mantenimientos, costo_mantenimiento, km_mantenimiento)
+    VALUES ({fila}.vehiculo_id, substr({fila}.fecha_mantenimiento, 1, 7), 1,
+            COALESCE({fila}.costo, 0), COALESCE({fila}.kilometros_recorridos, 0))
+    ON CONFLICT (vehiculo_id, mes) DO UPDATE SET
+        mantenimientos = mantenimientos + 1,
+        costo_mantenimiento = costo_mantenimiento + excluded.costo_mantenimiento,
+        km_mantenimiento = km_mantenimiento + excluded.km_mantenimiento;
+'''
+_RESTAR_MANTENIMIENTO = '''
+    UPDATE resumen_flota_mensual SET
+        mantenimientos = mantenimientos - 1,
+        costo_mantenimiento = costo_mantenimiento - COALESCE({fila}.costo, 0),
+        km_mantenimiento = km_mantenimiento - COALESCE({fila}.kilometros_recorridos, 0)
+    WHERE vehiculo_id = {fila}.vehiculo_id AND mes = substr({fila}.fecha_mantenimiento, 1, 7);
+'''
+_LIMPIAR = '''
+    DELETE FROM resumen_flota_mensual
+    WHERE vehiculo_id = {fila}.vehiculo_id AND mes = substr({fila}.{fecha}, 1, 7)
+      AND viajes <= 0 AND mantenimientos <= 0;
+'''
+
+_COLUMNAS_VIAJE = 'vehiculo_id, fecha_salida, kilometraje_salida, kilometraje_llegada, combustible_consumido, costo_combustible'
+_COLUMNAS_MANTENIMIENTO = 'vehiculo_id, fecha_mantenimiento, costo, kilometros_recorridos'
+
+# (nombre, evento, cuerpo). Las actualizaciones restan el aporte anterior y suman
+# el nuevo en triggers separados: el orden entre ellos no cambia el resultado.
+_TRIGGERS = [
+    ('trg_flota_viajes_ins', f"AFTER INSERT ON viajes WHEN {_VIAJE_CERRADO.format(fila='NEW')}",
+     _SUMAR_VIAJE.format(fila='NEW')),
+    ('trg_flota_viajes_del', f"AFTER DELETE ON viajes WHEN {_VIAJE_CERRADO.format(fila='OLD')}",
+     _RESTAR_VIAJE.format(fila='OLD') + _LIMPIAR.format(fila='OLD', fecha='fecha_salida')),
+    ('trg_flota_viajes_upd_old',
+     f"AFTER UPDATE OF {_COLUMNAS_VIAJE} ON viajes WHEN {_VIAJE_CERRADO.format(fila='OLD')}",
+     _RESTAR_VIAJE.format(fila='OLD') + _LIMPIAR.format(fila='OLD', fecha='fecha_salida')),
+    ('trg_flota_viajes_upd_new',
+     f"AFTER UPDATE OF {_COLUMNAS_VIAJE} ON viajes WHEN {_VIAJE_CERRADO.format(fila='NEW')}",
+     _SUMAR_VIAJE.format(fila='NEW')),
+
+    ('trg_flota_mantenimientos_ins', 'AFTER INSERT ON mantenimientos',
+     _SUMAR_MANTENIMIENTO.format(fila='NEW')),
+    ('trg_flota_mantenimientos_del', 'AFTER DELETE ON mantenimientos',
+     _RESTAR_MANTENIMIENTO.format(fila='OLD') + _LIMPIAR.format(fila='OLD', fecha='fecha_mantenimiento')),
+    ('trg_flota_mantenimientos_upd', f'AFTER UPDATE OF {_COLUMNAS_MANTENIMIENTO} ON mantenimientos',
+     _RESTAR_MANTENIMIENTO.format(fila='OLD') + _LIMPIAR.format(fila='OLD', fecha='fecha_mantenimiento')
+     + _SUMAR_MANTENIMIENTO.format(fila='NEW')),
+]
+
+# Totales mensuales calculados desde las tablas base (para llenar y verificar el resumen)
+_VALORES_REALES = f'''
+    WITH aportes (vehiculo_id, mes, viajes, km, litros, km_con_litros, costo_combustible,
+                  km_con_costo, mantenimientos, costo_mantenimiento, km_mantenimiento) AS (
+        SELECT vehiculo_id, substr(fecha_salida, 1, 7),
+               {_APORTE_VIAJE.format(fila='viajes')},
+               0, 0, 0
+        FROM viajes WHERE {_VIAJE_CERRADO.format(fila='viajes')}
+        UNION ALL
+        SELECT vehiculo_id, substr(fecha_mantenimiento, 1, 7),
+               0, 0, 0, 0, 0, 0,
+               1, COALESCE(costo, 0), COALESCE(kilometros_recorridos, 0)
+        FROM mantenimientos
+    )
+    SELECT vehiculo_id, mes, SUM(viajes), SUM(km), SUM(litros), SUM(km_con_litros),
+           SUM(costo_combustible), SUM(km_con_costo), SUM(mantenimientos),
+           SUM(costo_mantenimiento), SUM(km_mantenimiento)
+    FROM aportes
+    GROUP BY vehiculo_id, mes
+    ORDER BY vehiculo_id, mes
+'''
+
+_COLUMNAS_RESUMEN = ('vehiculo_id, mes, viajes, km, litros, km_con_litros, costo_combustible, '
+                     'km_con_costo, mantenimientos, costo_mantenimiento, km_mantenimiento')
+
+# Cocientes comunes a todas las consultas, sobre columnas ya sumadas
+_INDICADORES = '''
+    ROUND(100.0 * litros / NULLIF(km_con_litros, 0), 2) AS litros_100km,
+    ROUND(costo_combustible / NULLIF(km_con_costo, 0), 2) AS costo_combustible_km,
+    ROUND(costo_mantenimiento / NULLIF(km_mantenimiento, 0), 2) AS costo_mantenimiento_km
+'''
+
+
+def crear_analitica(cursor: sqlite3.Cursor):
+    """Crea el resumen mensual de flota con sus triggers y lo llena con los datos actuales"""
+    cursor.execute(TABLA)
+    for nombre, evento, cuerpo in _TRIGGERS:
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {nombre} {evento} BEGIN {cuerpo} END")
+    reconstruir_analitica(cursor)
+
+
+def reconstruir_analitica(cursor: sqlite3.Cursor):
+    """Recalcula resumen_flota_mensual desde viajes y mantenimientos"""
+    cursor.execute("DELETE FROM resumen_flota_mensual")
+    cursor.execute(f"INSERT INTO resumen_flota_mensual ({_COLUMNAS_RESUMEN}) {_VALORES_REALES}")
+
+
+def verificar_analitica(cursor: sqlite3.Cursor) -> int:
+    """Cantidad de filas del resumen que difieren de los valores reales"""
+    reales = cursor.execute(_VALORES_REALES).fetchall()
+    guardados = cursor.execute(
+        f"SELECT {_COLUMNAS_RESUMEN} FROM resumen_flota_mensual ORDER BY vehiculo_id, mes").fetchall()
+    distintas = abs(len(reales) - len(guardados))
+    return distintas + sum(1 for a, b in zip(reales, guardados) if not _filas_iguales(a, b))
+
+
+def _validar_mes(nombre: str, mes: Optional[str]) -> Optional[str]:
+    if mes is not None and not re.fullmatch(r'\d{4}-(0[1-9]|1[0-2])', mes):
+        raise ValueError(f"El parámetro {nombre} debe tener el formato AAAA-MM")
+    return mes
+
+
+def _rango_meses(desde: Optional[str], hasta: Optional[str]) -> tuple:
+    """Condiciones y parámetros para filtrar el resumen por mes"""
+    condiciones, params = [], []
+    if _validar_mes('desde', desde):
+        condiciones.append('r.mes >= ?')
+        params.append(desde)
+    if _validar_mes('hasta', hasta):
+        condiciones.append('r.mes <= ?')
+        params.append(hasta)
+    return condiciones, params
+
+
+def _filas(cursor: sqlite3.Cursor) -> List[Dict]:
+    columnas = [d[0] for d in cursor.description]
+    return filas_a_dict(columnas, cursor.fetchall())
+
+
+def indicadores_por_vehiculo(cursor: sqlite3.Cursor, desde: str = None, hasta: str = None) -> List[Dict]:
+    """Totales e indicadores de cada vehículo en el rango de meses.
+
+    ranking_eficiencia ordena por litros cada 100 km (1 = el más eficiente);
+    los vehículos sin combustible registrado quedan al final.
+    """
+    condiciones, params = _rango_meses(desde, hasta)
+    cursor.execute(f'''
+        WITH totales AS (
+            SELECT r.vehiculo_id,
+                   SUM(r.viajes) AS viajes, SUM(r.km) AS km,
+                   SUM(r.litros) AS litros, SUM(r.km_con_litros) AS km_con_litros,
+                   SUM(r.costo_combustible) AS costo_combustible, SUM(r.km_con_costo) AS km_con_costo,
+                   SUM(r.mantenimientos) AS mantenimientos,
+                   SUM(r.costo_mantenimiento) AS costo_mantenimiento,
+                   SUM(r.km_mantenimiento) AS km_mantenimiento
+            FROM resumen_flota_mensual r
+            {'WHERE ' + ' AND '.join(condiciones) if condiciones else ''}
+            GROUP BY r.vehiculo_id
+        )
+        SELECT t.vehiculo_id, v.marca || ' ' || v.modelo AS vehiculo_info, v.patente,
+               t.viajes, t.km, ROUND(t.litros, 2) AS litros,
+               ROUND(t.costo_combustible, 2) AS costo_combustible, t.mantenimientos,
+               ROUND(t.costo_mantenimiento, 2) AS costo_mantenimiento,
+               {_INDICADORES},
+               RANK() OVER (ORDER BY t.litros / NULLIF(t.km_con_litros, 0) IS NULL,
+                                     t.litros / NULLIF(t.km_con_litros, 0)) AS ranking_eficiencia
+        FROM totales t
+        JOIN vehiculos v ON v.id = t.vehiculo_id
+        ORDER BY t.km DESC, t.vehiculo_id
+    ''', params)
+    return _filas(cursor)
+
+
+def serie_mensual(cursor: sqlite3.Cursor, vehiculo_id: int = None,
+                  desde: str = None, hasta: str = None) -> List[Dict]:
+    """Serie por mes de un vehículo (o de toda la flota si vehiculo_id es None).
+
+    Además de los indicadores del mes incluye los km acumulados y los litros
+    cada 100 km de los últimos 3 meses con datos, que suavizan meses con pocos viajes.
+    """
+    condiciones, params = _rango_meses(desde, hasta)
+    if vehiculo_id is not None:
+        condiciones.insert(0, 'r.vehiculo_id = ?')
+        params.insert(0, vehiculo_id)
+    cursor.execute(f'''
+        WITH mensual AS (
+            SELECT r.mes,
+                   SUM(r.viajes) AS viajes, SUM(r.km) AS km,
+                   SUM(r.litros) AS litros, SUM(r.km_con_litros) AS km_con_litros,
+                   SUM(r.costo_combustible) AS costo_combustible, SUM(r.km_con_costo) AS km_con_costo,
+                   SUM(r.mantenimientos) AS mantenimientos,
+                   SUM(r.costo_mantenimiento) AS costo_mantenimiento,
+                   SUM(r.km_mantenimiento) AS km_mantenimiento
+            FROM resumen_flota_mensual r
+            {'WHERE ' + ' AND '.join(condiciones) if condiciones else ''}
+            GROUP BY r.mes
+        )
+        SELECT mes, viajes, km, ROUND(litros, 2) AS litros,
+               ROUND(costo_combustible, 2) AS costo_combustible, mantenimientos,
+               ROUND(costo_mantenimiento, 2) AS costo_mantenimiento,
+               {_INDICADORES},
+               SUM(km) OVER acumulado AS km_acumulado,
+               ROUND(SUM(costo_combustible + costo_mantenimiento) OVER acumulado, 2) AS costo_acumulado,
+               ROUND(100.0 * SUM(litros) OVER tres_meses
+                     / NULLIF(SUM(km_con_litros) OVER tres_meses, 0), 2) AS litros_100km_3m
+        FROM mensual
+        WINDOW acumulado AS (ORDER BY mes),
+               tres_meses AS (ORDER BY mes ROWS BETWEEN 2 PRECEDING AND CURRENT ROW)
+        ORDER BY mes
+    ''', params)
+    return _filas(cursor)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('db', nargs='?', default='automotores.db')
+    parser.add_argument('--reparar', action='store_true', help='reconstruye el resumen si difiere')
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        cursor = conn.cursor()
+        # BEGIN IMMEDIATE: tablas base y resumen se leen (y reparan) sin escrituras en medio
+        cursor.execute("BEGIN IMMEDIATE")
+        distintas = verificar_analitica(cursor)
+        print(f"{'✅' if not distintas else '❌'} resumen_flota_mensual: {distintas} filas distintas")
+        if distintas and args.reparar:
+            reconstruir_analitica(cursor)
+            print("🔧 Resumen reconstruido")
+            distintas = 0
+        conn.commit()
+    finally:
+        conn.close()
+
+    sys.exit(1 if distintas else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,16 +2,276 @@
 # API REST - SISTEMA AUTOMOTORES
 # ===========================================
 
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, Response, request, jsonify, render_template, make_response
 from flask_cors import CORS
-from database import DatabaseManager
+from cache import leer_en_version
+from database import DatabaseManager, DatabaseManagerPorProceso, ErrorLote
+from metricas import Metricas, MedidorWSGI, gauge
+from perfilado import CLAVE_AUTORIZADO, PerfiladorWSGI
 import datetime
+import functools
+import hashlib
+import json
+import os
 
 app = Flask(__name__)
 CORS(app)
 
-# Inicializar la base de datos
-db = DatabaseManager()
+# Métricas del proceso (GET /metrics); el middleware mide cada petición
+metricas = Metricas()
+# Perfilado bajo demanda (ver perfilado.py); inactivo hasta que crear_app fija el secreto
+perfilador = PerfiladorWSGI(app.wsgi_app)
+app.wsgi_app = MedidorWSGI(perfilador, metricas)
+
+@app.before_request
+def registrar_ruta():
+    """Deja la regla de la ruta (no la URL) como etiqueta de las métricas HTTP"""
+    if request.url_rule is not None:
+        request.environ[MedidorWSGI.CLAVE_RUTA] = request.url_rule.rule
+
+# Tamaño máximo de página en los listados paginados
+MAX_LIMIT = 500
+
+# Máximo de filas por petición en las altas masivas (/bulk)
+MAX_FILAS_LOTE = 10000
+
+# Base de datos del proceso; la configura crear_app()
+db = None
+
+def crear_app(db_name: str = None, perfil: str = None, cola_ms: float = None,
+              cola_max_ops: int = None, preparar: bool = False,
+              datos_ejemplo: bool = None, metricas_sql: bool = None,
+              sql_lento_ms: float = None, perfil_secreto: str = None) -> Flask:
+    """Configura la base de datos de la aplicación y la devuelve.
+
+    Lo no indicado se lee del entorno:
+      AUTOMOTORES_DB            archivo SQLite (automotores.db)
+      AUTOMOTORES_PERFIL_DB     perfil de rendimiento ("durable" o "throughput")
+      AUTOMOTORES_COLA_MS       activa la escritura diferida de PUT /api/viajes/<id>
+                                (espera máxima en ms para juntar un lote)
+      AUTOMOTORES_COLA_MAX_OPS  operaciones por COMMIT de la cola (256)
+      AUTOMOTORES_DATOS_EJEMPLO "1" carga datos de demostración si la base está vacía
+      AUTOMOTORES_METRICAS_SQL  "0" deja de medir cada sentencia SQL en /metrics
+      AUTOMOTORES_SQL_LENTO_MS  registra con su EXPLAIN QUERY PLAN las sentencias más lentas
+      AUTOMOTORES_PERFIL_SECRETO  habilita el perfilado con la cabecera X-Perfil: <secreto>
+
+    Cada proceso abre su propio DatabaseManager al primer uso, de modo que la
+    aplicación se puede cargar antes del fork (preload). preparar=True aplica
+    las migraciones ya, en el proceso que llama.
+    """
+    global db
+    db_name = db_name or os.environ.get('AUTOMOTORES_DB', 'automotores.db')
+    perfil = perfil or os.environ.get('AUTOMOTORES_PERFIL_DB')
+    if cola_ms is None and os.environ.get('AUTOMOTORES_COLA_MS'):
+        cola_ms = float(os.environ['AUTOMOTORES_COLA_MS'])
+    cola_max_ops = cola_max_ops or int(os.environ.get('AUTOMOTORES_COLA_MAX_OPS', 256))
+    if datos_ejemplo is None:
+        datos_ejemplo = os.environ.get('AUTOMOTORES_DATOS_EJEMPLO') == '1'
+    if metricas_sql is None:
+        metricas_sql = os.environ.get('AUTOMOTORES_METRICAS_SQL', '1') != '0'
+    if sql_lento_ms is None and os.environ.get('AUTOMOTORES_SQL_LENTO_MS'):
+        sql_lento_ms = float(os.environ['AUTOMOTORES_SQL_LENTO_MS'])
+    metricas.sql_lento = sql_lento_ms / 1000.0 if sql_lento_ms is not None else None
+    perfilador.secreto = perfil_secreto or os.environ.get('AUTOMOTORES_PERFIL_SECRETO') or None
+
+    def fabrica():
+        base = DatabaseManager(db_name, perfil=perfil, datos_ejemplo=datos_ejemplo,
+                               metricas=metricas if metricas_sql else None)
+        if cola_ms is not None:
+            base.iniciar_cola_escritura(cola_ms, cola_max_ops)
+        return base
+
+    db = DatabaseManagerPorProceso(fabrica)
+    if preparar:
+        db.preparar()
+    return app
+
+CAMPOS_UPDATE_VIAJE = ('fecha_llegada', 'kilometraje_llegada', 'combustible_final',
+                       'combustible_consumido', 'costo_combustible', 'observaciones',
+                       'estado', 'tipo_personal')
+
+def parametros_paginacion():
+    """Lee ?limit=&after= de la petición. Sin limit se devuelve el listado completo."""
+    limit = request.args.get('limit')
+    after = request.args.get('after') or None
+    if limit is None:
+        if after:
+            raise ValueError('El parámetro after requiere limit')
+        return None, None
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise ValueError('El parámetro limit debe ser un número entero')
+    if limit < 1:
+        raise ValueError('El parámetro limit debe ser mayor que cero')
+    return min(limit, MAX_LIMIT), after
+
+def formato_stream():
+    """Formato pedido con ?stream=: 'ndjson', 'json' (arreglo por partes) o None"""
+    stream = request.args.get('stream')
+    if not stream or stream == '0':
+        return None
+    return 'ndjson' if stream == 'ndjson' else 'json'
+
+def respuesta_stream(filas, formato, filas_por_bloque=500):
+    """Respuesta que serializa las filas a medida que salen del cursor.
+
+    La memoria usada no depende del total de filas: se envía un bloque de
+    texto cada filas_por_bloque filas.
+    """
+    def generar():
+        if formato == 'json':
+            yield '{"success": true, "data": ['
+        separador = '\n' if formato == 'ndjson' else ','
+        bloque = []
+        primero = True
+        for fila in filas:
+            bloque.append(app.json.dumps(fila))
+            if len(bloque) >= filas_por_bloque:
+                yield ('' if primero else separador) + separador.join(bloque)
+                primero = False
+                bloque = []
+        if bloque:
+            yield ('' if primero else separador) + separador.join(bloque)
+            primero = False
+        if formato == 'json':
+            yield ']}'
+        elif not primero:
+            yield '\n'
+
+    mimetype = 'application/x-ndjson' if formato == 'ndjson' else 'application/json'
+    return Response(generar(), mimetype=mimetype)
+
+def respuesta_lista(coleccion, filas, limit, q=None):
+    """Respuesta JSON estándar de un listado, con el cursor de la página siguiente"""
+    return jsonify({
+        'success': True,
+        'data': filas,
+        'count': len(filas),
+        'next_cursor': db.cursor_siguiente(coleccion, filas, limit, q)
+    })
+
+# Parámetros de los listados que no son filtros de columnas
+PARAMETROS_LISTADO = ('limit', 'after', 'stream', 'q')
+
+def parametros_filtro(*otros):
+    """Filtros campo=valor o campo__op=valor de la petición.
+
+    DatabaseManager valida campos y operadores contra FILTROS_LISTADOS; otros
+    son parámetros propios de la ruta que no deben tratarse como filtros.
+    """
+    return {clave: valor for clave, valor in request.args.items()
+            if clave not in PARAMETROS_LISTADO and clave not in otros}
+
+def parametro_entero(nombre, defecto):
+    """Lee un parámetro entero no negativo de la query string"""
+    valor = request.args.get(nombre)
+    if valor is None:
+        return defecto
+    try:
+        valor = int(valor)
+    except ValueError:
+        raise ValueError(f'El parámetro {nombre} debe ser un número entero')
+    if valor < 0:
+        raise ValueError(f'El parámetro {nombre} no puede ser negativo')
+    return valor
+
+def parametro_busqueda():
+    """Texto de ?q= (None si no se envió o está vacío)"""
+    return request.args.get('q', '').strip() or None
+
+def condicional(*tablas):
+    """Agrega ETag y Last-Modified a un GET según las versiones de las tablas que lee.
+
+    Si el cliente ya tiene la versión vigente (If-None-Match o If-Modified-Since)
+    responde 304 sin ejecutar la consulta de la vista. Las lecturas cacheadas
+    de la vista se separan por versión: otro proceso (worker, consola,
+    importar_json) puede cambiar las tablas sin vaciar la caché de este.
+    """
+    def decorador(vista):
+        @functools.wraps(vista)
+        def envoltura(*args, **kwargs):
+            versiones = db.get_versiones_tablas(tablas)
+            huella = json.dumps([request.full_path, sorted(versiones.items())])
+            etag = hashlib.sha1(huella.encode()).hexdigest()
+            modificados = [modificado for _version, modificado in versiones.values() if modificado]
+            ultima = None
+            if modificados:
+                ultima = datetime.datetime.strptime(max(modificados), '%Y-%m-%d %H:%M:%S') \
+                    .replace(tzinfo=datetime.timezone.utc)
+
+            # If-None-Match tiene prioridad: Last-Modified solo resuelve segundos
+            if request.if_none_match:
+                no_modificado = request.if_none_match.contains(etag)
+            else:
+                no_modificado = (ultima is not None and request.if_modified_since is not None
+                                 and ultima <= request.if_modified_since)
+
+            if no_modificado:
+                respuesta = Response(status=304)
+            else:
+                with leer_en_version(tuple(sorted((tabla, version) for tabla, (version, _modificado)
+                                                  in versiones.items()))):
+                    respuesta = make_response(vista(*args, **kwargs))
+                if respuesta.status_code != 200:
+                    return respuesta
+            respuesta.set_etag(etag)
+            if ultima is not None:
+                respuesta.last_modified = ultima
+            # El navegador puede guardar la respuesta pero debe revalidarla siempre
+            respuesta.headers['Cache-Control'] = 'no-cache'
+            return respuesta
+        return envoltura
+    return decorador
+
+def filas_lote():
+    """Lee el cuerpo de un alta masiva: un arreglo JSON o NDJSON (un objeto por línea)"""
+    texto = request.get_data(as_text=True)
+    if request.mimetype != 'application/x-ndjson' and texto.lstrip().startswith('['):
+        try:
+            filas = json.loads(texto)
+        except ValueError:
+            raise ValueError('El cuerpo no es un arreglo JSON válido')
+    else:
+        filas = []
+        for numero, linea in enumerate(texto.splitlines(), start=1):
+            if not linea.strip():
+                continue
+            try:
+                filas.append(json.loads(linea))
+            except ValueError:
+                raise ValueError(f'Línea {numero} no es JSON válido')
+    if not filas:
+        raise ValueError('No se recibieron filas')
+    if len(filas) > MAX_FILAS_LOTE:
+        raise ValueError(f'Máximo {MAX_FILAS_LOTE} filas por petición')
+    return filas
+
+def respuesta_alta_masiva(coleccion):
+    """Inserta un lote en una transacción y devuelve el ID de cada fila o sus errores"""
+    try:
+        ids = db.crear_lote(coleccion, filas_lote())
+        return jsonify({
+            'success': True,
+            'data': [{'fila': i, 'id': fila_id} for i, fila_id in enumerate(ids)],
+            'count': len(ids)
+        }), 201
+    except ErrorLote as e:
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'errores': e.errores
+        }), 400
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
 
 # ===========================================
 # RUTAS PARA PROPIETARIOS
@@ -44,10 +304,14 @@ def tickets_page():
     return render_template('tickets.html')
 
 @app.route('/api/tickets', methods=['GET'])
+@condicional('tickets')
 def get_tickets():
     try:
-        tickets = db.get_all_tickets()
-        return jsonify({'success': True, 'data': tickets})
+        limit, after = parametros_paginacion()
+        tickets = db.get_all_tickets(limit=limit, after=after, filtros=parametros_filtro())
+        return respuesta_lista('tickets', tickets, limit)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -71,15 +335,19 @@ def create_ticket():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/propietarios', methods=['GET'])
+@condicional('propietarios', 'vehiculos')
 def get_propietarios():
     """Obtiene todos los propietarios"""
     try:
-        propietarios = db.get_propietarios()
+        limit, after = parametros_paginacion()
+        q = parametro_busqueda()
+        propietarios = db.get_propietarios(limit=limit, after=after, q=q)
+        return respuesta_lista('propietarios', propietarios, limit, q)
+    except ValueError as e:
         return jsonify({
-            'success': True,
-            'data': propietarios,
-            'count': len(propietarios)
-        })
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -87,6 +355,7 @@ def get_propietarios():
         }), 500
 
 @app.route('/api/propietarios/<int:propietario_id>', methods=['GET'])
+@condicional('propietarios')
 def get_propietario(propietario_id):
     """Obtiene un propietario por ID"""
     try:
@@ -223,15 +492,19 @@ def delete_propietario(propietario_id):
 # ===========================================
 
 @app.route('/api/vehiculos', methods=['GET'])
+@condicional('vehiculos', 'propietarios', 'mantenimientos')
 def get_vehiculos():
     """Obtiene todos los vehículos"""
     try:
-        vehiculos = db.get_all_vehiculos()
+        limit, after = parametros_paginacion()
+        q = parametro_busqueda()
+        vehiculos = db.get_all_vehiculos(limit=limit, after=after, q=q)
+        return respuesta_lista('vehiculos', vehiculos, limit, q)
+    except ValueError as e:
         return jsonify({
-            'success': True,
-            'data': vehiculos,
-            'count': len(vehiculos)
-        })
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -239,6 +512,7 @@ def get_vehiculos():
         }), 500
 
 @app.route('/api/propietarios/<int:propietario_id>/vehiculos', methods=['GET'])
+@condicional('vehiculos', 'propietarios', 'mantenimientos')
 def get_vehiculos_by_propietario(propietario_id):
     """Obtiene vehículos de un propietario"""
     try:
@@ -296,6 +570,11 @@ def create_vehiculo():
             'error': str(e)
         }), 500
 
+@app.route('/api/vehiculos/bulk', methods=['POST'])
+def create_vehiculos_bulk():
+    """Crea muchos vehiculos en una transacción (arreglo JSON o NDJSON)"""
+    return respuesta_alta_masiva('vehiculos')
+
 @app.route('/api/vehiculos/<int:vehiculo_id>', methods=['PUT'])
 def update_vehiculo(vehiculo_id):
     """Actualiza un vehículo"""
@@ -371,14 +650,45 @@ def delete_vehiculo(vehiculo_id):
 # ===========================================
 
 @app.route('/api/mantenimientos', methods=['GET'])
+@condicional('mantenimientos', 'vehiculos', 'propietarios')
 def get_mantenimientos():
-    """Obtiene todos los mantenimientos"""
+    """Obtiene todos los mantenimientos (?stream=1|ndjson para exportar sin paginar)"""
     try:
-        mantenimientos = db.get_all_mantenimientos()
+        formato = formato_stream()
+        q = parametro_busqueda()
+        filtros = parametros_filtro()
+        if formato:
+            if q:
+                raise ValueError('La exportación con stream no admite el parámetro q')
+            return respuesta_stream(db.iter_all_mantenimientos(filtros=filtros), formato)
+        limit, after = parametros_paginacion()
+        mantenimientos = db.get_all_mantenimientos(limit=limit, after=after, q=q, filtros=filtros)
+        return respuesta_lista('mantenimientos', mantenimientos, limit, q)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/vehiculos/<int:vehiculo_id>/odometro', methods=['GET'])
+@condicional('vehiculos', 'viajes')
+def get_odometro_vehiculo(vehiculo_id):
+    """Kilometraje vigente de un vehículo y su último viaje cerrado"""
+    try:
+        odometro = db.get_odometro(vehiculo_id)
+        if odometro is None:
+            return jsonify({
+                'success': False,
+                'error': 'Vehículo no encontrado'
+            }), 404
         return jsonify({
             'success': True,
-            'data': mantenimientos,
-            'count': len(mantenimientos)
+            'data': odometro
         })
     except Exception as e:
         return jsonify({
@@ -387,6 +697,7 @@ def get_mantenimientos():
         }), 500
 
 @app.route('/api/vehiculos/<int:vehiculo_id>/mantenimientos', methods=['GET'])
+@condicional('mantenimientos', 'vehiculos')
 def get_mantenimientos_by_vehiculo(vehiculo_id):
     """Obtiene mantenimientos de un vehículo"""
     try:
@@ -439,6 +750,11 @@ def create_mantenimiento():
             'error': str(e)
         }), 500
 
+@app.route('/api/mantenimientos/bulk', methods=['POST'])
+def create_mantenimientos_bulk():
+    """Crea muchos mantenimientos en una transacción (arreglo JSON o NDJSON)"""
+    return respuesta_alta_masiva('mantenimientos')
+
 @app.route('/api/mantenimientos/<int:mantenimiento_id>', methods=['PUT'])
 def update_mantenimiento(mantenimiento_id):
     """Actualiza un mantenimiento"""
@@ -513,44 +829,146 @@ def delete_mantenimiento(mantenimiento_id):
             'error': str(e)
         }), 500
 
+# ===========================================
+# RUTAS DE MANTENIMIENTO PREVENTIVO
+# ===========================================
+
+@app.route('/api/mantenimientos/pendientes', methods=['GET'])
+def get_mantenimientos_pendientes():
+    """Servicios vencidos o próximos, del más urgente al menos (?dias=30&km=1000&limit=)"""
+    try:
+        limit, _after = parametros_paginacion()
+        datos = db.get_mantenimientos_pendientes(parametro_entero('dias', 30),
+                                                 parametro_entero('km', 1000), limit)
+        return jsonify({
+            'success': True,
+            'data': datos,
+            'count': len(datos)
+        })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/mantenimientos/reglas', methods=['GET'])
+def get_reglas_mantenimiento():
+    """Obtiene las reglas de mantenimiento preventivo"""
+    try:
+        reglas = db.get_reglas_mantenimiento()
+        return jsonify({
+            'success': True,
+            'data': reglas,
+            'count': len(reglas)
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/mantenimientos/reglas/<path:tipo_mantenimiento>', methods=['PUT'])
+def update_regla_mantenimiento(tipo_mantenimiento):
+    """Crea o reemplaza la regla de un tipo ({"cada_km": 10000, "cada_meses": 6})"""
+    try:
+        data = request.get_json() or {}
+        nueva = db.update_regla_mantenimiento(tipo_mantenimiento, data.get('cada_km'),
+                                              data.get('cada_meses'))
+        return jsonify({
+            'success': True,
+            'message': 'Regla creada exitosamente' if nueva else 'Regla actualizada exitosamente'
+        }), 201 if nueva else 200
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/mantenimientos/reglas/<path:tipo_mantenimiento>', methods=['DELETE'])
+def delete_regla_mantenimiento(tipo_mantenimiento):
+    """Elimina una regla de mantenimiento preventivo"""
+    try:
+        if db.delete_regla_mantenimiento(tipo_mantenimiento):
+            return jsonify({
+                'success': True,
+                'message': 'Regla eliminada exitosamente'
+            })
+        return jsonify({
+            'success': False,
+            'error': 'Regla no encontrada'
+        }), 404
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+# ===========================================
+# RUTAS DE BÚSQUEDA
+# ===========================================
+
+@app.route('/api/search', methods=['GET'])
+@condicional('propietarios', 'vehiculos', 'mantenimientos')
+def buscar():
+    """Busca ?q= en propietarios, vehículos y mantenimientos.
+
+    Devuelve la primera página de cada colección ordenada por relevancia; el
+    next_cursor de cada una se usa con ?q=&after= en el listado de esa colección.
+    """
+    try:
+        q = parametro_busqueda()
+        if q is None:
+            raise ValueError('El parámetro q es obligatorio')
+        limit, after = parametros_paginacion()
+        if after:
+            raise ValueError('Para ver más resultados use ?q=&after= en el listado de cada colección')
+        limit = limit or 10
+        resultados = db.buscar(q, limit)
+        return jsonify({
+            'success': True,
+            'data': {
+                coleccion: {
+                    'data': filas,
+                    'count': len(filas),
+                    'next_cursor': db.cursor_siguiente(coleccion, filas, limit, q)
+                }
+                for coleccion, filas in resultados.items()
+            }
+        })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 # ===========================================
 # RUTAS DE ESTADÍSTICAS
 # ===========================================
 
 @app.route('/api/estadisticas', methods=['GET'])
+@condicional('propietarios', 'vehiculos', 'mantenimientos')
 def get_estadisticas():
     """Obtiene estadísticas generales del sistema"""
     try:
-        propietarios = db.get_propietarios()
-        vehiculos = db.get_all_vehiculos()
-        mantenimientos = db.get_all_mantenimientos()
-        
-        # Calcular estadísticas
-        total_propietarios = len(propietarios)
-        total_vehiculos = len(vehiculos)
-        total_mantenimientos = len(mantenimientos)
-        
-        # Marca más común
-        marcas = {}
-        for vehiculo in vehiculos:
-            marca = vehiculo['marca']
-            marcas[marca] = marcas.get(marca, 0) + 1
-        
-        marca_mas_comun = max(marcas.items(), key=lambda x: x[1]) if marcas else ('N/A', 0)
-        
-        # Costo total de mantenimientos
-        costo_total = sum(m['costo'] or 0 for m in mantenimientos)
-        
+        estadisticas = db.get_estadisticas_generales()
         return jsonify({
             'success': True,
-            'data': {
-                'total_propietarios': total_propietarios,
-                'total_vehiculos': total_vehiculos,
-                'total_mantenimientos': total_mantenimientos,
-                'marca_mas_comun': marca_mas_comun[0],
-                'vehiculos_por_marca': marca_mas_comun[1],
-                'costo_total_mantenimientos': costo_total
-            }
+            'data': estadisticas
         })
     except Exception as e:
         return jsonify({
@@ -558,20 +976,222 @@ def get_estadisticas():
             'error': str(e)
         }), 500
 
+@app.route('/api/cache/estadisticas', methods=['GET'])
+def get_estadisticas_cache():
+    """Obtiene las métricas de la caché de lecturas (hits, misses, entradas)"""
+    return jsonify({
+        'success': True,
+        'data': db.cache.stats() if db.cache is not None else None
+    })
+
+@app.route('/api/cola/estadisticas', methods=['GET'])
+def get_estadisticas_cola():
+    """Métricas de la cola de escritura (lotes, operaciones por lote, pendientes)"""
+    return jsonify({
+        'success': True,
+        'data': db.cola.estadisticas() if db.cola is not None else None
+    })
+
+@app.route('/metrics', methods=['GET'])
+def get_metricas():
+    """Métricas HTTP, SQL, del pool y de la cola en formato de texto de Prometheus"""
+    extra = []
+    if db.pool is not None:
+        estado = db.pool.stats()
+        extra += gauge('automotores_db_pool_conexiones', 'Conexiones del pool por estado',
+                       {('libres',): estado['libres'], ('en_uso',): estado['en_uso']}, ('estado',))
+    if db.cola is not None:
+        extra += gauge('automotores_cola_pendientes', 'Escrituras encoladas sin confirmar',
+                       {(): db.cola.pendientes()})
+    return Response(metricas.exportar(extra), mimetype='text/plain; version=0.0.4')
+
+# ===========================================
+# RUTAS DE PERFILADO
+# ===========================================
+
+def perfil_no_autorizado():
+    """Sin el secreto las rutas de perfilado no existen"""
+    if request.environ.get(CLAVE_AUTORIZADO):
+        return None
+    return jsonify({
+        'success': False,
+        'error': 'Recurso no encontrado'
+    }), 404
+
+@app.route('/api/perfiles', methods=['GET'])
+def get_perfiles():
+    """Resumen de los perfiles guardados en este proceso"""
+    denegado = perfil_no_autorizado()
+    if denegado:
+        return denegado
+    return jsonify({
+        'success': True,
+        'data': perfilador.listar()
+    })
+
+@app.route('/api/perfiles/<int:perfil_id>', methods=['GET'])
+def get_perfil(perfil_id):
+    """Perfil completo de una petición, con las funciones más costosas"""
+    denegado = perfil_no_autorizado()
+    if denegado:
+        return denegado
+    perfil = perfilador.obtener(perfil_id)
+    if perfil is None:
+        return jsonify({
+            'success': False,
+            'error': 'Perfil no encontrado'
+        }), 404
+    return jsonify({
+        'success': True,
+        'data': perfil
+    })
+
+@app.route('/api/perfiles/agregado', methods=['GET'])
+def get_perfil_agregado():
+    """Pilas más frecuentes del muestreo (?top=N, 20 por defecto)"""
+    denegado = perfil_no_autorizado()
+    if denegado:
+        return denegado
+    try:
+        top = parametro_entero('top', 20)
+        muestreador = perfilador.muestreador
+        return jsonify({
+            'success': True,
+            'data': muestreador.top(top) if muestreador is not None else None
+        })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/api/perfiles/agregado', methods=['POST'])
+def iniciar_perfil_agregado():
+    """Activa (o reinicia) el muestreo de pilas en este proceso (?intervalo_ms=5)"""
+    denegado = perfil_no_autorizado()
+    if denegado:
+        return denegado
+    try:
+        intervalo_ms = float(request.args.get('intervalo_ms', 5))
+        perfilador.iniciar_agregado(intervalo_ms)
+        return jsonify({
+            'success': True,
+            'message': f'Muestreo activo cada {intervalo_ms:g} ms'
+        })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/api/perfiles/agregado', methods=['DELETE'])
+def detener_perfil_agregado():
+    """Detiene el muestreo de pilas"""
+    denegado = perfil_no_autorizado()
+    if denegado:
+        return denegado
+    perfilador.detener_agregado()
+    return jsonify({
+        'success': True,
+        'message': 'Muestreo detenido'
+    })
+
+# ===========================================
+# RUTAS DE ANALÍTICA DE FLOTA
+# ===========================================
+
+@app.route('/api/analitica/vehiculos', methods=['GET'])
+@condicional('viajes', 'mantenimientos', 'vehiculos')
+def get_analitica_vehiculos():
+    """Km, L/100 km y costo por km de cada vehículo (?desde=AAAA-MM&hasta=AAAA-MM)"""
+    try:
+        datos = db.get_analitica_vehiculos(request.args.get('desde'), request.args.get('hasta'))
+        return jsonify({
+            'success': True,
+            'data': datos,
+            'count': len(datos)
+        })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/analitica/mensual', methods=['GET'])
+@condicional('viajes', 'mantenimientos')
+def get_analitica_mensual():
+    """Serie mensual de la flota o de un vehículo (?vehiculo_id=&desde=&hasta=)"""
+    try:
+        vehiculo_id = request.args.get('vehiculo_id')
+        if vehiculo_id is not None:
+            try:
+                vehiculo_id = int(vehiculo_id)
+            except ValueError:
+                raise ValueError('El parámetro vehiculo_id debe ser un número entero')
+        datos = db.get_analitica_mensual(vehiculo_id, request.args.get('desde'), request.args.get('hasta'))
+        return jsonify({
+            'success': True,
+            'data': datos,
+            'count': len(datos)
+        })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 # ===========================================
 # RUTAS PARA VIAJES
 # ===========================================
 
 @app.route('/api/viajes', methods=['GET'])
+@condicional('viajes', 'vehiculos', 'propietarios')
 def get_viajes():
-    """Obtiene todos los viajes"""
+    """Obtiene todos los viajes (?stream=1|ndjson para exportar sin paginar)"""
     try:
-        viajes = db.get_all_viajes()
+        formato = formato_stream()
+        filtros = parametros_filtro()
+        if formato:
+            return respuesta_stream(db.iter_all_viajes(filtros=filtros), formato)
+        limit, after = parametros_paginacion()
+        viajes = db.get_all_viajes(limit=limit, after=after, filtros=filtros)
+        return respuesta_lista('viajes', viajes, limit)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/viajes/resumen', methods=['GET'])
+@condicional('viajes')
+def get_resumen_viajes():
+    """Totales de viajes (cantidad, en curso, completados, km) con los filtros de /api/viajes"""
+    try:
+        resumen = db.get_resumen_viajes(filtros=parametros_filtro())
         return jsonify({
             'success': True,
-            'data': viajes,
-            'count': len(viajes)
+            'data': resumen
         })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -579,6 +1199,7 @@ def get_viajes():
         }), 500
 
 @app.route('/api/vehiculos/<int:vehiculo_id>/viajes', methods=['GET'])
+@condicional('viajes', 'vehiculos', 'propietarios')
 def get_viajes_by_vehiculo(vehiculo_id):
     """Obtiene viajes de un vehículo"""
     try:
@@ -632,23 +1253,39 @@ def create_viaje():
             'error': str(e)
         }), 500
 
+@app.route('/api/viajes/bulk', methods=['POST'])
+def create_viajes_bulk():
+    """Crea muchos viajes en una transacción (arreglo JSON o NDJSON)"""
+    return respuesta_alta_masiva('viajes')
+
 @app.route('/api/viajes/<int:viaje_id>', methods=['PUT'])
 def update_viaje(viaje_id):
-    """Actualiza un viaje"""
+    """Actualiza un viaje.
+
+    Con la cola de escritura activa responde 202 con el id de la operación
+    (consultable en /api/operaciones/<id>); ?esperar=1 espera el COMMIT.
+    """
     try:
         data = request.get_json()
+        campos = {campo: data.get(campo) for campo in CAMPOS_UPDATE_VIAJE}
         
-        success = db.update_viaje(
-            viaje_id=viaje_id,
-            fecha_llegada=data.get('fecha_llegada'),
-            kilometraje_llegada=data.get('kilometraje_llegada'),
-            combustible_final=data.get('combustible_final'),
-            combustible_consumido=data.get('combustible_consumido'),
-            costo_combustible=data.get('costo_combustible'),
-            observaciones=data.get('observaciones'),
-            estado=data.get('estado'),
-            tipo_personal=data.get('tipo_personal')
-        )
+        if db.cola is not None and request.args.get('esperar') not in ('1', 'true'):
+            if campos['kilometraje_llegada'] is not None:
+                try:
+                    campos['kilometraje_llegada'] = int(campos['kilometraje_llegada'])
+                except (TypeError, ValueError):
+                    raise ValueError('El campo kilometraje_llegada debe ser un número entero')
+            operacion = db.encolar_update_viaje(viaje_id, **campos)
+            respuesta = jsonify({
+                'success': True,
+                'message': 'Actualización encolada',
+                'data': {'operacion_id': operacion.id}
+            })
+            respuesta.status_code = 202
+            respuesta.headers['Location'] = f'/api/operaciones/{operacion.id}'
+            return respuesta
+        
+        success = db.update_viaje(viaje_id=viaje_id, **campos)
         
         if success:
             return jsonify({
@@ -661,12 +1298,31 @@ def update_viaje(viaje_id):
                 'error': 'Viaje no encontrado'
             }), 404
             
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
+@app.route('/api/operaciones/<int:op_id>', methods=['GET'])
+def get_operacion(op_id):
+    """Estado de una escritura encolada: pendiente, confirmada o error"""
+    operacion = db.get_operacion(op_id)
+    if operacion is None:
+        return jsonify({
+            'success': False,
+            'error': 'Operación no encontrada'
+        }), 404
+    return jsonify({
+        'success': True,
+        'data': operacion
+    })
+
 @app.route('/api/viajes/<int:viaje_id>', methods=['DELETE'])
 def delete_viaje(viaje_id):
     """Elimina un viaje"""
@@ -695,16 +1351,20 @@ def delete_viaje(viaje_id):
 # ===========================================
 
 @app.route('/api/presupuesto', methods=['GET'])
+@condicional('presupuesto')
 def get_movimientos_presupuesto():
     """Obtiene movimientos de presupuesto"""
     try:
         tipo_movimiento = request.args.get('tipo')
-        movimientos = db.get_movimientos_presupuesto(tipo_movimiento)
+        limit, after = parametros_paginacion()
+        movimientos = db.get_movimientos_presupuesto(tipo_movimiento, limit=limit, after=after,
+                                                     filtros=parametros_filtro('tipo'))
+        return respuesta_lista('presupuesto', movimientos, limit)
+    except ValueError as e:
         return jsonify({
-            'success': True,
-            'data': movimientos,
-            'count': len(movimientos)
-        })
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -712,6 +1372,7 @@ def get_movimientos_presupuesto():
         }), 500
 
 @app.route('/api/presupuesto/estadisticas', methods=['GET'])
+@condicional('presupuesto')
 def get_estadisticas_presupuesto():
     """Obtiene estadísticas del presupuesto"""
     try:
@@ -763,6 +1424,11 @@ def create_movimiento_presupuesto():
             'error': str(e)
         }), 500
 
+@app.route('/api/presupuesto/bulk', methods=['POST'])
+def create_presupuesto_bulk():
+    """Crea muchos movimientos de presupuesto en una transacción (arreglo JSON o NDJSON)"""
+    return respuesta_alta_masiva('presupuesto')
+
 @app.route('/api/presupuesto/<int:movimiento_id>', methods=['DELETE'])
 def delete_movimiento_presupuesto(movimiento_id):
     """Elimina un movimiento de presupuesto"""
@@ -791,6 +1457,7 @@ def delete_movimiento_presupuesto(movimiento_id):
 # ===========================================
 
 @app.route('/api/propietarios/<int:propietario_id>/info', methods=['GET'])
+@condicional('propietarios_info')
 def get_propietario_info(propietario_id):
     """Obtiene información adicional de un propietario"""
     try:
@@ -868,8 +1535,14 @@ def update_propietario_info(propietario_id):
             'error': str(e)
         }), 500
 
+crear_app()
+
+# Servidor de desarrollo. En producción: python servidor.py (ver wsgi.py)
 if __name__ == '__main__':
     print("🚗 Iniciando Sistema de Gestión de Automotores...")
+    # Servidor de desarrollo: con la base vacía se cargan los datos de ejemplo
+    crear_app(datos_ejemplo=True)
+    db.obtener()
     print("📊 Base de datos SQLite3 inicializada")
     print("🌐 API REST disponible en: http://localhost:5000")
     print("💻 Interfaz web disponible en: http://localhost:5000")
@@ -0,0 +1,59 @@
+# ===========================================
+# BENCHMARK - ALTAS MASIVAS
+# ===========================================
+#
+# Compara dar de alta N vehículos con N peticiones POST /api/vehiculos
+# (una transacción y un commit cada una) contra una sola petición
+# POST /api/vehiculos/bulk.
+#
+# Uso:
+#   python benchmarks/bench_altas_masivas.py [--filas 2000] [--perfil durable]
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def vehiculos(prefijo: str, filas: int) -> list:
+    return [{'propietario_id': 1 + i % 5, 'marca': 'Toyota', 'modelo': f'Modelo{i % 20}',
+             'patente': f'{prefijo}{i:06d}'} for i in range(filas)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--filas', type=int, default=2000)
+    parser.add_argument('--perfil', default='durable')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        import app as app_module
+        from database import DatabaseManager
+
+        app_module.db = DatabaseManager(os.path.join(tmp, 'altas.db'), perfil=args.perfil,
+                                        datos_ejemplo=True)
+        client = app_module.app.test_client()
+
+        inicio = time.perf_counter()
+        for fila in vehiculos('U', args.filas):
+            assert client.post('/api/vehiculos', json=fila).status_code == 201
+        individual = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        response = client.post('/api/vehiculos/bulk', json=vehiculos('B', args.filas))
+        masiva = time.perf_counter() - inicio
+        assert response.status_code == 201, response.json
+
+        print(f"{args.filas:,} vehículos (perfil {args.perfil})")
+        print(f"  POST individual: {individual:.2f}s ({args.filas / individual:,.0f} filas/s)")
+        print(f"  POST /bulk:      {masiva:.2f}s ({args.filas / masiva:,.0f} filas/s), "
+              f"{individual / masiva:.0f}x")
+        app_module.db.close()
+
+
+if __name__ == '__main__':
+    main()
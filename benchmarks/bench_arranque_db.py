@@ -0,0 +1,85 @@
+# ===========================================
+# BENCHMARK - ARRANQUE DE LA BASE DE DATOS
+# ===========================================
+#
+# Mide cuánto tarda DatabaseManager en quedar listo:
+#   - base nueva:       aplica todas las migraciones
+#   - al día:           una sola lectura de PRAGMA user_version
+#   - datos de ejemplo: al día y además verifica si hay que cargar la demo
+# y el arranque de un worker en un proceso nuevo (import app + primera
+# conexión), que es lo que se repite con cada worker o reinicio.
+#
+# Uso:
+#   python benchmarks/bench_arranque_db.py [--repeticiones 50] [--procesos 10]
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from database import DatabaseManager
+
+# Se ejecuta en el proceso hijo: importa la aplicación y abre su base
+WORKER = '''
+import json, sys, time
+inicio = time.perf_counter()
+sys.path.insert(0, {raiz!r})
+import app
+app.db.obtener()
+print(json.dumps(time.perf_counter() - inicio))
+'''
+
+
+def arrancar(db_path: str, **opciones) -> float:
+    inicio = time.perf_counter()
+    db = DatabaseManager(db_path, **opciones)
+    segundos = time.perf_counter() - inicio
+    db.close()
+    return segundos
+
+
+def medir_worker(db_path: str) -> tuple:
+    """(segundos dentro del proceso, segundos totales incluido el intérprete)"""
+    env = dict(os.environ, AUTOMOTORES_DB=db_path)
+    inicio = time.perf_counter()
+    salida = subprocess.run([sys.executable, '-c', WORKER.format(raiz=RAIZ)], env=env,
+                            capture_output=True, text=True, check=True).stdout
+    total = time.perf_counter() - inicio
+    return json.loads(salida.strip().splitlines()[-1]), total
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeticiones', type=int, default=50)
+    parser.add_argument('--procesos', type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        nuevas = [arrancar(os.path.join(tmp, f'nueva{n}.db'))
+                  for n in range(min(args.repeticiones, 10))]
+        db_path = os.path.join(tmp, 'bench.db')
+        arrancar(db_path, datos_ejemplo=True)
+        al_dia = [arrancar(db_path) for _ in range(args.repeticiones)]
+        ejemplo = [arrancar(db_path, datos_ejemplo=True) for _ in range(args.repeticiones)]
+
+        print(f"{'DatabaseManager()':>24} {'p50 (ms)':>10} {'máx (ms)':>10}")
+        for nombre, tiempos in (('base nueva', nuevas), ('al día', al_dia),
+                                ('al día + datos ejemplo', ejemplo)):
+            print(f"{nombre:>24} {statistics.median(tiempos) * 1000:>10.2f} "
+                  f"{max(tiempos) * 1000:>10.2f}")
+
+        workers = [medir_worker(db_path) for _ in range(args.procesos)]
+        print(f"\nworker nuevo ({args.procesos} procesos): "
+              f"import app + base lista p50 {statistics.median(w[0] for w in workers) * 1000:.1f} ms, "
+              f"proceso completo p50 {statistics.median(w[1] for w in workers) * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+# ===========================================
+# BENCHMARK - COLA DE ESCRITURA CON COMMIT AGRUPADO
+# ===========================================
+#
+# Compara actualizaciones de viajes (update_viaje) hechas desde varios hilos:
+#   - directa:   cada actualización abre su transacción y hace su COMMIT
+#   - cola:      pasa por la cola y espera el COMMIT del lote (durable)
+#   - cola 202:  solo encola (lo que hace PUT /api/viajes sin ?esperar=1);
+#                la latencia es la de encolar y el throughput se mide hasta
+#                que la última operación quedó confirmada
+#
+# Uso:
+#   python benchmarks/bench_cola_escritura.py [--hilos 16] [--escrituras 200]
+#       [--perfil durable] [--intervalo-ms 0] [--max-ops 256]
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DatabaseManager
+
+
+def percentil(valores: list, p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+
+def medir(db: DatabaseManager, viajes: list, hilos: int, escrituras: int, modo: str) -> dict:
+    """Ejecuta las actualizaciones en hilos y devuelve throughput y latencias"""
+    latencias = [[] for _ in range(hilos)]
+    operaciones = [[] for _ in range(hilos)]
+
+    def worker(n):
+        viaje_id = viajes[n % len(viajes)]
+        for i in range(escrituras):
+            campos = {'observaciones': f'Posición {n}-{i}', 'combustible_final': float(i % 50)}
+            inicio = time.perf_counter()
+            if modo == 'cola 202':
+                operaciones[n].append(db.encolar_update_viaje(viaje_id, **campos))
+            else:
+                db.update_viaje(viaje_id, **campos)
+            latencias[n].append(time.perf_counter() - inicio)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(hilos)]
+    inicio = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for ops in operaciones:
+        for operacion in ops:
+            operacion.futuro.result()
+    duracion = time.perf_counter() - inicio
+
+    todas = [l for por_hilo in latencias for l in por_hilo]
+    return {
+        'ops_s': len(todas) / duracion,
+        'p50_ms': statistics.median(todas) * 1000,
+        'p99_ms': percentil(todas, 0.99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--hilos', type=int, default=16)
+    parser.add_argument('--escrituras', type=int, default=200)
+    parser.add_argument('--perfil', default='durable')
+    parser.add_argument('--intervalo-ms', type=float, default=0.0)
+    parser.add_argument('--max-ops', type=int, default=256)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, 'bench.db'), pool_size=args.hilos, perfil=args.perfil,
+                             datos_ejemplo=True)
+        vehiculo = db.get_all_vehiculos()[0]
+        viajes = db.crear_lote('viajes', [
+            {'vehiculo_id': vehiculo['id'], 'propietario_id': vehiculo['propietario_id'],
+             'destino': f'Ruta {n}', 'fecha_salida': '2024-06-01', 'kilometraje_salida': 1000}
+            for n in range(args.hilos)])
+
+        print(f"update_viaje - {args.hilos} hilos x {args.escrituras} escrituras, perfil {args.perfil}, "
+              f"lote cada {args.intervalo_ms:g} ms o {args.max_ops} ops")
+        print(f"{'modo':>10} {'ops/s':>10} {'p50 (ms)':>10} {'p99 (ms)':>10}")
+        medir(db, viajes, 2, 20, 'directa')  # calentamiento
+        resultados = {'directa': medir(db, viajes, args.hilos, args.escrituras, 'directa')}
+
+        cola = db.iniciar_cola_escritura(args.intervalo_ms, args.max_ops)
+        resultados['cola'] = medir(db, viajes, args.hilos, args.escrituras, 'cola')
+        resultados['cola 202'] = medir(db, viajes, args.hilos, args.escrituras, 'cola 202')
+        estadisticas = cola.estadisticas()
+        db.close()
+
+        for modo, r in resultados.items():
+            print(f"{modo:>10} {r['ops_s']:>10.0f} {r['p50_ms']:>10.2f} {r['p99_ms']:>10.2f}")
+        print(f"  lotes: {estadisticas['lotes']}, ops por lote: {estadisticas['ops_por_lote']}, "
+              f"errores: {estadisticas['errores']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+# ===========================================
+# BENCHMARK - ESTADÍSTICAS GENERALES
+# ===========================================
+#
+# Compara la latencia de GET /api/estadisticas con el cálculo anterior
+# (tres listados completos + conteo en Python) a medida que crecen las
+# tablas de vehículos y mantenimientos.
+#
+# Uso:
+#   python benchmarks/bench_estadisticas.py [--tamaños 1000,10000,100000] [--repeticiones 20]
+
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MARCAS = ['Toyota', 'Ford', 'Chevrolet', 'Nissan', 'Renault', 'Fiat', 'Peugeot', 'Honda']
+
+
+def estadisticas_anteriores(db) -> dict:
+    """Cálculo previo del endpoint, conservado solo para comparar"""
+    propietarios = db.get_propietarios()
+    vehiculos = db.get_all_vehiculos()
+    mantenimientos = db.get_all_mantenimientos()
+    marcas = {}
+    for vehiculo in vehiculos:
+        marcas[vehiculo['marca']] = marcas.get(vehiculo['marca'], 0) + 1
+    marca_mas_comun = max(marcas.items(), key=lambda x: x[1]) if marcas else ('N/A', 0)
+    return {
+        'total_propietarios': len(propietarios),
+        'total_vehiculos': len(vehiculos),
+        'total_mantenimientos': len(mantenimientos),
+        'marca_mas_comun': marca_mas_comun[0],
+        'vehiculos_por_marca': marca_mas_comun[1],
+        'costo_total_mantenimientos': sum(m['costo'] or 0 for m in mantenimientos),
+    }
+
+
+def poblar(db_path: str, filas: int):
+    """Agrega vehículos y mantenimientos hasta tener aproximadamente `filas` de cada uno"""
+    conn = sqlite3.connect(db_path)
+    propietarios = max(1, filas // 10)
+    conn.executemany("INSERT INTO propietarios (nombre, apellido, rut) VALUES (?, ?, ?)",
+                     ((f"Nombre{i}", f"Apellido{i}", f"bench-{filas}-{i}") for i in range(propietarios)))
+    ids = [r[0] for r in conn.execute("SELECT id FROM propietarios")]
+    conn.executemany("INSERT INTO vehiculos (propietario_id, marca, modelo, kilometraje) VALUES (?, ?, ?, ?)",
+                     ((ids[i % len(ids)], MARCAS[i % len(MARCAS)], f"Modelo{i % 50}", i) for i in range(filas)))
+    vids = [r[0] for r in conn.execute("SELECT id FROM vehiculos")]
+    conn.executemany('''
+        INSERT INTO mantenimientos (vehiculo_id, fecha_mantenimiento, tipo_mantenimiento, costo)
+        VALUES (?, ?, 'Revisión', ?)
+    ''', ((vids[i % len(vids)], f"2024-{1 + i % 12:02d}-01", float(i % 1000)) for i in range(filas)))
+    conn.commit()
+    conn.close()
+
+
+def medir(funcion, repeticiones: int) -> float:
+    """Mediana en milisegundos"""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tamaños', default='1000,10000,100000')
+    parser.add_argument('--repeticiones', type=int, default=20)
+    args = parser.parse_args()
+    tamaños = [int(t) for t in args.tamaños.split(',')]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        import app as app_module
+        from database import DatabaseManager
+
+        client = app_module.app.test_client()
+        print(f"{'filas':>10} {'endpoint (ms)':>14} {'anterior (ms)':>14}")
+        for filas in tamaños:
+            db_path = os.path.join(tmp, f'estadisticas_{filas}.db')
+            db = DatabaseManager(db_path, datos_ejemplo=True)
+            poblar(db_path, filas)
+            app_module.db = db
+
+            assert db.get_estadisticas_generales()['total_vehiculos'] == \
+                estadisticas_anteriores(db)['total_vehiculos']
+
+            nuevo = medir(lambda: client.get('/api/estadisticas'), args.repeticiones)
+            anterior = medir(lambda: estadisticas_anteriores(db), max(1, args.repeticiones // 4))
+            print(f"{filas:>10,} {nuevo:>14.2f} {anterior:>14.2f}")
+            db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+# ===========================================
+# BENCHMARK - IMPORTACIÓN DEL JSON LEGADO
+# ===========================================
+#
+# Genera un archivo con el formato de datos_automotores.json (por defecto
+# 200.000 propietarios con 2 vehículos y 2 mantenimientos cada uno), lo
+# importa con importar_json e informa filas por segundo y crecimiento de
+# memoria. Sale con código 1 si la memoria crece más que --max-mb.
+#
+# Uso:
+#   python benchmarks/bench_importacion.py [--propietarios 200000] [--lote 1000] [--max-mb 64]
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database import aplicar_pragmas, resolver_perfil
+from importar_json import importar
+from memoria import crecimiento_mb, formato_mb, rss_pico_mb
+from migraciones import aplicar_migraciones
+
+
+def generar(ruta: str, propietarios: int):
+    """Escribe el archivo de a un propietario, sin armarlo en memoria"""
+    with open(ruta, 'w', encoding='utf-8') as f:
+        f.write('[\n')
+        for i in range(propietarios):
+            vehiculos = [{'marca': 'Renault', 'modelo': f'Modelo{j}', 'kilometraje': 1000 * j,
+                          'fecha_registro': '20/09/2025'} for j in range(2)]
+            historial = [{'fecha': '01/10/2025', 'vehiculo': f'Renault Modelo{j}',
+                          'kilometraje_anterior': 1000 * j, 'kilometraje_actual': 1000 * j + 500,
+                          'tipo_mantenimiento': 'Cambio de aceite', 'descripcion': 'Aceite y filtro',
+                          'costo': '45000'} for j in range(2)]
+            propietario = {'nombre': f'Nombre{i}', 'apellido': f'Apellido{i}', 'rut': f'{i}-legado',
+                           'vehiculos': vehiculos, 'historial_mantenimiento': historial}
+            f.write(('  ' if i == 0 else ',\n  ') + json.dumps(propietario, ensure_ascii=False))
+        f.write('\n]\n')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--propietarios', type=int, default=200_000)
+    parser.add_argument('--lote', type=int, default=1000)
+    parser.add_argument('--max-mb', type=float, default=64.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        archivo = os.path.join(tmp, 'legado.json')
+        generar(archivo, args.propietarios)
+        tamano_mb = os.path.getsize(archivo) / 1e6
+
+        conn = sqlite3.connect(os.path.join(tmp, 'importacion.db'))
+        # Caché de páginas y mmap chicos: el RSS medido es el del importador, no el de SQLite
+        aplicar_pragmas(conn, resolver_perfil({'base': 'throughput', 'cache_size': -8000, 'mmap_size': 0}))
+        aplicar_migraciones(conn)
+
+        base = rss_pico_mb()
+        inicio = time.perf_counter()
+        with open(archivo, 'r', encoding='utf-8') as f:
+            totales = importar(conn, f, args.lote)
+        segundos = time.perf_counter() - inicio
+        crecimiento = crecimiento_mb(base)
+
+        # Segunda pasada: todo es duplicado, no debe insertar nada
+        with open(archivo, 'r', encoding='utf-8') as f:
+            repetida = importar(conn, f, args.lote)
+        conn.close()
+
+    filas = totales['propietarios'] + totales['vehiculos'] + totales['mantenimientos']
+    print(f"{tamano_mb:,.1f} MB, {filas:,} filas en {segundos:.1f}s: "
+          f"{filas / segundos:,.0f} filas/s, {tamano_mb / segundos:.1f} MB/s, "
+          f"RSS {formato_mb(crecimiento, signo=True)}")
+    print(f"Reimportación: {repetida['propietarios']} nuevos, {repetida['duplicados']:,} duplicados")
+
+    if crecimiento is None:
+        print("⚠️  Sin medición de RSS en este sistema: no se verifica --max-mb")
+    if (crecimiento is not None and crecimiento > args.max_mb) or repetida['propietarios']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+# ===========================================
+# BENCHMARK - BÚSQUEDA POR RUT EN main.py
+# ===========================================
+#
+# Compara buscar_propietario (índice por RUT) con el recorrido lineal que
+# usaba el sistema de consola, para 1.000 a 100.000 propietarios. El índice
+# debe mantenerse constante; el recorrido crece con la lista.
+#
+# Uso:
+#   python benchmarks/bench_indice_rut.py [--tamaños 1000,10000,100000] [--busquedas 2000]
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+
+
+def busqueda_lineal(rut):
+    """Búsqueda anterior, conservada solo para comparar"""
+    for propietario in main.propietarios:
+        if propietario["rut"] == rut:
+            return propietario
+    return None
+
+
+def medir(funcion, ruts) -> float:
+    """Microsegundos promedio por búsqueda"""
+    inicio = time.perf_counter()
+    for rut in ruts:
+        funcion(rut)
+    return (time.perf_counter() - inicio) / len(ruts) * 1e6
+
+
+def main_benchmark():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tamaños', default='1000,10000,100000')
+    parser.add_argument('--busquedas', type=int, default=2000)
+    args = parser.parse_args()
+
+    aleatorio = random.Random(42)
+    print(f"{'propietarios':>12} {'índice (µs)':>12} {'lineal (µs)':>12}")
+    for tamano in (int(t) for t in args.tamaños.split(',')):
+        main.propietarios = [{'nombre': f'N{i}', 'apellido': f'A{i}', 'rut': f'{10_000_000 + i}-{i % 10}',
+                              'vehiculos': [], 'historial_mantenimiento': []} for i in range(tamano)]
+        main.reconstruir_indice()
+        ruts = [main.propietarios[aleatorio.randrange(tamano)]['rut'] for _ in range(args.busquedas)]
+
+        # Con puntos, como lo escribe un usuario: el índice normaliza
+        con_puntos = [f"{int(r[:-2]):,}".replace(',', '.') + r[-2:] for r in ruts]
+        assert all(main.buscar_propietario(r) is not None for r in con_puntos)
+
+        indice = medir(main.buscar_propietario, con_puntos)
+        lineal = medir(busqueda_lineal, ruts[:max(10, args.busquedas * 1000 // tamano)])
+        print(f"{tamano:>12,} {indice:>12.2f} {lineal:>12.1f}")
+
+
+if __name__ == '__main__':
+    main_benchmark()
@@ -0,0 +1,85 @@
+# ===========================================
+# BENCHMARK - INICIO DEL SISTEMA DE CONSOLA
+# ===========================================
+#
+# Mide el tiempo y la memoria de arranque de main.py con la base SQLite
+# (modo por defecto) y con el archivo JSON (--json) para distintos tamaños
+# de datos. Cada medición corre en un proceso nuevo.
+#
+# Uso:
+#   python benchmarks/bench_inicio_cli.py [--tamaños 1000,10000,100000]
+
+import argparse
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_importacion import generar
+from database import aplicar_pragmas, resolver_perfil
+from importar_json import importar
+from migraciones import aplicar_migraciones
+
+# Se ejecuta en el proceso hijo: arranca el almacenamiento e informa tiempo y RSS pico.
+# VmHWM y no ru_maxrss: en Linux el hijo hereda el ru_maxrss del padre al hacer fork.
+# Sin /proc (Windows, macOS) el RSS se informa como no disponible.
+MEDICION = '''
+import json, sys, time
+sys.path.insert(0, {raiz!r})
+inicio = time.perf_counter()
+import main
+main.iniciar({modo_json!r}, {db!r})
+segundos = time.perf_counter() - inicio
+try:
+    with open('/proc/self/status') as status:
+        pico_mb = next(int(l.split()[1]) for l in status if l.startswith('VmHWM:')) / 1024
+except OSError:
+    pico_mb = None
+print(json.dumps([segundos, pico_mb]))
+'''
+
+
+def columna_mb(valor) -> str:
+    return f"{valor:>9.1f}" if valor is not None else f"{'n/d':>9}"
+
+
+def medir(directorio: str, modo_json: bool, db: str) -> tuple:
+    codigo = MEDICION.format(raiz=RAIZ, modo_json=modo_json, db=db)
+    salida = subprocess.run([sys.executable, '-c', codigo], cwd=directorio,
+                            capture_output=True, text=True, check=True).stdout
+    return tuple(json.loads(salida.strip().splitlines()[-1]))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tamaños', default='1000,10000,100000')
+    args = parser.parse_args()
+
+    print(f"{'propietarios':>12} {'SQLite (ms)':>12} {'RSS (MB)':>9} {'JSON (ms)':>10} {'RSS (MB)':>9}")
+    for tamano in (int(t) for t in args.tamaños.split(',')):
+        with tempfile.TemporaryDirectory() as tmp:
+            # main.py en modo JSON lee datos_automotores.json del directorio actual
+            archivo = os.path.join(tmp, 'datos_automotores.json')
+            generar(archivo, tamano)
+            db = os.path.join(tmp, 'automotores.db')
+            conn = sqlite3.connect(db)
+            aplicar_pragmas(conn, resolver_perfil('throughput'))
+            aplicar_migraciones(conn)
+            with open(archivo, 'r', encoding='utf-8') as f:
+                importar(conn, f)
+            conn.close()
+
+            sqlite_s, sqlite_mb = medir(tmp, False, db)
+            json_s, json_mb = medir(tmp, True, db)
+            print(f"{tamano:>12,} {sqlite_s * 1000:>12.1f} {columna_mb(sqlite_mb)} "
+                  f"{json_s * 1000:>10.1f} {columna_mb(json_mb)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+# ===========================================
+# BENCHMARK - COSTO DE LAS MÉTRICAS
+# ===========================================
+#
+# Compara la latencia de endpoints de lectura con y sin medición de cada
+# sentencia SQL (el middleware HTTP está siempre activo), usando el cliente
+# de pruebas de Flask en un solo hilo.
+#
+# Uso:
+#   python benchmarks/bench_metricas.py [--peticiones 2000]
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+RUTAS = ('/api/vehiculos?limit=50', '/api/propietarios', '/api/estadisticas',
+         '/api/mantenimientos/pendientes')
+
+
+def medir(client, app_module, bases: dict, ruta: str, peticiones: int) -> dict:
+    """Mediana en microsegundos por base; se alternan para repartir el ruido"""
+    tiempos = {nombre: [] for nombre in bases}
+    for _ in range(peticiones):
+        for nombre, db in bases.items():
+            app_module.db = db
+            inicio = time.perf_counter()
+            with client.get(ruta) as response:
+                assert response.status_code == 200
+            tiempos[nombre].append(time.perf_counter() - inicio)
+    return {nombre: statistics.median(t) * 1e6 for nombre, t in tiempos.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--peticiones', type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        import app as app_module
+        from database import DatabaseManager
+
+        db_path = os.path.join(tmp, 'bench.db')
+        # Sin caché de lecturas, para que cada petición ejecute sus consultas
+        sin = DatabaseManager(db_path, cache_size=0, datos_ejemplo=True)
+        con = DatabaseManager(db_path, cache_size=0, metricas=app_module.metricas)
+        client = app_module.app.test_client()
+
+        print(f"{'ruta':>32} {'sin SQL (µs)':>13} {'con SQL (µs)':>13} {'costo':>7}")
+        for ruta in RUTAS:
+            medir(client, app_module, {'sin': sin, 'con': con}, ruta, 50)
+            r = medir(client, app_module, {'sin': sin, 'con': con}, ruta, args.peticiones)
+            print(f"{ruta:>32} {r['sin']:>13.0f} {r['con']:>13.0f} "
+                  f"{(r['con'] / r['sin'] - 1) * 100:>6.1f}%")
+        sin.close()
+        con.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+# ===========================================
+# BENCHMARK - POOL DE CONEXIONES
+# ===========================================
+#
+# Mide peticiones/segundo sobre GET /api/vehiculos con y sin pool de
+# conexiones, usando el cliente de pruebas de Flask desde varios hilos.
+#
+# Uso:
+#   python benchmarks/bench_pool.py [--hilos 8] [--peticiones 2000]
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def medir(app_module, db, hilos: int, peticiones: int) -> float:
+    """Ejecuta las peticiones repartidas en hilos y devuelve peticiones/segundo"""
+    app_module.db = db
+    por_hilo = peticiones // hilos
+
+    def worker():
+        client = app_module.app.test_client()
+        for _ in range(por_hilo):
+            response = client.get('/api/vehiculos')
+            assert response.status_code == 200
+
+    threads = [threading.Thread(target=worker) for _ in range(hilos)]
+    inicio = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return (por_hilo * hilos) / (time.perf_counter() - inicio)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--hilos', type=int, default=8)
+    parser.add_argument('--peticiones', type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # app.py crea automotores.db en el directorio actual al importarse
+        os.chdir(tmp)
+        import app as app_module
+        from database import DatabaseManager
+
+        db_path = os.path.join(tmp, 'bench.db')
+        sin_pool = DatabaseManager(db_path, pool_size=0, datos_ejemplo=True)
+        con_pool = DatabaseManager(db_path, pool_size=args.hilos)
+
+        # Calentamiento
+        medir(app_module, sin_pool, 1, 50)
+
+        rps_sin = medir(app_module, sin_pool, args.hilos, args.peticiones)
+        rps_con = medir(app_module, con_pool, args.hilos, args.peticiones)
+        con_pool.close()
+
+        print(f"GET /api/vehiculos - {args.hilos} hilos, {args.peticiones} peticiones")
+        print(f"  sin pool: {rps_sin:8.1f} req/s")
+        print(f"  con pool: {rps_con:8.1f} req/s  ({rps_con / rps_sin:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+# ===========================================
+# BENCHMARK - EXPORTACIÓN EN STREAMING
+# ===========================================
+#
+# Genera una base sintética con muchos viajes (1.000.000 por defecto),
+# descarga GET /api/viajes?stream=ndjson consumiendo la respuesta por
+# partes y verifica que el pico de memoria (RSS) crece de forma acotada.
+# Sale con código 1 si el crecimiento supera --max-mb.
+#
+# Uso:
+#   python benchmarks/bench_streaming.py [--filas 1000000] [--max-mb 64] [--comparar]
+#
+# --comparar además mide el listado sin streaming (jsonify de toda la lista)
+# para mostrar la diferencia; se ejecuta después porque el RSS medido es un pico.
+# Sin medición de RSS (Windows) informa los tiempos y no verifica --max-mb.
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from memoria import crecimiento_mb, formato_mb, rss_pico_mb
+
+
+def poblar_viajes(db_path: str, filas: int, lote: int = 50000):
+    conn = sqlite3.connect(db_path)
+    vehiculo_id, propietario_id = conn.execute(
+        "SELECT id, propietario_id FROM vehiculos ORDER BY id LIMIT 1").fetchone()
+    for inicio in range(0, filas, lote):
+        conn.executemany('''
+            INSERT INTO viajes (vehiculo_id, propietario_id, destino, fecha_salida,
+                                kilometraje_salida, kilometraje_llegada, estado)
+            VALUES (?, ?, ?, ?, ?, ?, 'Completado')
+        ''', ((vehiculo_id, propietario_id, f"Destino {i}",
+               f"20{10 + i % 15:02d}-{1 + i % 12:02d}-{1 + i % 28:02d}", i, i + 120)
+              for i in range(inicio, min(inicio + lote, filas))))
+        conn.commit()
+    conn.close()
+
+
+def descargar(client, url: str) -> tuple:
+    """Consume la respuesta por partes; devuelve (bytes, filas, segundos)"""
+    inicio = time.perf_counter()
+    response = client.get(url, buffered=False)
+    total = lineas = 0
+    for parte in response.response:
+        total += len(parte)
+        lineas += parte.count(b'\n') if isinstance(parte, bytes) else parte.count('\n')
+    response.close()
+    return total, lineas, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--filas', type=int, default=1_000_000)
+    parser.add_argument('--max-mb', type=float, default=64.0)
+    parser.add_argument('--comparar', action='store_true')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        import app as app_module
+        from database import DatabaseManager
+
+        db_path = os.path.join(tmp, 'streaming.db')
+        app_module.db = DatabaseManager(db_path, datos_ejemplo=True)
+        print(f"Generando {args.filas:,} viajes...")
+        poblar_viajes(db_path, args.filas)
+        client = app_module.app.test_client()
+
+        # Calentamiento: cargar módulos y plantillas antes de medir
+        descargar(client, '/api/viajes?limit=10')
+        base = rss_pico_mb()
+
+        total, lineas, segundos = descargar(client, '/api/viajes?stream=ndjson')
+        crecimiento = crecimiento_mb(base)
+        print(f"stream=ndjson: {lineas:,} filas, {total / 1e6:.1f} MB en {segundos:.1f}s, "
+              f"RSS {formato_mb(crecimiento, signo=True)}")
+
+        if args.comparar:
+            antes = rss_pico_mb()
+            total, _lineas, segundos = descargar(client, '/api/viajes')
+            print(f"sin streaming: {total / 1e6:.1f} MB en {segundos:.1f}s, "
+                  f"RSS {formato_mb(crecimiento_mb(antes), signo=True)}")
+
+        app_module.db.close()
+
+    if crecimiento is None:
+        print("⚠️  Sin medición de RSS en este sistema: no se verifica --max-mb")
+    elif crecimiento > args.max_mb:
+        print(f"❌ El streaming creció {crecimiento:.1f} MB (límite {args.max_mb} MB)")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
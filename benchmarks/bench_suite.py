@@ -0,0 +1,702 @@
+# ===========================================
+# BENCHMARK - SUITE COMPLETA CON LÍNEA BASE
+# ===========================================
+#
+# Genera una base sintética (generar_datos.py) y mide cada método público de
+# DatabaseManager y cada ruta /api/* a través del cliente de pruebas de Flask:
+#   - latencia p50/p99 en milisegundos
+#   - memoria: pico de asignaciones Python por llamada (tracemalloc) y el
+#     máximo de memoria residente del proceso
+# y compara contra una línea base JSON guardada. Las escrituras dejan la base
+# como estaba (cada alta se borra y cada baja borra una fila creada para eso,
+# ambas fuera del tiempo medido), así los casos se pueden repetir.
+#
+# Por defecto la caché de lecturas está desactivada para que cada llamada
+# llegue a SQLite; --cache la activa como en producción.
+#
+# Uso:
+#   python benchmarks/bench_suite.py [--filas 10000] [--rondas 5] [--repeticiones 20]
+#                                    [--baseline benchmarks/baseline.json]
+#                                    [--guardar] [--umbral 1.5] [--solo texto]
+#
+# Sale con código 1 si algún caso supera umbral x p50 de la línea base (tomada
+# con las mismas filas, semilla y caché).
+
+import argparse
+import inspect
+import itertools
+import json
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, 'benchmarks'))
+
+from generar_datos import generar
+from memoria import formato_mb, rss_pico_mb
+
+BASELINE = os.path.join(RAIZ, 'benchmarks', 'baseline.json')
+SECRETO = 'bench-suite'
+
+# Métodos que no se miden aquí, con el motivo
+EXCLUIDOS = {
+    'close': 'cierra el pool; el arranque y cierre los mide bench_arranque_db.py',
+    'iniciar_cola_escritura': 'ciclo de vida; la suite corre con la cola ya activa',
+}
+
+# Diferencias de p50 por debajo de esto (ms) no cuentan como regresión
+TOLERANCIA_MS = 0.05
+
+
+class Caso:
+    """Una operación medible; preparar y limpiar quedan fuera del tiempo medido"""
+
+    def __init__(self, nombre: str, llamada: Callable, preparar: Callable = None,
+                 limpiar: Callable = None):
+        self.nombre = nombre
+        self.llamada = llamada
+        self.preparar = preparar
+        self.limpiar = limpiar
+
+    def ejecutar(self, medir: Callable = None) -> float:
+        dato = self.preparar() if self.preparar else None
+        if medir is not None:
+            medir()
+        inicio = time.perf_counter()
+        resultado = self.llamada(dato)
+        segundos = time.perf_counter() - inicio
+        if self.limpiar:
+            self.limpiar(resultado)
+        return segundos
+
+
+def calibracion() -> Caso:
+    """Carga fija (SQLite en memoria + JSON) que mide la velocidad de la máquina.
+
+    Se mide justo antes de cada caso y la comparación con la línea base usa el
+    p50 del caso dividido por el de la calibración: una máquina más lenta, o
+    una racha de carga ajena en una máquina compartida, afecta a ambos por
+    igual y no aparece como regresión del código.
+    """
+    conn = sqlite3.connect(':memory:', check_same_thread=False)
+    conn.execute("CREATE TABLE t (a INTEGER, b TEXT)")
+    conn.executemany("INSERT INTO t VALUES (?, ?)", ((i % 97, f'fila {i}') for i in range(5000)))
+
+    def carga(_):
+        filas = conn.execute("SELECT a, COUNT(*), MAX(b) FROM t GROUP BY a").fetchall()
+        return json.dumps([dict(zip(('a', 'n', 'b'), fila)) for fila in filas] * 10)
+    return Caso('calibración', carga)
+
+
+def percentil(valores: List[float], p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+# ===========================================
+# DATOS DE REFERENCIA
+# ===========================================
+
+def ids_de_muestra(db_path: str) -> Dict:
+    """Filas "típicas" (a mitad de cada tabla) sobre las que se hacen las lecturas"""
+    conn = sqlite3.connect(db_path)
+    try:
+        def uno(sql, *args):
+            return conn.execute(sql, args).fetchone()[0]
+        viaje_id = uno("SELECT id FROM viajes WHERE id >= (SELECT MAX(id) / 2 FROM viajes) LIMIT 1")
+        vehiculo_id = uno("SELECT vehiculo_id FROM viajes WHERE id = ?", viaje_id)
+        propietario_id = uno("SELECT propietario_id FROM vehiculos WHERE id = ?", vehiculo_id)
+        return {
+            'viaje_id': viaje_id,
+            'vehiculo_id': vehiculo_id,
+            'propietario_id': propietario_id,
+            'rut': uno("SELECT rut FROM propietarios WHERE id = ?", propietario_id),
+            'kilometraje': uno("SELECT COALESCE(kilometraje, 0) FROM vehiculos WHERE id = ?",
+                               vehiculo_id),
+            'mantenimiento_id': uno("SELECT id FROM mantenimientos WHERE id >= "
+                                    "(SELECT MAX(id) / 2 FROM mantenimientos) LIMIT 1"),
+            'marca': uno("SELECT marca FROM vehiculos WHERE id = ?", vehiculo_id),
+        }
+    finally:
+        conn.close()
+
+
+class Fixtures:
+    """Filas propias de la suite para las actualizaciones (no tocan los datos generados)"""
+
+    def __init__(self, db, muestra: Dict):
+        self.db = db
+        self.m = muestra
+        self._n = itertools.count(1)
+        self.propietario_id = self.propietario()
+        self.db.create_propietario_info(self.propietario_id, direccion='Av. Siempre Viva 742')
+        self.vehiculo_id = self.vehiculo()
+        self.viaje_id = self.viaje()
+        self.mantenimiento_id = self.mantenimiento()
+
+    def propietario(self) -> int:
+        n = next(self._n)
+        return self.db.create_propietario('Bench', f'Suite {n}', f'BENCH-{n}', 'Docente')
+
+    def vehiculo(self) -> int:
+        n = next(self._n)
+        return self.db.create_vehiculo(self.m['propietario_id'], 'Toyota', 'Corolla', 2020,
+                                       'Blanco', 10000, f'BN{n:05d}')
+
+    def viaje(self) -> int:
+        return self.db.create_viaje(self.m['vehiculo_id'], self.m['propietario_id'], 'Santiago',
+                                    '2024-06-01T08:00', self.m['kilometraje'], 'Docente')
+
+    def mantenimiento(self) -> int:
+        return self.db.create_mantenimiento(self.m['vehiculo_id'], '2024-06-01', 'Cambio de aceite',
+                                            self.m['kilometraje'], 'Suite', 45000, 'Taller Bench')
+
+    def movimiento(self) -> int:
+        return self.db.create_movimiento_presupuesto('egreso', 'Combustible', 'Suite', 10000,
+                                                     '2024-06-01', 'Efectivo')
+
+    def regla(self) -> str:
+        self.db.update_regla_mantenimiento('Suite', 20000, 12)
+        return 'Suite'
+
+
+# ===========================================
+# CASOS: MÉTODOS DE DatabaseManager
+# ===========================================
+
+def casos_database(db, f: Fixtures) -> List[Caso]:
+    m = f.m
+    v, p, mt = m['vehiculo_id'], m['propietario_id'], m['mantenimiento_id']
+    lista = db.get_all_viajes(limit=50)
+
+    def borrar(tabla):
+        def limpiar(fila_id):
+            conn = db.get_connection()
+            try:
+                conn.execute(f"DELETE FROM {tabla} WHERE id = ?", (fila_id,))
+                conn.commit()
+            finally:
+                conn.close()
+        return limpiar
+
+    def borrar_lote(ids):
+        for fila_id in ids:
+            db.delete_movimiento_presupuesto(fila_id)
+
+    def primeras(iterador, n=1000):
+        try:
+            return sum(1 for _ in itertools.islice(iterador, n))
+        finally:
+            iterador.close()
+
+    movimientos = [{'tipo_movimiento': 'egreso', 'categoria': 'Combustible',
+                    'descripcion': f'Lote {i}', 'monto': 1000 + i,
+                    'fecha_movimiento': '2024-06-01'} for i in range(100)]
+
+    return [
+        Caso('get_connection', lambda _: db.get_connection().close()),
+        Caso('init_database', lambda _: db.init_database()),
+        Caso('insert_sample_data', lambda _: db.insert_sample_data()),
+        Caso('cursor_siguiente', lambda _: db.cursor_siguiente('viajes', lista, 50)),
+        Caso('crear_lote (100 presupuesto)', lambda _: db.crear_lote('presupuesto', movimientos),
+             limpiar=borrar_lote),
+        # Propietarios
+        Caso('create_propietario', lambda n: db.create_propietario(
+            'Bench', 'Alta', f'BENCH-ALTA-{n}'), preparar=lambda: next(f._n),
+             limpiar=db.delete_propietario),
+        Caso('get_propietarios (limit=50)', lambda _: db.get_propietarios(limit=50)),
+        Caso('get_propietarios (q)', lambda _: db.get_propietarios(limit=50, q='González')),
+        Caso('get_propietario_by_id', lambda _: db.get_propietario_by_id(p)),
+        Caso('get_propietario_by_rut', lambda _: db.get_propietario_by_rut(m['rut'])),
+        Caso('update_propietario', lambda _: db.update_propietario(
+            f.propietario_id, 'Bench', 'Suite 1', 'BENCH-1', 'Docente')),
+        Caso('delete_propietario', db.delete_propietario, preparar=f.propietario),
+        Caso('create_propietario_info', lambda pid: db.create_propietario_info(
+            pid, direccion='Calle 1') and pid, preparar=f.propietario,
+             limpiar=db.delete_propietario),
+        Caso('get_propietario_info', lambda _: db.get_propietario_info(f.propietario_id)),
+        Caso('update_propietario_info', lambda _: db.update_propietario_info(
+            f.propietario_id, direccion='Av. Siempre Viva 742')),
+        # Vehículos
+        Caso('create_vehiculo', lambda n: db.create_vehiculo(
+            p, 'Kia', 'Rio', 2021, 'Rojo', 0, f'BA{n:05d}'), preparar=lambda: next(f._n),
+             limpiar=db.delete_vehiculo),
+        Caso('get_all_vehiculos (limit=50)', lambda _: db.get_all_vehiculos(limit=50)),
+        Caso('get_all_vehiculos (q)', lambda _: db.get_all_vehiculos(limit=50, q=m['marca'])),
+        Caso('get_vehiculos_by_propietario', lambda _: db.get_vehiculos_by_propietario(p)),
+        Caso('update_vehiculo', lambda _: db.update_vehiculo(
+            f.vehiculo_id, 'Toyota', 'Corolla', 2020, 'Blanco', 10000, 'BN00002')),
+        Caso('actualizar_kilometraje', lambda _: db.actualizar_kilometraje(v, m['kilometraje'])),
+        Caso('get_odometro', lambda _: db.get_odometro(v)),
+        Caso('delete_vehiculo', db.delete_vehiculo, preparar=f.vehiculo),
+        # Mantenimientos
+        Caso('create_mantenimiento', lambda _: f.mantenimiento(), limpiar=db.delete_mantenimiento),
+        Caso('create_mantenimiento_con_kilometraje', lambda _: db.create_mantenimiento_con_kilometraje(
+            f.vehiculo_id, '2024-06-01', 'Cambio de aceite', 10000, 'Suite', 45000),
+             limpiar=db.delete_mantenimiento),
+        Caso('get_all_mantenimientos (limit=50)', lambda _: db.get_all_mantenimientos(limit=50)),
+        Caso('get_all_mantenimientos (filtro)', lambda _: db.get_all_mantenimientos(
+            limit=50, filtros={'vehiculo_id': str(v)})),
+        Caso('iter_all_mantenimientos (1000)', lambda _: primeras(db.iter_all_mantenimientos())),
+        Caso('get_mantenimiento_by_id', lambda _: db.get_mantenimiento_by_id(mt)),
+        Caso('get_mantenimientos_by_vehiculo', lambda _: db.get_mantenimientos_by_vehiculo(v)),
+        Caso('update_mantenimiento', lambda _: db.update_mantenimiento(
+            f.mantenimiento_id, v, '2024-06-01', 'Cambio de aceite', m['kilometraje'],
+            'Suite', 45000, 'Taller Bench')),
+        Caso('delete_mantenimiento', db.delete_mantenimiento, preparar=f.mantenimiento),
+        Caso('get_mantenimientos_pendientes', lambda _: db.get_mantenimientos_pendientes()),
+        Caso('get_reglas_mantenimiento', lambda _: db.get_reglas_mantenimiento()),
+        Caso('update_regla_mantenimiento', lambda _: db.update_regla_mantenimiento(
+            'Suite', 20000, 12), preparar=f.regla,
+             limpiar=lambda _: db.delete_regla_mantenimiento('Suite')),
+        Caso('delete_regla_mantenimiento', lambda tipo: db.delete_regla_mantenimiento(tipo),
+             preparar=f.regla),
+        # Viajes
+        Caso('create_viaje', lambda _: f.viaje(), limpiar=db.delete_viaje),
+        Caso('get_all_viajes (limit=50)', lambda _: db.get_all_viajes(limit=50)),
+        Caso('get_all_viajes (filtro)', lambda _: db.get_all_viajes(
+            limit=50, filtros={'vehiculo_id': str(v)})),
+        Caso('iter_all_viajes (1000)', lambda _: primeras(db.iter_all_viajes())),
+        Caso('get_viajes_by_vehiculo', lambda _: db.get_viajes_by_vehiculo(v)),
+        Caso('get_resumen_viajes', lambda _: db.get_resumen_viajes()),
+        Caso('get_resumen_viajes (filtro)', lambda _: db.get_resumen_viajes({'vehiculo_id': str(v)})),
+        Caso('update_viaje', lambda _: db.update_viaje(f.viaje_id, observaciones='Suite')),
+        Caso('encolar_update_viaje', lambda _: db.encolar_update_viaje(
+            f.viaje_id, observaciones='Suite'), limpiar=lambda op: op.futuro.result(timeout=10)),
+        Caso('get_operacion', lambda op_id: db.get_operacion(op_id),
+             preparar=lambda: _operacion_confirmada(db, f.viaje_id)),
+        Caso('delete_viaje', db.delete_viaje, preparar=f.viaje),
+        # Tickets y presupuesto
+        Caso('create_ticket', lambda _: db.create_ticket('2024-06-01', 'viajes', f.viaje_id, 'Suite'),
+             limpiar=borrar('tickets')),
+        Caso('get_all_tickets (limit=50)', lambda _: db.get_all_tickets(limit=50)),
+        Caso('create_movimiento_presupuesto', lambda _: f.movimiento(),
+             limpiar=db.delete_movimiento_presupuesto),
+        Caso('get_movimientos_presupuesto (limit=50)',
+             lambda _: db.get_movimientos_presupuesto(limit=50)),
+        Caso('get_estadisticas_presupuesto', lambda _: db.get_estadisticas_presupuesto()),
+        Caso('delete_movimiento_presupuesto', db.delete_movimiento_presupuesto,
+             preparar=f.movimiento),
+        # Analítica, búsqueda y estadísticas
+        Caso('get_analitica_vehiculos', lambda _: db.get_analitica_vehiculos('2024-01', '2024-12')),
+        Caso('get_analitica_mensual', lambda _: db.get_analitica_mensual(v)),
+        Caso('buscar', lambda _: db.buscar('Toyota')),
+        Caso('get_versiones_tablas', lambda _: db.get_versiones_tablas(['viajes', 'vehiculos'])),
+        Caso('get_estadisticas_generales', lambda _: db.get_estadisticas_generales()),
+        Caso('verificar_resumenes', lambda _: db.verificar_resumenes()),
+    ]
+
+
+# ===========================================
+# CASOS: RUTAS /api/*
+# ===========================================
+
+def casos_api(client, db, f: Fixtures) -> List[Caso]:
+    m = f.m
+    v, p, mt = m['vehiculo_id'], m['propietario_id'], m['mantenimiento_id']
+    cabeceras = {'X-Perfil': SECRETO}
+
+    def pedir(metodo: str, url: str, esperado=(200,), **kw):
+        def llamada(dato=None):
+            destino = url.format(id=dato) if '{id}' in url else url
+            with client.open(destino, method=metodo, **kw) as respuesta:
+                cuerpo = respuesta.get_data()
+                if respuesta.status_code not in esperado:
+                    raise AssertionError(f"{metodo} {destino}: {respuesta.status_code} {cuerpo[:200]!r}")
+                datos = respuesta.get_json().get('data') if respuesta.is_json else None
+                return datos.get('id') if isinstance(datos, dict) else None
+        return llamada
+
+    def ruta(metodo, url, **kw):
+        return f"{metodo} {url}", kw
+
+    def lote(n):
+        return [{'tipo_movimiento': 'egreso', 'categoria': 'Combustible',
+                 'descripcion': f'Lote {i}', 'monto': 1000 + i,
+                 'fecha_movimiento': '2024-06-01'} for i in range(n)]
+
+    def borrar_lote(tabla, borrar):
+        def limpiar(_):
+            conn = db.get_connection()
+            try:
+                ids = [fila[0] for fila in conn.execute(
+                    f"SELECT id FROM {tabla} WHERE descripcion LIKE 'Lote %'")]
+            finally:
+                conn.close()
+            for fila_id in ids:
+                borrar(fila_id)
+        return limpiar
+
+    def borrar_ticket(fila_id):
+        conn = db.get_connection()
+        try:
+            conn.execute("DELETE FROM tickets WHERE id = ?", (fila_id,))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def perfil_guardado():
+        with client.get('/api/estadisticas', headers=cabeceras) as respuesta:
+            return int(respuesta.headers['X-Perfil-Id'])
+
+    def nuevo_rut():
+        return f'BENCH-API-{next(f._n)}'
+
+    viaje = {'vehiculo_id': v, 'propietario_id': p, 'destino': 'Santiago',
+             'fecha_salida': '2024-06-01T08:00', 'kilometraje_salida': m['kilometraje']}
+    mantenimiento = {'vehiculo_id': v, 'fecha_mantenimiento': '2024-06-01',
+                     'tipo_mantenimiento': 'Cambio de aceite',
+                     'kilometros_recorridos': m['kilometraje'], 'costo': 45000}
+    movimiento = {'tipo_movimiento': 'egreso', 'categoria': 'Combustible',
+                  'descripcion': 'Suite', 'monto': 10000, 'fecha_movimiento': '2024-06-01'}
+
+    casos = [
+        # Propietarios
+        Caso('GET /api/propietarios', pedir('GET', '/api/propietarios?limit=50')),
+        Caso('GET /api/propietarios?q=', pedir('GET', '/api/propietarios?limit=50&q=Gonz')),
+        Caso('GET /api/propietarios/<id>', pedir('GET', f'/api/propietarios/{p}')),
+        Caso('POST /api/propietarios', lambda _: pedir('POST', '/api/propietarios', (201,), json={
+            'nombre': 'Bench', 'apellido': 'Api', 'rut': nuevo_rut()})(),
+             limpiar=db.delete_propietario),
+        Caso('PUT /api/propietarios/<id>', pedir('PUT', f'/api/propietarios/{f.propietario_id}',
+                                                  json={'nombre': 'Bench', 'apellido': 'Suite 1',
+                                                        'rut': 'BENCH-1', 'tipo_personal': 'Docente'})),
+        Caso('DELETE /api/propietarios/<id>', pedir('DELETE', '/api/propietarios/{id}'),
+             preparar=f.propietario),
+        Caso('GET /api/propietarios/<id>/vehiculos', pedir('GET', f'/api/propietarios/{p}/vehiculos')),
+        Caso('GET /api/propietarios/<id>/info',
+             pedir('GET', f'/api/propietarios/{f.propietario_id}/info')),
+        Caso('POST /api/propietarios/<id>/info', pedir('POST', '/api/propietarios/{id}/info', (201,),
+                                                       json={'direccion': 'Calle 1'}),
+             preparar=f.propietario),
+        Caso('PUT /api/propietarios/<id>/info',
+             pedir('PUT', f'/api/propietarios/{f.propietario_id}/info',
+                   json={'direccion': 'Av. Siempre Viva 742'})),
+        # Vehículos
+        Caso('GET /api/vehiculos', pedir('GET', '/api/vehiculos?limit=50')),
+        Caso('GET /api/vehiculos?q=', pedir('GET', f"/api/vehiculos?limit=50&q={m['marca']}")),
+        Caso('POST /api/vehiculos', lambda _: pedir('POST', '/api/vehiculos', (201,), json={
+            'propietario_id': p, 'marca': 'Kia', 'modelo': 'Rio',
+            'patente': f'BA{next(f._n):05d}'})(), limpiar=db.delete_vehiculo),
+        Caso('POST /api/vehiculos/bulk (100)', lambda _: pedir('POST', '/api/vehiculos/bulk', (201,),
+             json=[{'propietario_id': p, 'marca': 'Kia', 'modelo': 'Rio',
+                    'patente': f'BL{next(f._n):05d}'}
+                   for _ in range(100)])(),
+             limpiar=lambda _: _borrar_vehiculos_lote(db)),
+        Caso('PUT /api/vehiculos/<id>', pedir('PUT', f'/api/vehiculos/{f.vehiculo_id}', json={
+            'marca': 'Toyota', 'modelo': 'Corolla', 'año': 2020, 'color': 'Blanco',
+            'kilometraje': 10000, 'patente': 'BN00002'})),
+        Caso('DELETE /api/vehiculos/<id>', pedir('DELETE', '/api/vehiculos/{id}'),
+             preparar=f.vehiculo),
+        Caso('GET /api/vehiculos/<id>/odometro', pedir('GET', f'/api/vehiculos/{v}/odometro')),
+        Caso('GET /api/vehiculos/<id>/mantenimientos',
+             pedir('GET', f'/api/vehiculos/{v}/mantenimientos')),
+        Caso('GET /api/vehiculos/<id>/viajes', pedir('GET', f'/api/vehiculos/{v}/viajes')),
+        # Mantenimientos
+        Caso('GET /api/mantenimientos', pedir('GET', '/api/mantenimientos?limit=50')),
+        Caso('GET /api/mantenimientos?stream=ndjson',
+             pedir('GET', f'/api/mantenimientos?stream=ndjson&vehiculo_id={v}')),
+        Caso('POST /api/mantenimientos', pedir('POST', '/api/mantenimientos', (201,),
+                                               json=mantenimiento),
+             limpiar=db.delete_mantenimiento),
+        Caso('POST /api/mantenimientos/bulk (100)', pedir(
+            'POST', '/api/mantenimientos/bulk', (201,),
+            json=[dict(mantenimiento, descripcion=f'Lote {i}') for i in range(100)]),
+             limpiar=borrar_lote('mantenimientos', db.delete_mantenimiento)),
+        Caso('PUT /api/mantenimientos/<id>', pedir(
+            'PUT', f'/api/mantenimientos/{f.mantenimiento_id}',
+            json=dict(mantenimiento, descripcion='Suite', taller='Taller Bench'))),
+        Caso('DELETE /api/mantenimientos/<id>', pedir('DELETE', '/api/mantenimientos/{id}'),
+             preparar=f.mantenimiento),
+        Caso('GET /api/mantenimientos/pendientes', pedir('GET', '/api/mantenimientos/pendientes')),
+        Caso('GET /api/mantenimientos/reglas', pedir('GET', '/api/mantenimientos/reglas')),
+        Caso('PUT /api/mantenimientos/reglas/<tipo>', pedir(
+            'PUT', '/api/mantenimientos/reglas/Suite', json={'cada_km': 20000, 'cada_meses': 12}),
+             preparar=f.regla, limpiar=lambda _: db.delete_regla_mantenimiento('Suite')),
+        Caso('DELETE /api/mantenimientos/reglas/<tipo>',
+             pedir('DELETE', '/api/mantenimientos/reglas/Suite'), preparar=f.regla),
+        # Viajes y operaciones encoladas
+        Caso('GET /api/viajes', pedir('GET', '/api/viajes?limit=50')),
+        Caso('GET /api/viajes?stream=ndjson', pedir('GET', f'/api/viajes?stream=ndjson&vehiculo_id={v}')),
+        Caso('GET /api/viajes/resumen', pedir('GET', '/api/viajes/resumen')),
+        Caso('POST /api/viajes', pedir('POST', '/api/viajes', (201,), json=viaje),
+             limpiar=db.delete_viaje),
+        Caso('POST /api/viajes/bulk (100)', pedir(
+            'POST', '/api/viajes/bulk', (201,),
+            json=[dict(viaje, observaciones=f'Lote {i}') for i in range(100)]),
+             limpiar=lambda _: _borrar_viajes_lote(db)),
+        Caso('PUT /api/viajes/<id>', pedir('PUT', f'/api/viajes/{f.viaje_id}', (202,),
+                                           json={'observaciones': 'Suite'})),
+        Caso('PUT /api/viajes/<id>?esperar=1', pedir('PUT', f'/api/viajes/{f.viaje_id}?esperar=1',
+                                                     json={'observaciones': 'Suite'})),
+        Caso('GET /api/operaciones/<id>', pedir('GET', '/api/operaciones/{id}'),
+             preparar=lambda: _operacion_confirmada(db, f.viaje_id)),
+        Caso('DELETE /api/viajes/<id>', pedir('DELETE', '/api/viajes/{id}'), preparar=f.viaje),
+        # Tickets y presupuesto
+        Caso('GET /api/tickets', pedir('GET', '/api/tickets?limit=50')),
+        Caso('POST /api/tickets', pedir('POST', '/api/tickets', (201,), json={
+            'fecha': '2024-06-01', 'sistema': 'viajes', 'referencia_id': f.viaje_id}),
+             limpiar=borrar_ticket),
+        Caso('GET /api/presupuesto', pedir('GET', '/api/presupuesto?limit=50')),
+        Caso('GET /api/presupuesto/estadisticas', pedir('GET', '/api/presupuesto/estadisticas')),
+        Caso('POST /api/presupuesto', pedir('POST', '/api/presupuesto', (201,), json=movimiento),
+             limpiar=db.delete_movimiento_presupuesto),
+        Caso('POST /api/presupuesto/bulk (100)', pedir('POST', '/api/presupuesto/bulk', (201,),
+                                                       json=lote(100)),
+             limpiar=borrar_lote('presupuesto', db.delete_movimiento_presupuesto)),
+        Caso('DELETE /api/presupuesto/<id>', pedir('DELETE', '/api/presupuesto/{id}'),
+             preparar=f.movimiento),
+        # Analítica, búsqueda, estadísticas y operación
+        Caso('GET /api/analitica/vehiculos',
+             pedir('GET', '/api/analitica/vehiculos?desde=2024-01&hasta=2024-12')),
+        Caso('GET /api/analitica/mensual', pedir('GET', f'/api/analitica/mensual?vehiculo_id={v}')),
+        Caso('GET /api/search', pedir('GET', '/api/search?q=Toyota')),
+        Caso('GET /api/estadisticas', pedir('GET', '/api/estadisticas')),
+        Caso('GET /api/cache/estadisticas', pedir('GET', '/api/cache/estadisticas')),
+        Caso('GET /api/cola/estadisticas', pedir('GET', '/api/cola/estadisticas')),
+        Caso('GET /api/perfiles', pedir('GET', '/api/perfiles', headers=cabeceras)),
+        Caso('GET /api/perfiles/<id>', pedir('GET', '/api/perfiles/{id}', headers=cabeceras),
+             preparar=perfil_guardado),
+        Caso('POST /api/perfiles/agregado', pedir('POST', '/api/perfiles/agregado', headers=cabeceras),
+             limpiar=lambda _: pedir('DELETE', '/api/perfiles/agregado', headers=cabeceras)()),
+        Caso('GET /api/perfiles/agregado', pedir('GET', '/api/perfiles/agregado', headers=cabeceras)),
+        Caso('DELETE /api/perfiles/agregado',
+             pedir('DELETE', '/api/perfiles/agregado', headers=cabeceras),
+             preparar=pedir('POST', '/api/perfiles/agregado', headers=cabeceras)),
+    ]
+    return casos
+
+
+def _operacion_confirmada(db, viaje_id: int) -> int:
+    op = db.encolar_update_viaje(viaje_id, observaciones='Suite')
+    op.futuro.result(timeout=10)
+    return op.id
+
+
+def _borrar_vehiculos_lote(db):
+    conn = db.get_connection()
+    try:
+        ids = [fila[0] for fila in conn.execute("SELECT id FROM vehiculos WHERE patente LIKE 'BL%'")]
+    finally:
+        conn.close()
+    for fila_id in ids:
+        db.delete_vehiculo(fila_id)
+
+
+def _borrar_viajes_lote(db):
+    conn = db.get_connection()
+    try:
+        ids = [fila[0] for fila in conn.execute(
+            "SELECT id FROM viajes WHERE observaciones LIKE 'Lote %'")]
+    finally:
+        conn.close()
+    for fila_id in ids:
+        db.delete_viaje(fila_id)
+
+
+# ===========================================
+# COBERTURA
+# ===========================================
+
+def sin_caso(casos_db: List[Caso], casos_http: List[Caso], app) -> List[str]:
+    """Métodos públicos y rutas /api/* que la suite no mide (y no están excluidos)"""
+    from database import DatabaseManager
+    medidos = {caso.nombre.split(' ')[0] for caso in casos_db}
+    faltan = [f"DatabaseManager.{nombre}" for nombre, _ in
+              inspect.getmembers(DatabaseManager, inspect.isfunction)
+              if not nombre.startswith('_') and nombre not in medidos and nombre not in EXCLUIDOS]
+
+    rutas = {' '.join(caso.nombre.split(' ')[:2]).split('?')[0] for caso in casos_http}
+    for regla in app.url_map.iter_rules():
+        if not regla.rule.startswith('/api/'):
+            continue
+        plantilla = regla.rule
+        for argumento in regla.arguments:
+            plantilla = plantilla.replace(f'<int:{argumento}>', '<id>')
+            plantilla = plantilla.replace(f'<path:{argumento}>', '<tipo>')
+        for metodo in sorted(regla.methods - {'HEAD', 'OPTIONS'}):
+            if f"{metodo} {plantilla}" not in rutas:
+                faltan.append(f"{metodo} {regla.rule}")
+    return faltan
+
+
+# ===========================================
+# MEDICIÓN Y COMPARACIÓN
+# ===========================================
+
+def vaciar_wal(db):
+    """Vuelca el WAL a la base: cada caso empieza igual sin importar las escrituras previas"""
+    conn = db.get_connection()
+    try:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        conn.close()
+
+
+def latencias(caso: Caso, repeticiones: int, calentamiento: int = 3) -> List[float]:
+    for _ in range(calentamiento):
+        caso.ejecutar()
+    return [caso.ejecutar() for _ in range(repeticiones)]
+
+
+def pico_memoria(caso: Caso, veces: int = 3) -> float:
+    """Mayor pico de memoria Python (KB) asignada durante la llamada"""
+    picos = []
+    tracemalloc.start()
+    try:
+        for _ in range(veces):
+            caso.ejecutar(medir=tracemalloc.reset_peak)
+            picos.append(tracemalloc.get_traced_memory()[1])
+    finally:
+        tracemalloc.stop()
+    return max(picos) / 1024
+
+
+def medir(casos: List[Caso], rondas: int, repeticiones: int,
+          antes: Callable = None) -> Dict[str, Dict]:
+    """Mide todos los casos en varias rondas intercaladas.
+
+    De cada caso se guarda el p50 de la mejor ronda (el ruido solo suma
+    tiempo), el p50 relativo a la calibración medida a su lado, el p99 de
+    todas las muestras y, en una pasada aparte porque tracemalloc distorsiona
+    los tiempos, el pico de memoria. antes() se llama antes de medir cada caso.
+    """
+    referencia = calibracion()
+    muestras = {caso.nombre: [] for caso in casos}
+    p50 = {caso.nombre: [] for caso in casos}
+    relativo = {caso.nombre: [] for caso in casos}
+    for _ in range(rondas):
+        for caso in casos:
+            if antes is not None:
+                antes()
+            escala = percentil(latencias(referencia, 5, calentamiento=1), 50)
+            tiempos = latencias(caso, repeticiones)
+            muestras[caso.nombre].extend(tiempos)
+            p50[caso.nombre].append(percentil(tiempos, 50))
+            relativo[caso.nombre].append(percentil(tiempos, 50) / escala)
+    return {caso.nombre: {
+        'p50_ms': round(min(p50[caso.nombre]) * 1000, 4),
+        'p99_ms': round(percentil(muestras[caso.nombre], 99) * 1000, 4),
+        'relativo': round(min(relativo[caso.nombre]), 5),
+        'pico_kb': round(pico_memoria(caso), 1),
+    } for caso in casos}
+
+
+def comparar(resultados: Dict[str, Dict], base: Optional[Dict], umbral: float) -> List[str]:
+    """Imprime la tabla de resultados y devuelve los casos que empeoraron.
+
+    Δ es el menor cambio entre el p50 en milisegundos y el p50 relativo a la
+    calibración: una regresión real mueve ambos, mientras que una máquina
+    más lenta solo mueve el primero y una calibración ruidosa solo el segundo.
+    """
+    casos_base = (base or {}).get('casos', {})
+    regresiones = []
+    print(f"\n{'caso':<46} {'p50 ms':>9} {'p99 ms':>9} {'pico KB':>9} {'base p50':>9} {'Δ':>7}")
+    for nombre, r in resultados.items():
+        anterior = casos_base.get(nombre)
+        if anterior is None:
+            delta, base_p50 = '', ''
+        else:
+            razon = min(r['relativo'] / anterior['relativo'], r['p50_ms'] / anterior['p50_ms'])
+            delta = f"{(razon - 1) * 100:+.0f}%"
+            base_p50 = f"{anterior['p50_ms']:.3f}"
+            if razon > umbral and r['p50_ms'] - anterior['p50_ms'] > TOLERANCIA_MS:
+                regresiones.append(nombre)
+                delta += ' ❌'
+        print(f"{nombre:<46} {r['p50_ms']:>9.3f} {r['p99_ms']:>9.3f} {r['pico_kb']:>9.1f} "
+              f"{base_p50:>9} {delta:>7}")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--filas', type=int, default=10000)
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--rondas', type=int, default=5)
+    parser.add_argument('--repeticiones', type=int, default=20, help='llamadas por caso y ronda')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--guardar', action='store_true',
+                        help='escribe los resultados como nueva línea base')
+    parser.add_argument('--umbral', type=float, default=1.5,
+                        help='p50 / p50 base a partir del cual un caso es regresión')
+    parser.add_argument('--cache', action='store_true', help='activa la caché de lecturas')
+    parser.add_argument('--solo', help='mide solo los casos cuyo nombre contiene este texto')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        db_path = os.path.join(tmp, 'suite.db')
+        inicio = time.perf_counter()
+        filas = generar(db_path, args.filas, args.semilla)
+        print(f"Base de {sum(filas.values()):,} filas (semilla {args.semilla}) generada en "
+              f"{time.perf_counter() - inicio:.1f} s")
+
+        import app as app_module
+        from database import DatabaseManager
+
+        flask_app = app_module.crear_app(db_path, perfil_secreto=SECRETO)
+        db = DatabaseManager(db_path, cache_size=1024 if args.cache else 0,
+                             metricas=app_module.metricas)
+        db.iniciar_cola_escritura(1.0)
+        app_module.db = db
+        client = flask_app.test_client()
+
+        fixtures = Fixtures(db, ids_de_muestra(db_path))
+        casos_db = casos_database(db, fixtures)
+        casos_http = casos_api(client, db, fixtures)
+        faltan = sin_caso(casos_db, casos_http, flask_app)
+
+        casos = [caso for caso in casos_db + casos_http
+                 if not args.solo or args.solo in caso.nombre]
+        resultados = medir(casos, args.rondas, args.repeticiones,
+                           antes=lambda: vaciar_wal(db))
+        db.close()
+
+    base = None
+    orientativa = False
+    if os.path.exists(args.baseline) and not args.guardar:
+        with open(args.baseline, encoding='utf-8') as archivo:
+            base = json.load(archivo)
+        orientativa = (base.get('filas'), base.get('semilla'), base.get('cache')) != \
+            (args.filas, args.semilla, args.cache)
+        if orientativa:
+            print(f"⚠️  La línea base se tomó con {base.get('filas'):,} filas, semilla "
+                  f"{base.get('semilla')} y caché {'sí' if base.get('cache') else 'no'}; "
+                  f"la comparación es orientativa")
+
+    regresiones = comparar(resultados, base, args.umbral)
+    rss_mb = rss_pico_mb()
+    print(f"\nMemoria residente máxima del proceso: {formato_mb(rss_mb)}")
+    if faltan:
+        print(f"Sin caso en la suite: {', '.join(faltan)}")
+
+    if args.guardar:
+        with open(args.baseline, 'w', encoding='utf-8') as archivo:
+            json.dump({
+                'filas': args.filas,
+                'semilla': args.semilla,
+                'cache': args.cache,
+                'rondas': args.rondas,
+                'repeticiones': args.repeticiones,
+                'python': platform.python_version(),
+                'sqlite': sqlite3.sqlite_version,
+                'rss_max_mb': round(rss_mb, 1) if rss_mb is not None else None,
+                'casos': resultados,
+            }, archivo, indent=2, ensure_ascii=False)
+            archivo.write('\n')
+        print(f"✅ Línea base guardada en {args.baseline}")
+    elif regresiones:
+        print(f"❌ {len(regresiones)} caso(s) más de {args.umbral:g}x más lentos que la línea base")
+        if not orientativa:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+# ===========================================
+# PRUEBA DE CARGA - SERVIDOR DE PRODUCCIÓN
+# ===========================================
+#
+# Levanta servidor.py con 1, 2, 4... workers sobre una base temporal y lo
+# carga con varios procesos cliente (conexiones HTTP/1.0, una por petición)
+# contra un endpoint de lectura. Informa peticiones/s y latencias p50/p99
+# para cada cantidad de workers.
+#
+# Uso:
+#   python benchmarks/carga_servidor.py [--workers 1,2,4] [--hilos 8]
+#       [--clientes 8] [--segundos 5] [--ruta "/api/vehiculos?limit=50"]
+
+import argparse
+import http.client
+import multiprocessing
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentil(valores: list, p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+
+def puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def esperar_servidor(puerto: int, timeout: float = 30.0):
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', puerto, timeout=2)
+            conn.request('GET', '/api/vehiculos?limit=1')
+            conn.getresponse().read()
+            conn.close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"El servidor no respondió en el puerto {puerto}")
+
+
+def cliente(puerto: int, ruta: str, hasta: float, salida):
+    """Hace peticiones hasta el instante 'hasta' y devuelve sus latencias"""
+    latencias = []
+    errores = 0
+    while time.time() < hasta:
+        inicio = time.perf_counter()
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', puerto, timeout=10)
+            conn.request('GET', ruta)
+            respuesta = conn.getresponse()
+            respuesta.read()
+            conn.close()
+            if respuesta.status != 200:
+                errores += 1
+                continue
+        except OSError:
+            errores += 1
+            continue
+        latencias.append(time.perf_counter() - inicio)
+    salida.put((latencias, errores))
+
+
+def medir(workers: int, args, db_path: str) -> dict:
+    puerto = puerto_libre()
+    env = dict(os.environ, AUTOMOTORES_DB=db_path, AUTOMOTORES_DATOS_EJEMPLO='1')
+    servidor = subprocess.Popen(
+        [sys.executable, os.path.join(RAIZ, 'servidor.py'), '--host', '127.0.0.1',
+         '--port', str(puerto), '--workers', str(workers), '--hilos', str(args.hilos)],
+        env=env, stdout=subprocess.DEVNULL)
+    try:
+        esperar_servidor(puerto)
+        salida = multiprocessing.Queue()
+        hasta = time.time() + args.segundos
+        clientes = [multiprocessing.Process(target=cliente, args=(puerto, args.ruta, hasta, salida))
+                    for _ in range(args.clientes)]
+        for c in clientes:
+            c.start()
+        resultados = [salida.get() for _ in clientes]
+        for c in clientes:
+            c.join()
+    finally:
+        servidor.send_signal(signal.SIGTERM)
+        servidor.wait(10)
+
+    latencias = [l for por_cliente, _ in resultados for l in por_cliente]
+    return {
+        'req_s': len(latencias) / args.segundos,
+        'p50_ms': statistics.median(latencias) * 1000 if latencias else 0.0,
+        'p99_ms': percentil(latencias, 0.99) * 1000 if latencias else 0.0,
+        'errores': sum(errores for _, errores in resultados),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', default='1,2,4')
+    parser.add_argument('--hilos', type=int, default=8)
+    parser.add_argument('--clientes', type=int, default=8)
+    parser.add_argument('--segundos', type=float, default=5.0)
+    parser.add_argument('--ruta', default='/api/vehiculos?limit=50')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'carga.db')
+        print(f"GET {args.ruta} - {args.clientes} clientes x {args.segundos:g} s, "
+              f"{args.hilos} hilos por worker, {os.cpu_count()} CPU")
+        print(f"{'workers':>8} {'req/s':>10} {'p50 (ms)':>10} {'p99 (ms)':>10} {'errores':>8}")
+        for workers in (int(w) for w in args.workers.split(',')):
+            r = medir(workers, args, db_path)
+            print(f"{workers:>8} {r['req_s']:>10.0f} {r['p50_ms']:>10.2f} "
+                  f"{r['p99_ms']:>10.2f} {r['errores']:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,303 @@
+# ===========================================
+# GENERADOR DE DATOS DE FLOTA
+# ===========================================
+#
+# Crea una base SQLite con datos sintéticos realistas y reproducibles (misma
+# semilla, misma base) repartidos entre propietarios, vehículos,
+# mantenimientos, viajes, presupuesto y tickets. Los viajes y mantenimientos
+# se generan en orden cronológico y con el odómetro de cada vehículo siempre
+# creciente, así las tablas derivadas (resúmenes, analítica, plan preventivo)
+# y los índices quedan como en una base real.
+#
+# La inserción pasa por los triggers de la base, de modo que las tablas
+# derivadas quedan consistentes; con 10M de filas tarda varios minutos.
+#
+# Uso:
+#   python benchmarks/generar_datos.py flota.db [--filas 100000] [--semilla 42]
+
+import argparse
+import datetime
+import os
+import random
+import sqlite3
+import sys
+import time
+from typing import Dict, Iterator
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import aplicar_pragmas, resolver_perfil
+from migraciones import aplicar_migraciones
+from preventivo import REGLAS_INICIALES
+
+# Parte del total de filas que va a cada tabla
+PROPORCIONES = {
+    'propietarios': 0.04,
+    'vehiculos': 0.06,
+    'mantenimientos': 0.12,
+    'viajes': 0.58,
+    'presupuesto': 0.10,
+    'tickets': 0.10,
+}
+
+NOMBRES = ['Carlos', 'María', 'Luis', 'Ana', 'Pedro', 'Camila', 'Jorge', 'Valentina', 'Diego',
+           'Francisca', 'Matías', 'Javiera', 'Sebastián', 'Constanza', 'Felipe', 'Daniela',
+           'Rodrigo', 'Catalina', 'Andrés', 'Fernanda']
+APELLIDOS = ['González', 'Muñoz', 'Rojas', 'Díaz', 'Pérez', 'Soto', 'Contreras', 'Silva',
+             'Martínez', 'Sepúlveda', 'Morales', 'Rodríguez', 'López', 'Fuentes', 'Hernández',
+             'Torres', 'Araya', 'Flores', 'Espinoza', 'Valenzuela']
+TIPOS_PERSONAL = ['Docente', 'No Docente', 'Alumno']
+MODELOS = {
+    'Toyota': ['Corolla', 'Hilux', 'Yaris', 'RAV4'],
+    'Chevrolet': ['Sail', 'Spark', 'Tracker', 'Colorado'],
+    'Hyundai': ['Accent', 'Tucson', 'H-1', 'Elantra'],
+    'Nissan': ['Versa', 'Navara', 'Sentra', 'Kicks'],
+    'Kia': ['Rio', 'Sportage', 'Morning', 'Frontier'],
+    'Ford': ['Ranger', 'Focus', 'Territory', 'Transit'],
+    'Peugeot': ['208', '2008', 'Partner', 'Boxer'],
+    'Mitsubishi': ['L200', 'Outlander', 'Montero', 'ASX'],
+}
+COLORES = ['Blanco', 'Gris', 'Negro', 'Plata', 'Rojo', 'Azul', 'Verde', 'Beige']
+DESTINOS = ['Santiago', 'Valparaíso', 'Concepción', 'Rancagua', 'Talca', 'Chillán', 'Temuco',
+            'La Serena', 'Antofagasta', 'Puerto Montt', 'Los Ángeles', 'Curicó', 'Osorno',
+            'Valdivia', 'Iquique', 'Calama', 'Copiapó', 'Linares', 'San Fernando', 'Quillota']
+TIPOS_MANTENIMIENTO = [tipo for tipo, _km, _meses in REGLAS_INICIALES] + [
+    'Cambio de frenos', 'Alineación y balanceo', 'Cambio de batería', 'Reparación eléctrica']
+TALLERES = ['Taller Central', 'AutoService', 'Neumáticos Plus', 'Frenos del Sur',
+            'Servicio Oficial', 'Mecánica Rápida']
+CATEGORIAS = {
+    'ingreso': ['Servicios de Mantenimiento', 'Venta de Repuestos', 'Consultoría', 'Otros Ingresos'],
+    'egreso': ['Mantenimiento de Vehículos', 'Combustible', 'Repuestos', 'Salarios', 'Alquiler',
+               'Servicios Públicos', 'Marketing', 'Seguros', 'Impuestos', 'Otros Egresos'],
+}
+METODOS_PAGO = ['Efectivo', 'Tarjeta de Débito', 'Tarjeta de Crédito', 'Transferencia', 'Cheque']
+
+# Periodo cubierto por los datos
+INICIO = datetime.date(2019, 1, 1)
+DIAS = (datetime.date(2024, 12, 31) - INICIO).days
+
+LOTE = 50000
+
+
+def cantidades(filas: int) -> Dict[str, int]:
+    """Filas por tabla para un total aproximado de `filas`"""
+    return {tabla: max(1, int(filas * parte)) for tabla, parte in PROPORCIONES.items()}
+
+
+def digito_verificador(numero: int) -> str:
+    """Dígito verificador de un RUT chileno (módulo 11)"""
+    suma, factor = 0, 2
+    while numero:
+        suma += (numero % 10) * factor
+        numero //= 10
+        factor = 2 if factor == 7 else factor + 1
+    resto = 11 - suma % 11
+    return {11: '0', 10: 'K'}.get(resto, str(resto))
+
+
+def patente(n: int) -> str:
+    """Patente única de cuatro letras y dos números (formato chileno actual)"""
+    letras = 'BCDFGHJKLPRSTVWXYZ'
+    numero, n = n % 100, n // 100
+    codigo = ''
+    for _ in range(4):
+        codigo += letras[n % len(letras)]
+        n //= len(letras)
+    return f"{codigo}{numero:02d}"
+
+
+def fecha(indice: int, total: int) -> str:
+    """Fecha del evento `indice` de `total` repartidos a lo largo del periodo"""
+    return (INICIO + datetime.timedelta(days=indice * DIAS // max(total, 1))).isoformat()
+
+
+def _insertar(conn: sqlite3.Connection, sql: str, filas: Iterator[tuple]):
+    """Inserta en lotes, un COMMIT por lote"""
+    lote = []
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) >= LOTE:
+            conn.executemany(sql, lote)
+            conn.commit()
+            lote = []
+    if lote:
+        conn.executemany(sql, lote)
+        conn.commit()
+
+
+def generar(db_path: str, filas: int, semilla: int = 42, progreso: bool = False) -> Dict[str, int]:
+    """Llena una base nueva o vacía con datos sintéticos y devuelve las filas por tabla"""
+    rng = random.Random(semilla)
+    n = cantidades(filas)
+    conn = sqlite3.connect(db_path)
+    aplicar_pragmas(conn, resolver_perfil('throughput'))
+    aplicar_migraciones(conn)
+    if conn.execute("SELECT EXISTS (SELECT 1 FROM propietarios)").fetchone()[0]:
+        conn.close()
+        raise ValueError(f"{db_path} ya tiene datos; el generador necesita una base vacía")
+
+    def aviso(tabla):
+        if progreso:
+            print(f"  {tabla}: {n[tabla]:,} filas", flush=True)
+
+    aviso('propietarios')
+    base_rut = 5000000 + rng.randrange(1000000)
+
+    def propietarios():
+        for i in range(n['propietarios']):
+            nombre, apellido = rng.choice(NOMBRES), rng.choice(APELLIDOS)
+            numero = base_rut + i * 7
+            yield (nombre, apellido, f"{numero}-{digito_verificador(numero)}",
+                   rng.choice(TIPOS_PERSONAL), f"9{rng.randrange(10 ** 8):08d}",
+                   f"{nombre.lower()}.{apellido.lower()}{i}@correo.cl")
+    _insertar(conn, '''
+        INSERT INTO propietarios (nombre, apellido, rut, tipo_personal, telefono, email)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', propietarios())
+    propietario_ids = [r[0] for r in conn.execute("SELECT id FROM propietarios ORDER BY id")]
+
+    aviso('vehiculos')
+    # Odómetro al momento del alta; los viajes lo hacen avanzar
+    odometro_inicial = [rng.randrange(0, 150000, 10) for _ in range(n['vehiculos'])]
+
+    def vehiculos():
+        for i in range(n['vehiculos']):
+            marca = rng.choice(list(MODELOS))
+            yield (propietario_ids[i % len(propietario_ids)], marca, rng.choice(MODELOS[marca]),
+                   rng.randint(2008, 2024), rng.choice(COLORES), odometro_inicial[i], patente(i))
+    _insertar(conn, '''
+        INSERT INTO vehiculos (propietario_id, marca, modelo, año, color, kilometraje, patente)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', vehiculos())
+    vehiculos_ids = [(r[0], r[1]) for r in conn.execute(
+        "SELECT id, propietario_id FROM vehiculos ORDER BY id")]
+    odometro = dict(zip((v for v, _p in vehiculos_ids), odometro_inicial))
+    ultimo_mantenimiento = dict(odometro)
+
+    # Viajes y mantenimientos intercalados en orden cronológico: el odómetro de
+    # cada vehículo crece con los viajes y los mantenimientos lo registran
+    aviso('viajes')
+    aviso('mantenimientos')
+    total_eventos = n['viajes'] + n['mantenimientos']
+    proporcion_viajes = n['viajes'] / total_eventos
+    viajes, mantenimientos = [], []
+    emitidos = {'viajes': 0, 'mantenimientos': 0}
+
+    def volcar():
+        if viajes:
+            conn.executemany('''
+                INSERT INTO viajes (vehiculo_id, propietario_id, tipo_personal, destino, fecha_salida,
+                                    fecha_llegada, kilometraje_salida, kilometraje_llegada,
+                                    combustible_inicial, combustible_final, combustible_consumido,
+                                    costo_combustible, observaciones, estado)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', viajes)
+        if mantenimientos:
+            conn.executemany('''
+                INSERT INTO mantenimientos (vehiculo_id, fecha_mantenimiento, tipo_mantenimiento,
+                                            kilometraje_anterior, kilometraje_actual,
+                                            kilometros_recorridos, descripcion, costo, taller)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', mantenimientos)
+        conn.commit()
+        viajes.clear()
+        mantenimientos.clear()
+
+    for evento in range(total_eventos):
+        dia = fecha(evento, total_eventos)
+        vehiculo_id, propietario_id = vehiculos_ids[rng.randrange(len(vehiculos_ids))]
+        km = odometro[vehiculo_id]
+        quedan_viajes = n['viajes'] - emitidos['viajes']
+        quedan_mantenimientos = n['mantenimientos'] - emitidos['mantenimientos']
+        if quedan_mantenimientos == 0 or (quedan_viajes and rng.random() < proporcion_viajes):
+            emitidos['viajes'] += 1
+            distancia = rng.randint(8, 650)
+            # Los últimos viajes del periodo siguen en curso
+            en_curso = evento > total_eventos * 0.995
+            litros = round(distancia * rng.uniform(0.06, 0.13), 1)
+            inicial = round(rng.uniform(20, 60), 1)
+            viajes.append((
+                vehiculo_id, propietario_id, rng.choice(TIPOS_PERSONAL), rng.choice(DESTINOS), dia,
+                None if en_curso else dia, km, None if en_curso else km + distancia,
+                inicial, None if en_curso else max(round(inicial - litros, 1), 0.0),
+                None if en_curso else litros,
+                None if en_curso else round(litros * rng.uniform(1050, 1450)),
+                None, 'En curso' if en_curso else 'Completado'))
+            if not en_curso:
+                odometro[vehiculo_id] = km + distancia
+        else:
+            emitidos['mantenimientos'] += 1
+            anterior = ultimo_mantenimiento[vehiculo_id]
+            tipo = rng.choice(TIPOS_MANTENIMIENTO)
+            mantenimientos.append((
+                vehiculo_id, dia, tipo, anterior, km, km - anterior,
+                f"{tipo} programado", float(rng.randrange(25000, 450000, 500)), rng.choice(TALLERES)))
+            ultimo_mantenimiento[vehiculo_id] = km
+        if len(viajes) + len(mantenimientos) >= LOTE:
+            volcar()
+    volcar()
+
+    # Odómetro vigente y último viaje cerrado de cada vehículo
+    conn.execute('''
+        UPDATE vehiculos SET
+            ultimo_viaje_id = (
+                SELECT vi.id FROM viajes vi
+                WHERE vi.vehiculo_id = vehiculos.id AND vi.kilometraje_llegada IS NOT NULL
+                ORDER BY vi.kilometraje_llegada DESC, vi.id DESC LIMIT 1),
+            kilometraje = MAX(COALESCE(kilometraje, 0), COALESCE(
+                (SELECT MAX(vi.kilometraje_llegada) FROM viajes vi WHERE vi.vehiculo_id = vehiculos.id), 0))
+    ''')
+    conn.commit()
+
+    aviso('presupuesto')
+
+    def presupuesto():
+        total = n['presupuesto']
+        for i in range(total):
+            tipo = 'ingreso' if rng.random() < 0.3 else 'egreso'
+            categoria = rng.choice(CATEGORIAS[tipo])
+            yield (tipo, categoria, f"{categoria} {i}", float(rng.randrange(5000, 2500000, 100)),
+                   fecha(i, total), rng.choice(METODOS_PAGO), f"REF-{i:08d}")
+    _insertar(conn, '''
+        INSERT INTO presupuesto (tipo_movimiento, categoria, descripcion, monto, fecha_movimiento,
+                                 metodo_pago, referencia)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', presupuesto())
+
+    aviso('tickets')
+    maximos = {sistema: conn.execute(f"SELECT MAX(id) FROM {sistema}").fetchone()[0] or 0
+               for sistema in ('viajes', 'mantenimientos')}
+
+    def tickets():
+        total = n['tickets']
+        for i in range(total):
+            sistema = 'viajes' if rng.random() < 0.7 else 'mantenimientos'
+            referencia = rng.randint(1, maximos[sistema]) if maximos[sistema] else None
+            yield (fecha(i, total), sistema, referencia, f"Rendición {sistema} {referencia}")
+    _insertar(conn, '''
+        INSERT INTO tickets (fecha, sistema, referencia_id, descripcion) VALUES (?, ?, ?, ?)
+    ''', tickets())
+
+    conn.close()
+    return n
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('db')
+    parser.add_argument('--filas', type=int, default=100000)
+    parser.add_argument('--semilla', type=int, default=42)
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    print(f"Generando {args.filas:,} filas en {args.db} (semilla {args.semilla})")
+    try:
+        n = generar(args.db, args.filas, args.semilla, progreso=True)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"✅ {sum(n.values()):,} filas en {time.perf_counter() - inicio:.1f} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+# ===========================================
+# BENCHMARKS - MEMORIA RESIDENTE DEL PROCESO
+# ===========================================
+#
+# Pico de RSS para los benchmarks que lo informan. getrusage solo existe en
+# Unix: en Windows (el entorno virtual del proyecto) se informa como no
+# disponible y los benchmarks siguen midiendo tiempos.
+
+import sys
+from typing import Optional
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def rss_pico_mb() -> Optional[float]:
+    """Pico de memoria residente del proceso en MB, o None si no se puede medir"""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss está en KiB en Linux y en bytes en macOS
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+
+def crecimiento_mb(antes: Optional[float]) -> Optional[float]:
+    """Cuánto subió el pico de RSS desde `antes` (None si no se puede medir)"""
+    ahora = rss_pico_mb()
+    return ahora - antes if ahora is not None and antes is not None else None
+
+
+def formato_mb(valor: Optional[float], signo: bool = False) -> str:
+    if valor is None:
+        return 'no disponible'
+    return f"{valor:+.1f} MB" if signo else f"{valor:.1f} MB"
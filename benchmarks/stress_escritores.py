@@ -0,0 +1,83 @@
+# ===========================================
+# PRUEBA DE ESTRÉS - ESCRITORES CONCURRENTES
+# ===========================================
+#
+# Lanza varios hilos que insertan viajes y mantenimientos en paralelo a
+# través de DatabaseManager y cuenta cuántas escrituras fallan con
+# "database is locked" para cada perfil de rendimiento.
+#
+# Uso:
+#   python benchmarks/stress_escritores.py [--hilos 16] [--escrituras 200]
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DatabaseManager, PERFILES_RENDIMIENTO
+
+
+def estresar(db: DatabaseManager, hilos: int, escrituras: int) -> dict:
+    """Ejecuta las escrituras concurrentes y devuelve contadores y tiempos"""
+    vehiculo = db.get_all_vehiculos()[0]
+    errores = []
+    bloqueos = []
+    lock = threading.Lock()
+
+    def worker(n):
+        for i in range(escrituras):
+            try:
+                if i % 2:
+                    db.create_viaje(vehiculo['id'], vehiculo['propietario_id'],
+                                    f"Destino {n}-{i}", '2024-06-01', 1000 + i)
+                else:
+                    db.create_mantenimiento(vehiculo['id'], '2024-06-01', 'Revisión',
+                                            100, costo=1000.0)
+            except sqlite3.OperationalError as e:
+                with lock:
+                    (bloqueos if 'locked' in str(e) else errores).append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(hilos)]
+    inicio = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    duracion = time.perf_counter() - inicio
+
+    total = hilos * escrituras
+    return {
+        'total': total,
+        'bloqueos': len(bloqueos),
+        'otros_errores': len(errores),
+        'escrituras_por_segundo': (total - len(bloqueos) - len(errores)) / duracion,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--hilos', type=int, default=16)
+    parser.add_argument('--escrituras', type=int, default=200)
+    args = parser.parse_args()
+
+    ok = True
+    for perfil in PERFILES_RENDIMIENTO:
+        with tempfile.TemporaryDirectory() as tmp:
+            db = DatabaseManager(os.path.join(tmp, 'stress.db'), pool_size=args.hilos, perfil=perfil,
+                                 datos_ejemplo=True)
+            r = estresar(db, args.hilos, args.escrituras)
+            db.close()
+        print(f"{perfil:>10}: {r['total']} escrituras, {r['bloqueos']} bloqueos, "
+              f"{r['otros_errores']} otros errores, {r['escrituras_por_segundo']:.0f} escrituras/s")
+        ok = ok and r['bloqueos'] == 0 and r['otros_errores'] == 0
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+# ===========================================
+# VERIFICACIÓN DEL DIARIO DE main.py
+# ===========================================
+#
+# Simula cortes en distintos puntos del guardado del sistema de consola y
+# comprueba que load_data recupera exactamente los cambios confirmados:
+#   1. última línea del diario escrita a medias
+#   2. corte entre reemplazar el snapshot y vaciar el diario
+#   3. corte mientras se escribía el snapshot temporal
+#   4. diario que no se puede aplicar: el programa se detiene sin tocar los
+#      archivos, y ni un cambio nuevo ni el cierre los sobrescriben
+# Al final compara el costo de un cambio con el diario contra reescribir
+# todo el archivo. Sale con código 1 si algún caso falla.
+#
+# Uso:
+#   python benchmarks/verificar_journal.py [--propietarios 20000]
+
+import argparse
+import builtins
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+
+
+def ejecutar(funcion, *respuestas):
+    """Ejecuta una función interactiva de main.py con respuestas predefinidas"""
+    pendientes = list(respuestas)
+    original = builtins.input
+    builtins.input = lambda _texto='': pendientes.pop(0)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            funcion()
+    finally:
+        builtins.input = original
+
+
+def cargar():
+    with contextlib.redirect_stdout(io.StringIO()):
+        main.load_data()
+    return json.loads(json.dumps(main.propietarios))
+
+
+def poblar():
+    """Tres cambios de cada tipo sobre una base vacía"""
+    for archivo in (main.DATA_FILE, main.JOURNAL_FILE):
+        if os.path.exists(archivo):
+            os.remove(archivo)
+    cargar()
+    ejecutar(main.registrar_propietario, 'Ana', 'Rojas', '11-1')
+    ejecutar(main.registrar_propietario, 'Luis', 'Soto', '22-2')
+    ejecutar(main.agregar_vehiculo, '11-1', 'Fiat', 'Mobi', '1000')
+    ejecutar(main.crear_historial_mantenimiento, '11-1', '1', '01/10/2025', 'Aceite', '1500', 'Filtro', '45000')
+    return json.loads(json.dumps(main.propietarios))
+
+
+def caso_linea_incompleta():
+    esperado = poblar()
+    with open(main.JOURNAL_FILE, 'a', encoding='utf-8') as f:
+        f.write('{"op": "vehiculo", "rut": "22-2", "posi')
+    return cargar() == esperado
+
+
+def caso_corte_antes_de_vaciar_diario():
+    esperado = poblar()
+    respaldo = main.JOURNAL_FILE + '.copia'
+    shutil.copy(main.JOURNAL_FILE, respaldo)
+    with contextlib.redirect_stdout(io.StringIO()):
+        main.save_data()
+    # El snapshot ya tiene los cambios y el diario reaparece como si no se hubiera borrado
+    os.replace(respaldo, main.JOURNAL_FILE)
+    return cargar() == esperado
+
+
+def caso_corte_escribiendo_snapshot():
+    esperado = poblar()
+    with open(main.DATA_FILE + '.tmp', 'w', encoding='utf-8') as f:
+        f.write('[{"nombre": "trunc')
+    return cargar() == esperado
+
+
+def caso_diario_invalido():
+    poblar()
+    with contextlib.redirect_stdout(io.StringIO()):
+        main.save_data()
+    ejecutar(main.agregar_vehiculo, '22-2', 'Kia', 'Rio', '500')
+    with open(main.JOURNAL_FILE, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'op': 'vehiculo', 'rut': '99-9', 'posicion': 0, 'datos': {}}) + '\n')
+    originales = {}
+    for archivo in (main.DATA_FILE, main.JOURNAL_FILE):
+        with open(archivo, 'rb') as f:
+            originales[archivo] = f.read()
+    try:
+        cargar()
+        return False
+    except SystemExit:
+        pass
+    # Aunque quien llama siga adelante, nada pisa los archivos originales
+    ejecutar(main.registrar_propietario, 'Eva', 'Mora', '33-3')
+    with contextlib.redirect_stdout(io.StringIO()):
+        main.cerrar()
+    for archivo, contenido in originales.items():
+        with open(archivo, 'rb') as f:
+            if f.read() != contenido:
+                return False
+    return True
+
+
+def costo_por_cambio(cantidad: int) -> tuple:
+    """Segundos por cambio: diario vs reescribir todo el snapshot"""
+    main.carga_fallida = False
+    main.propietarios = [{'nombre': f'N{i}', 'apellido': f'A{i}', 'rut': f'{i}-x',
+                          'vehiculos': [{'marca': 'Fiat', 'modelo': 'Uno', 'kilometraje': i,
+                                         'fecha_registro': '20/09/2025'}],
+                          'historial_mantenimiento': []} for i in range(cantidad)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        main.save_data()
+    repeticiones = 20
+
+    inicio = time.perf_counter()
+    for i in range(repeticiones):
+        propietario = {'nombre': 'X', 'apellido': 'Y', 'rut': f'nuevo-{i}',
+                       'vehiculos': [], 'historial_mantenimiento': []}
+        main.propietarios.append(propietario)
+        main.registrar_cambio({'op': 'propietario', 'datos': propietario})
+    diario = (time.perf_counter() - inicio) / repeticiones
+
+    inicio = time.perf_counter()
+    for _ in range(3):
+        main.save_data()
+    completo = (time.perf_counter() - inicio) / 3
+    return diario, completo
+
+
+def main_verificacion():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--propietarios', type=int, default=20000)
+    args = parser.parse_args()
+
+    fallos = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        for caso in (caso_linea_incompleta, caso_corte_antes_de_vaciar_diario,
+                     caso_corte_escribiendo_snapshot, caso_diario_invalido):
+            correcto = caso()
+            fallos += not correcto
+            print(f"{'✅' if correcto else '❌'} {caso.__name__}")
+
+        diario, completo = costo_por_cambio(args.propietarios)
+        print(f"{args.propietarios:,} propietarios: diario {diario * 1000:.2f} ms/cambio, "
+              f"reescritura completa {completo * 1000:.1f} ms/cambio")
+
+    sys.exit(1 if fallos else 0)
+
+
+if __name__ == '__main__':
+    main_verificacion()
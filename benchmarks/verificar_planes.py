@@ -0,0 +1,106 @@
+# ===========================================
+# VERIFICACIÓN DE PLANES DE CONSULTA
+# ===========================================
+#
+# Ejecuta los métodos de lectura de DatabaseManager capturando el SQL que
+# envían, y revisa su EXPLAIN QUERY PLAN: las búsquedas por clave foránea
+# deben usar índice y los listados ordenados no deben ordenar en un
+# B-tree temporal. Sale con código 1 si algún plan no cumple.
+#
+# Uso:
+#   python benchmarks/verificar_planes.py
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DatabaseManager, codificar_cursor
+from migraciones import VERSION_ESQUEMA, version_actual
+
+# (método, argumentos, fragmentos que deben aparecer, fragmentos prohibidos)
+CASOS = [
+    ('get_vehiculos_by_propietario', (1,),
+     ['USING INDEX idx_vehiculos_propietario'], ['SCAN v']),
+    ('get_mantenimientos_by_vehiculo', (1,),
+     ['USING INDEX idx_mantenimientos_vehiculo_fecha'], ['SCAN m', 'TEMP B-TREE']),
+    ('get_viajes_by_vehiculo', (1,),
+     ['USING INDEX idx_viajes_vehiculo_fecha'], ['SCAN v', 'TEMP B-TREE']),
+    ('get_all_viajes', (),
+     ['SCAN v USING INDEX idx_viajes_fecha_salida'], ['TEMP B-TREE']),
+    ('get_all_mantenimientos', (),
+     ['SCAN m USING INDEX idx_mantenimientos_fecha'], ['TEMP B-TREE']),
+    ('get_movimientos_presupuesto', (),
+     ['USING INDEX idx_presupuesto_fecha'], ['TEMP B-TREE']),
+    ('get_movimientos_presupuesto', ('ingreso',),
+     ['USING INDEX idx_presupuesto_tipo_fecha'], ['TEMP B-TREE']),
+    ('get_all_tickets', (),
+     ['USING INDEX idx_tickets_fecha'], ['TEMP B-TREE']),
+    ('get_propietario_info', (1,),
+     ['USING INDEX idx_propietarios_info_propietario'], ['SCAN']),
+    # Páginas siguientes: el cursor debe resolverse con el mismo índice, sin ordenar
+    ('get_all_viajes', (50, codificar_cursor(['2024-01-01', 10])),
+     ['USING INDEX idx_viajes_fecha_salida'], ['TEMP B-TREE']),
+    ('get_all_mantenimientos', (50, codificar_cursor(['2024-01-01', 10])),
+     ['USING INDEX idx_mantenimientos_fecha'], ['TEMP B-TREE']),
+    ('get_movimientos_presupuesto', ('egreso', 50, codificar_cursor(['2024-01-01', 10])),
+     ['USING INDEX idx_presupuesto_tipo_fecha'], ['TEMP B-TREE']),
+    ('get_all_tickets', (50, codificar_cursor(['2024-01-01', 10])),
+     ['USING INDEX idx_tickets_fecha'], ['TEMP B-TREE']),
+    ('get_propietarios', (50, codificar_cursor(['Ana', 'Rodríguez', 4])),
+     ['USING INDEX idx_propietarios_nombre'], ['TEMP B-TREE']),
+]
+
+
+def capturar_sql(db: DatabaseManager, metodo: str, args: tuple) -> list:
+    """Ejecuta un método de lectura y devuelve las sentencias SELECT que envió"""
+    sentencias = []
+    # Con la conexión prestada a este hilo, el método reutiliza la misma
+    conn = db.get_connection()
+    try:
+        conn.set_trace_callback(sentencias.append)
+        getattr(db, metodo)(*args)
+    finally:
+        conn.set_trace_callback(None)
+        conn.close()
+    return [s for s in sentencias if s.lstrip().upper().startswith('SELECT')]
+
+
+def plan(db: DatabaseManager, sql: str) -> str:
+    conn = db.get_connection()
+    try:
+        return '\n'.join(row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql))
+    finally:
+        conn.close()
+
+
+def main():
+    fallos = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, 'planes.db'), pool_size=1, cache_size=0)
+
+        conn = db.get_connection()
+        version = version_actual(conn)
+        conn.close()
+        if version != VERSION_ESQUEMA:
+            print(f"❌ user_version = {version}, se esperaba {VERSION_ESQUEMA}")
+            fallos += 1
+
+        for metodo, args, requeridos, prohibidos in CASOS:
+            texto = '\n'.join(plan(db, sql) for sql in capturar_sql(db, metodo, args))
+            faltan = [r for r in requeridos if r not in texto]
+            sobran = [p for p in prohibidos if p in texto]
+            if faltan or sobran:
+                fallos += 1
+                print(f"❌ {metodo}{args}: faltan {faltan}, sobran {sobran}")
+                print('   ' + texto.replace('\n', '\n   '))
+            else:
+                print(f"✅ {metodo}{args}")
+        db.close()
+
+    sys.exit(1 if fallos else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+# ===========================================
+# BÚSQUEDA DE TEXTO - SISTEMA AUTOMOTORES
+# ===========================================
+#
+# Índices FTS5 de contenido externo sobre propietarios, vehículos y
+# mantenimientos. Los textos no se duplican: cada índice guarda solo los
+# términos y lee las columnas de la tabla original. Los triggers mantienen
+# el índice al día en cada INSERT/UPDATE/DELETE.
+
+import re
+import sqlite3
+
+# Colección -> columnas indexadas (la tabla virtual se llama busqueda_<colección>)
+INDICES_BUSQUEDA = {
+    'propietarios': ['nombre', 'apellido', 'rut', 'email'],
+    'vehiculos': ['marca', 'modelo', 'patente'],
+    'mantenimientos': ['tipo_mantenimiento', 'descripcion', 'taller'],
+}
+
+# Máximo de términos por búsqueda
+MAX_TERMINOS = 8
+
+
+def crear_indices_busqueda(cursor: sqlite3.Cursor):
+    """Crea las tablas FTS5 con sus triggers y las llena con los datos actuales"""
+    for tabla, columnas in INDICES_BUSQUEDA.items():
+        indice = f'busqueda_{tabla}'
+        lista = ', '.join(columnas)
+        nuevos = ', '.join(f'new.{c}' for c in columnas)
+        viejos = ', '.join(f'old.{c}' for c in columnas)
+
+        # remove_diacritics: "maria" encuentra "María"; prefix acelera las búsquedas "term*"
+        cursor.execute(f'''
+            CREATE VIRTUAL TABLE IF NOT EXISTS {indice} USING fts5(
+                {lista},
+                content='{tabla}', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+            )
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{indice}_ins AFTER INSERT ON {tabla}
+            BEGIN
+                INSERT INTO {indice} (rowid, {lista}) VALUES (new.id, {nuevos});
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{indice}_del AFTER DELETE ON {tabla}
+            BEGIN
+                INSERT INTO {indice} ({indice}, rowid, {lista}) VALUES ('delete', old.id, {viejos});
+            END
+        ''')
+        # Solo las columnas indexadas: actualizar el kilometraje no toca el índice
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{indice}_upd AFTER UPDATE OF {lista} ON {tabla}
+            BEGIN
+                INSERT INTO {indice} ({indice}, rowid, {lista}) VALUES ('delete', old.id, {viejos});
+                INSERT INTO {indice} (rowid, {lista}) VALUES (new.id, {nuevos});
+            END
+        ''')
+        cursor.execute(f"INSERT INTO {indice} ({indice}) VALUES ('rebuild')")
+
+
+def consulta_fts(texto: str) -> str:
+    """Convierte lo que escribe el usuario en una consulta MATCH segura.
+
+    Cada palabra se busca como prefijo y deben aparecer todas ("ana rojas"
+    encuentra "Ana María Rojas"). Los puntos entre dígitos se quitan para que
+    "12.345.678-9" coincida con el RUT guardado como "12345678-9". La sintaxis
+    de FTS5 (comillas, NEAR, OR, *) no se interpreta.
+    """
+    texto = re.sub(r'(?<=\d)\.(?=\d)', '', texto or '')
+    terminos = re.findall(r'\w+', texto)[:MAX_TERMINOS]
+    if not terminos:
+        raise ValueError('La búsqueda debe incluir al menos una letra o número')
+    return ' '.join(f'"{termino}"*' for termino in terminos)
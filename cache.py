@@ -0,0 +1,176 @@
+# ===========================================
+# CACHÉ DE LECTURAS - SISTEMA AUTOMOTORES
+# ===========================================
+#
+# Caché LRU con vencimiento (TTL) para los métodos de lectura de
+# DatabaseManager. Cada entrada se guarda con etiquetas ("propietarios",
+# "propietario:5", ...) y los métodos de escritura invalidan solo las
+# etiquetas que afectan. Es local al proceso: con varios procesos, una
+# escritura hecha en otro se ve a lo sumo TTL segundos después. Dentro de
+# leer_en_version (lo usa el ETag de app.py) la clave incluye las versiones
+# de las tablas, así una escritura de otro proceso nunca devuelve datos viejos.
+
+import contextlib
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+
+class CacheLRU:
+    """Caché LRU con TTL, etiquetas de invalidación y métricas, segura entre hilos"""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._datos: "OrderedDict[tuple, Tuple[float, object, tuple]]" = OrderedDict()
+        self._por_etiqueta: Dict[str, set] = {}
+        # Se incrementa en cada invalidación; evita guardar lecturas que
+        # empezaron antes de una escritura y terminaron después
+        self._generaciones: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def generaciones(self, etiquetas: Iterable[str]) -> tuple:
+        with self._lock:
+            return tuple(self._generaciones.get(e, 0) for e in etiquetas)
+
+    def get(self, clave: tuple):
+        """Devuelve (True, valor) si la clave está vigente, o (False, None)"""
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                self.misses += 1
+                return False, None
+            vence, valor, _etiquetas = entrada
+            if vence < time.monotonic():
+                self._quitar(clave)
+                self.misses += 1
+                return False, None
+            self._datos.move_to_end(clave)
+            self.hits += 1
+            return True, valor
+
+    def set(self, clave: tuple, valor, etiquetas: tuple, generaciones: Optional[tuple] = None):
+        with self._lock:
+            if generaciones is not None and \
+                    generaciones != tuple(self._generaciones.get(e, 0) for e in etiquetas):
+                return
+            if clave in self._datos:
+                self._quitar(clave)
+            self._datos[clave] = (time.monotonic() + self.ttl, valor, etiquetas)
+            for etiqueta in etiquetas:
+                self._por_etiqueta.setdefault(etiqueta, set()).add(clave)
+            while len(self._datos) > self.max_entries:
+                self._quitar(next(iter(self._datos)))
+                self.evictions += 1
+
+    def _quitar(self, clave: tuple):
+        _vence, _valor, etiquetas = self._datos.pop(clave)
+        for etiqueta in etiquetas:
+            claves = self._por_etiqueta.get(etiqueta)
+            if claves is not None:
+                claves.discard(clave)
+                if not claves:
+                    del self._por_etiqueta[etiqueta]
+
+    def invalidar(self, *etiquetas: str):
+        """Elimina todas las entradas que tengan alguna de las etiquetas"""
+        with self._lock:
+            for etiqueta in etiquetas:
+                self._generaciones[etiqueta] = self._generaciones.get(etiqueta, 0) + 1
+                for clave in list(self._por_etiqueta.get(etiqueta, ())):
+                    self._quitar(clave)
+                    self.invalidations += 1
+
+    def limpiar(self):
+        """Vacía la caché (por ejemplo tras una importación directa a la base)"""
+        with self._lock:
+            for etiqueta in self._por_etiqueta:
+                self._generaciones[etiqueta] = self._generaciones.get(etiqueta, 0) + 1
+            self._datos.clear()
+            self._por_etiqueta.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                'entradas': len(self._datos),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / consultas, 4) if consultas else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+
+# Versiones de tablas con que se está respondiendo (None fuera de leer_en_version)
+_version_lectura: contextvars.ContextVar = contextvars.ContextVar('version_lectura', default=None)
+
+
+@contextlib.contextmanager
+def leer_en_version(version: tuple):
+    """Separa en la caché las lecturas hechas con estas versiones de tablas.
+
+    Una entrada leída con otras versiones no se reutiliza aunque siga vigente.
+    """
+    token = _version_lectura.set(version)
+    try:
+        yield
+    finally:
+        _version_lectura.reset(token)
+
+
+def _copiar(valor):
+    """Copia listas/dicts de filas para que quien llama no modifique la caché"""
+    if isinstance(valor, list):
+        return [dict(fila) if isinstance(fila, dict) else fila for fila in valor]
+    if isinstance(valor, dict):
+        return dict(valor)
+    return valor
+
+
+def cacheado(*etiquetas: str):
+    """Decorador para métodos de lectura de DatabaseManager.
+
+    Las etiquetas pueden referirse a los argumentos por nombre, por ejemplo
+    'propietario:{propietario_id}'. Sin caché (self.cache es None) el método
+    se ejecuta normalmente.
+    """
+    def decorador(metodo):
+        firma = inspect.signature(metodo)
+
+        @functools.wraps(metodo)
+        def envoltura(self, *args, **kwargs):
+            cache = getattr(self, 'cache', None)
+            if cache is None:
+                return metodo(self, *args, **kwargs)
+
+            argumentos = firma.bind(self, *args, **kwargs)
+            argumentos.apply_defaults()
+            valores = dict(argumentos.arguments)
+            valores.pop('self')
+            clave = (metodo.__name__,) + tuple(valores.values())
+            version = _version_lectura.get()
+            if version is not None:
+                clave += (version,)
+            etiquetas_llamada = tuple(e.format(**valores) for e in etiquetas)
+
+            encontrado, valor = cache.get(clave)
+            if encontrado:
+                return _copiar(valor)
+            generaciones = cache.generaciones(etiquetas_llamada)
+            valor = metodo(self, *args, **kwargs)
+            cache.set(clave, _copiar(valor), etiquetas_llamada, generaciones)
+            return valor
+
+        return envoltura
+    return decorador
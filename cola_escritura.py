@@ -0,0 +1,206 @@
+# ===========================================
+# COLA DE ESCRITURA - SISTEMA AUTOMOTORES
+# ===========================================
+#
+# Escritura diferida con commit agrupado (group commit). Las operaciones se
+# encolan en memoria y un único hilo escritor las aplica en lotes: toma las
+# que llegaron mientras confirmaba el lote anterior (hasta max_ops), espera a
+# lo sumo intervalo_ms más si se pidió, y confirma el lote con un solo COMMIT
+# (un solo fsync con synchronous=FULL).
+#
+# Cada operación corre dentro de un SAVEPOINT: si falla (p. ej. ValueError de
+# validación) se deshace solo esa operación y el resto del lote se confirma.
+# Quien encola recibe una Operacion con un Future que se resuelve cuando el
+# lote quedó confirmado en disco, o con el error de esa operación.
+#
+# Es local al proceso: una operación encolada y no confirmada se pierde si
+# el proceso termina abruptamente.
+
+import itertools
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+
+# Señal para que el hilo escritor termine después de vaciar la cola
+_FIN = object()
+
+
+class Operacion:
+    """Una escritura encolada; futuro se resuelve con el resultado ya confirmado"""
+
+    __slots__ = ('id', 'funcion', 'args', 'futuro', 'encolada', 'confirmada')
+
+    def __init__(self, op_id: int, funcion: Callable, args: tuple):
+        self.id = op_id
+        self.funcion = funcion
+        self.args = args
+        self.futuro: Future = Future()
+        self.encolada = time.time()
+        self.confirmada: Optional[float] = None
+
+    def estado(self) -> Dict:
+        """Estado serializable: pendiente, confirmada o error"""
+        datos = {'id': self.id, 'encolada': self.encolada}
+        if not self.futuro.done():
+            datos['estado'] = 'pendiente'
+        elif self.futuro.exception() is not None:
+            error = self.futuro.exception()
+            datos.update(estado='error', error=str(error), tipo_error=type(error).__name__)
+        else:
+            datos.update(estado='confirmada', resultado=self.futuro.result(),
+                         confirmada=self.confirmada)
+        return datos
+
+
+class ColaEscritura:
+    """Cola de escrituras con un único hilo escritor que confirma por lotes.
+
+    conectar() devuelve una conexión (se cierra al terminar cada lote).
+    al_confirmar(resultados) se llama tras cada COMMIT con los resultados de
+    las operaciones exitosas, p. ej. para invalidar la caché de lecturas.
+    """
+
+    def __init__(self, conectar: Callable[[], sqlite3.Connection], intervalo_ms: float = 0.0,
+                 max_ops: int = 256, max_pendientes: int = 10000, historial: int = 10000,
+                 al_confirmar: Callable[[List], None] = None):
+        if max_ops < 1:
+            raise ValueError("max_ops debe ser mayor que cero")
+        self.conectar = conectar
+        self.intervalo = max(intervalo_ms, 0) / 1000.0
+        self.max_ops = max_ops
+        self.al_confirmar = al_confirmar
+        # Cola acotada: con el escritor saturado, encolar() bloquea (contrapresión)
+        self._cola: "queue.Queue" = queue.Queue(maxsize=max_pendientes)
+        self._ids = itertools.count(1)
+        # Operaciones recientes por id, para consultar su estado
+        self._historial: "OrderedDict[int, Operacion]" = OrderedDict()
+        self._max_historial = historial
+        self._lock = threading.Lock()
+        # Ordena encolar() y cerrar(): ninguna operación aceptada queda detrás de _FIN.
+        # Aparte de _lock porque put() puede bloquear por contrapresión
+        self._lock_encolar = threading.Lock()
+        self._cerrada = False
+        self.lotes = 0
+        self.operaciones = 0
+        self.errores = 0
+        self._hilo = threading.Thread(target=self._escritor, name='cola-escritura', daemon=True)
+        self._hilo.start()
+
+    def encolar(self, funcion: Callable, *args) -> Operacion:
+        """Encola funcion(cursor, *args) y devuelve la Operacion sin esperar el COMMIT"""
+        with self._lock_encolar:
+            if self._cerrada:
+                raise RuntimeError("La cola de escritura está cerrada")
+            operacion = Operacion(next(self._ids), funcion, args)
+            with self._lock:
+                self._historial[operacion.id] = operacion
+                while len(self._historial) > self._max_historial:
+                    self._historial.popitem(last=False)
+            self._cola.put(operacion)
+        return operacion
+
+    def ejecutar(self, funcion: Callable, *args, timeout: float = None):
+        """Encola y espera el resultado confirmado (o la excepción de la operación)"""
+        return self.encolar(funcion, *args).futuro.result(timeout)
+
+    def get_operacion(self, op_id: int) -> Optional[Operacion]:
+        with self._lock:
+            return self._historial.get(op_id)
+
+    def pendientes(self) -> int:
+        return self._cola.qsize()
+
+    def estadisticas(self) -> Dict:
+        return {
+            'pendientes': self.pendientes(),
+            'lotes': self.lotes,
+            'operaciones': self.operaciones,
+            'errores': self.errores,
+            'ops_por_lote': round(self.operaciones / self.lotes, 2) if self.lotes else 0,
+        }
+
+    def cerrar(self, timeout: float = None):
+        """Deja de aceptar operaciones, confirma las pendientes y detiene el escritor"""
+        with self._lock_encolar:
+            if self._cerrada:
+                return
+            self._cerrada = True
+            self._cola.put(_FIN)
+        self._hilo.join(timeout)
+
+    # Hilo escritor
+    def _escritor(self):
+        fin = False
+        while not fin:
+            operacion = self._cola.get()
+            if operacion is _FIN:
+                break
+            lote = [operacion]
+            limite = time.monotonic() + self.intervalo
+            while len(lote) < self.max_ops:
+                restante = limite - time.monotonic()
+                try:
+                    siguiente = self._cola.get(timeout=restante) if restante > 0 else self._cola.get_nowait()
+                except queue.Empty:
+                    break
+                if siguiente is _FIN:
+                    fin = True
+                    break
+                lote.append(siguiente)
+            self._aplicar(lote)
+
+    def _aplicar(self, lote: List[Operacion]):
+        """Aplica un lote en una transacción; cada operación en su SAVEPOINT"""
+        resultados = []
+        try:
+            conn = self.conectar()
+        except Exception as e:
+            for operacion in lote:
+                operacion.futuro.set_exception(e)
+            self.errores += len(lote)
+            return
+
+        try:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            for operacion in lote:
+                cursor.execute("SAVEPOINT operacion")
+                try:
+                    resultado = operacion.funcion(cursor, *operacion.args)
+                except Exception as e:
+                    cursor.execute("ROLLBACK TO operacion")
+                    resultados.append((operacion, None, e))
+                else:
+                    resultados.append((operacion, resultado, None))
+                cursor.execute("RELEASE operacion")
+            conn.commit()
+        except Exception as e:
+            # Falló BEGIN o COMMIT: ninguna operación del lote quedó escrita
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                pass
+            resultados = [(operacion, None, e) for operacion in lote]
+        finally:
+            conn.close()
+
+        confirmada = time.time()
+        exitosos = [resultado for _op, resultado, error in resultados if error is None]
+        if exitosos and self.al_confirmar is not None:
+            try:
+                self.al_confirmar(exitosos)
+            except Exception:
+                pass
+        self.lotes += 1
+        for operacion, resultado, error in resultados:
+            self.operaciones += 1
+            if error is not None:
+                self.errores += 1
+                operacion.futuro.set_exception(error)
+            else:
+                operacion.confirmada = confirmada
+                operacion.futuro.set_result(resultado)
@@ -3,174 +3,532 @@
 # ===========================================
 
 import sqlite3
+import base64
 import datetime
-from typing import List, Dict, Optional
+import json
+import os
+import threading
+import time
+from typing import List, Dict, Optional, Callable, Union, Iterator
+
+import analitica
+import preventivo
+from busqueda import INDICES_BUSQUEDA, consulta_fts
+from migraciones import aplicar_migraciones
+from resumenes import verificar_resumenes, reconstruir_resumenes
+from cache import CacheLRU, cacheado
+from cola_escritura import ColaEscritura, Operacion
+from filas import filas_a_dict
+from metricas import Metricas
+from rut import normalizar_rut
+
+
+# Perfiles de rendimiento aplicados a cada conexión nueva.
+# "durable" prioriza no perder transacciones confirmadas ante un corte de luz;
+# "throughput" acepta perder las últimas transacciones ante un corte del
+# sistema operativo (nunca corrompe la base) a cambio de menos fsync.
+PERFILES_RENDIMIENTO = {
+    'durable': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'cache_size': -16000,       # KiB (valor negativo) -> 16 MB
+        'mmap_size': 0,
+        'temp_store': 'DEFAULT',
+        'busy_timeout': 5000,       # ms
+    },
+    'throughput': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -64000,
+        'mmap_size': 268435456,     # 256 MB
+        'temp_store': 'MEMORY',
+        'busy_timeout': 10000,
+    },
+}
+
+PERFIL_POR_DEFECTO = 'durable'
+
+# Orden en que se aplican: journal_mode primero porque cambia el modo de la base
+_PRAGMAS_PERMITIDOS = ('journal_mode', 'synchronous', 'cache_size', 'mmap_size',
+                       'temp_store', 'busy_timeout')
+
+
+def resolver_perfil(perfil: Union[str, Dict, None]) -> Dict:
+    """Devuelve los pragmas de un perfil por nombre o un dict de pragmas.
+
+    Un dict puede incluir 'base' con el nombre del perfil del que hereda.
+    """
+    if perfil is None:
+        perfil = PERFIL_POR_DEFECTO
+    if isinstance(perfil, str):
+        if perfil not in PERFILES_RENDIMIENTO:
+            raise ValueError(f"Perfil de rendimiento desconocido: {perfil}")
+        return dict(PERFILES_RENDIMIENTO[perfil])
+
+    pragmas = dict(PERFILES_RENDIMIENTO[perfil.get('base', PERFIL_POR_DEFECTO)])
+    for nombre, valor in perfil.items():
+        if nombre == 'base':
+            continue
+        if nombre not in _PRAGMAS_PERMITIDOS:
+            raise ValueError(f"Pragma no soportado: {nombre}")
+        pragmas[nombre] = valor
+    return pragmas
+
+
+def aplicar_pragmas(conn: sqlite3.Connection, pragmas: Dict):
+    """Aplica los pragmas de un perfil a una conexión recién abierta"""
+    for nombre in _PRAGMAS_PERMITIDOS:
+        if nombre in pragmas:
+            valor = pragmas[nombre]
+            # Los nombres vienen de una lista cerrada; los valores se validan por tipo
+            if not isinstance(valor, int) and not str(valor).isalnum():
+                raise ValueError(f"Valor inválido para {nombre}: {valor}")
+            conn.execute(f"PRAGMA {nombre} = {valor}").fetchall()
+
+
+# Orden estable de cada listado paginable: (dirección, [(expresión SQL, campo de la fila)]).
+# El último criterio es siempre el id, que desempata filas con igual clave.
+ORDEN_PAGINACION = {
+    'propietarios': ('asc', [('p.nombre', 'nombre'), ('p.apellido', 'apellido'), ('p.id', 'id')]),
+    'vehiculos': ('asc', [("p.nombre || ' ' || p.apellido", 'propietario_nombre'), ('v.marca', 'marca'),
+                          ('v.modelo', 'modelo'), ('v.id', 'id')]),
+    'mantenimientos': ('desc', [('m.fecha_mantenimiento', 'fecha_mantenimiento'), ('m.id', 'id')]),
+    'viajes': ('desc', [('v.fecha_salida', 'fecha_salida'), ('v.id', 'id')]),
+    'presupuesto': ('desc', [('fecha_movimiento', 'fecha_movimiento'), ('id', 'id')]),
+    'tickets': ('desc', [('fecha', 'fecha'), ('id', 'id')]),
+    # Listados filtrados con ?q=: por relevancia (rank de FTS5, menor es mejor)
+    'busqueda_propietarios': ('asc', [('b.rank', 'relevancia'), ('p.id', 'id')]),
+    'busqueda_vehiculos': ('asc', [('b.rank', 'relevancia'), ('v.id', 'id')]),
+    'busqueda_mantenimientos': ('asc', [('b.rank', 'relevancia'), ('m.id', 'id')]),
+}
+
+
+# Filtros permitidos en cada listado: campo -> (expresión SQL, tipo). Solo estas
+# columnas y los operadores de su tipo llegan al SQL; los valores van siempre
+# como parámetros y la columna queda sin funciones alrededor para usar índices.
+FILTROS_LISTADOS = {
+    'viajes': {
+        'fecha_salida': ('v.fecha_salida', 'fecha'),
+        'fecha_llegada': ('v.fecha_llegada', 'fecha'),
+        'estado': ('v.estado', 'texto'),
+        'vehiculo_id': ('v.vehiculo_id', 'id'),
+        'propietario_id': ('v.propietario_id', 'id'),
+        'tipo_personal': ('v.tipo_personal', 'texto'),
+        'costo_combustible': ('v.costo_combustible', 'numero'),
+    },
+    'mantenimientos': {
+        'fecha_mantenimiento': ('m.fecha_mantenimiento', 'fecha'),
+        'vehiculo_id': ('m.vehiculo_id', 'id'),
+        'tipo_mantenimiento': ('m.tipo_mantenimiento', 'texto'),
+        'taller': ('m.taller', 'texto'),
+        'costo': ('m.costo', 'numero'),
+    },
+    'presupuesto': {
+        'fecha_movimiento': ('fecha_movimiento', 'fecha'),
+        'tipo_movimiento': ('tipo_movimiento', 'texto'),
+        'categoria': ('categoria', 'texto'),
+        'metodo_pago': ('metodo_pago', 'texto'),
+        'monto': ('monto', 'numero'),
+    },
+    'tickets': {
+        'fecha': ('fecha', 'fecha'),
+        'sistema': ('sistema', 'texto'),
+        'referencia_id': ('referencia_id', 'id'),
+    },
+}
+
+OPERADORES_FILTRO = {'eq': '=', 'ne': '!=', 'gt': '>', 'gte': '>=', 'lt': '<', 'lte': '<=', 'in': 'IN'}
+
+_OPERADORES_POR_TIPO = {
+    'fecha': ('eq', 'gt', 'gte', 'lt', 'lte'),
+    'numero': ('eq', 'gt', 'gte', 'lt', 'lte'),
+    'id': ('eq', 'ne', 'in'),
+    'texto': ('eq', 'ne', 'in'),
+}
+
+# Máximo de valores en un filtro campo__in=a,b,c
+MAX_VALORES_IN = 100
+
+
+def _convertir_valor(campo: str, tipo: str, valor: str):
+    """Valida y convierte el valor de un filtro según el tipo de la columna"""
+    try:
+        if tipo == 'fecha':
+            return datetime.date.fromisoformat(valor).isoformat()
+        if tipo == 'id':
+            return int(valor)
+        if tipo == 'numero':
+            return float(valor)
+    except ValueError:
+        formato = 'AAAA-MM-DD' if tipo == 'fecha' else 'un número'
+        raise ValueError(f"El filtro {campo} debe ser {formato}: {valor!r}")
+    return valor
+
+
+def compilar_filtros(coleccion: str, filtros: Dict[str, str]) -> tuple:
+    """Traduce {'campo__op': valor} a condiciones SQL con parámetros.
+
+    Sin sufijo el operador es eq. Devuelve ([condición, ...], [parámetro, ...]);
+    un campo u operador fuera de FILTROS_LISTADOS es un ValueError.
+    """
+    permitidos = FILTROS_LISTADOS.get(coleccion, {})
+    condiciones, params = [], []
+    for clave, valor in sorted(filtros.items()):
+        campo, _sep, operador = clave.partition('__')
+        operador = operador or 'eq'
+        if campo not in permitidos:
+            raise ValueError(f"Filtro no permitido: {campo}")
+        expresion, tipo = permitidos[campo]
+        if operador not in _OPERADORES_POR_TIPO[tipo]:
+            raise ValueError(f"Operador no permitido para {campo}: {operador}")
+
+        if operador == 'in':
+            valores = [v for v in str(valor).split(',') if v != '']
+            if not valores or len(valores) > MAX_VALORES_IN:
+                raise ValueError(f"El filtro {clave} admite entre 1 y {MAX_VALORES_IN} valores")
+            condiciones.append(f"{expresion} IN ({', '.join('?' for _ in valores)})")
+            params.extend(_convertir_valor(campo, tipo, v) for v in valores)
+        else:
+            condiciones.append(f"{expresion} {OPERADORES_FILTRO[operador]} ?")
+            params.append(_convertir_valor(campo, tipo, str(valor)))
+    return condiciones, params
+
+
+# Altas masivas por colección. Columnas y valores por defecto son los mismos
+# que usan create_vehiculo, create_mantenimiento, create_viaje y
+# create_movimiento_presupuesto; 'referencias' y 'unicos' se validan antes
+# de insertar porque SQLite no aplica las claves foráneas de este esquema.
+ALTAS_MASIVAS = {
+    'vehiculos': {
+        'tabla': 'vehiculos',
+        'obligatorios': ['propietario_id', 'marca', 'modelo'],
+        'opcionales': {'año': None, 'color': None, 'kilometraje': 0, 'patente': None},
+        'referencias': {'propietario_id': 'propietarios'},
+        'unicos': {'patente': 'Ya existe un vehículo con esa patente'},
+    },
+    'mantenimientos': {
+        'tabla': 'mantenimientos',
+        'obligatorios': ['vehiculo_id', 'fecha_mantenimiento', 'tipo_mantenimiento',
+                         'kilometros_recorridos'],
+        'opcionales': {'descripcion': None, 'costo': None, 'taller': None},
+        'referencias': {'vehiculo_id': 'vehiculos'},
+        'unicos': {},
+    },
+    'viajes': {
+        'tabla': 'viajes',
+        'obligatorios': ['vehiculo_id', 'propietario_id', 'destino', 'fecha_salida',
+                         'kilometraje_salida'],
+        'opcionales': {'tipo_personal': None, 'combustible_inicial': None, 'observaciones': None},
+        'referencias': {'vehiculo_id': 'vehiculos', 'propietario_id': 'propietarios'},
+        'unicos': {},
+    },
+    'presupuesto': {
+        'tabla': 'presupuesto',
+        'obligatorios': ['tipo_movimiento', 'categoria', 'descripcion', 'monto', 'fecha_movimiento'],
+        'opcionales': {'metodo_pago': None, 'referencia': None},
+        'referencias': {},
+        'unicos': {},
+    },
+}
+
+# Máximo de parámetros por consulta IN (...) al validar referencias
+_BLOQUE_VALIDACION = 500
+
+
+class ErrorLote(ValueError):
+    """Un alta masiva con filas inválidas; errores es [{'fila': i, 'error': ...}]"""
+
+    def __init__(self, errores: List[Dict]):
+        super().__init__(f"{len(errores)} fila(s) con errores; no se insertó ninguna")
+        self.errores = errores
+
+
+def codificar_cursor(valores: List) -> str:
+    """Convierte la clave de orden de la última fila en un token opaco"""
+    datos = json.dumps(valores, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(datos).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(token: str, largo: int) -> List:
+    """Recupera la clave de orden de un token generado por codificar_cursor"""
+    try:
+        relleno = '=' * (-len(token) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(token + relleno).decode('utf-8'))
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Cursor de paginación inválido")
+    if not isinstance(valores, list) or len(valores) != largo:
+        raise ValueError("Cursor de paginación inválido")
+    return valores
+
+
+class PooledConnection:
+    """Conexión prestada por el pool; close() la devuelve en vez de cerrarla"""
+
+    def __init__(self, pool: "ConnectionPool", raw: sqlite3.Connection):
+        self._pool = pool
+        self._raw = raw
+        self.last_used = time.monotonic()
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def close(self):
+        """Devuelve la conexión al pool"""
+        self._pool.release(self)
+
+
+class ConnectionPool:
+    """Pool acotado de conexiones SQLite con afinidad por hilo.
+
+    Un hilo que pide una conexión mientras ya tiene una prestada recibe la
+    misma (las llamadas anidadas comparten transacción). Al liberar la última
+    referencia la conexión vuelve a la lista de libres para otro hilo.
+    """
+
+    def __init__(self, db_name: str, max_size: int = 8, timeout: float = 30.0,
+                 health_check_interval: float = 30.0,
+                 on_connect: Optional[Callable[[sqlite3.Connection], None]] = None,
+                 metricas: Optional[Metricas] = None):
+        self.db_name = db_name
+        self.max_size = max_size
+        self.on_connect = on_connect
+        # Con métricas, cada sentencia y cada apertura de conexión se miden
+        self.metricas = metricas
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._idle: List[PooledConnection] = []
+        self._created = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self._pid = os.getpid()
+        # Conexiones heredadas de un fork: no se usan ni se cierran en el hijo
+        self._heredadas: List[PooledConnection] = []
+
+    def _reiniciar_tras_fork(self):
+        """En un proceso hijo el pool empieza vacío.
+
+        SQLite no admite usar en el hijo una conexión abierta antes del fork;
+        cerrarla tampoco es seguro (podría hacer checkpoint y borrar el WAL que
+        el padre sigue usando), así que solo se conserva la referencia.
+        """
+        self._heredadas.extend(self._idle)
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            self._heredadas.append(conn)
+        self._idle = []
+        self._created = 0
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self._pid = os.getpid()
+
+    def _connect(self) -> PooledConnection:
+        if self.metricas is not None:
+            raw = self.metricas.conectar(self.db_name, self.on_connect,
+                                         timeout=self.timeout, check_same_thread=False)
+            return PooledConnection(self, raw)
+        raw = sqlite3.connect(self.db_name, timeout=self.timeout, check_same_thread=False)
+        if self.on_connect is not None:
+            try:
+                self.on_connect(raw)
+            except Exception:
+                raw.close()
+                raise
+        return PooledConnection(self, raw)
+
+    def _is_healthy(self, conn: PooledConnection) -> bool:
+        """Verifica con SELECT 1 las conexiones que llevan tiempo sin usarse"""
+        if time.monotonic() - conn.last_used < self.health_check_interval:
+            return True
+        try:
+            conn._raw.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _discard(self, conn: PooledConnection):
+        try:
+            conn._raw.close()
+        except sqlite3.Error:
+            pass
+        with self._cond:
+            self._created -= 1
+            self._cond.notify()
+
+    def acquire(self) -> PooledConnection:
+        """Obtiene una conexión del pool (o la que el hilo ya tiene prestada)"""
+        if self._pid != os.getpid():
+            self._reiniciar_tras_fork()
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            self._local.depth += 1
+            return conn
+
+        deadline = time.monotonic() + self.timeout
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise sqlite3.ProgrammingError("El pool de conexiones está cerrado")
+                if self._idle:
+                    conn = self._idle.pop()
+                elif self._created < self.max_size:
+                    self._created += 1
+                    conn = None
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise sqlite3.OperationalError("No hay conexiones disponibles en el pool")
+                    self._cond.wait(remaining)
+                    continue
+
+            if conn is None:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._created -= 1
+                        self._cond.notify()
+                    raise
+            elif not self._is_healthy(conn):
+                self._discard(conn)
+                continue
+            break
+
+        self._local.conn = conn
+        self._local.depth = 1
+        return conn
+
+    def release(self, conn: PooledConnection):
+        """Libera una referencia; al llegar a cero la conexión vuelve al pool"""
+        if getattr(self._local, 'conn', None) is not conn:
+            return
+        self._local.depth -= 1
+        if self._local.depth > 0:
+            return
+        self._local.conn = None
+
+        try:
+            # Nada de lo no confirmado debe filtrarse al siguiente usuario
+            if conn._raw.in_transaction:
+                conn._raw.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+
+        conn.last_used = time.monotonic()
+        with self._cond:
+            if self._closed:
+                self._created -= 1
+                conn._raw.close()
+            else:
+                self._idle.append(conn)
+            self._cond.notify()
+
+    def close_all(self):
+        """Cierra el pool: las conexiones libres se cierran ya, las prestadas al devolverse"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._created -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            conn._raw.close()
+
+    def stats(self) -> Dict:
+        """Estado actual del pool"""
+        with self._cond:
+            return {
+                'max_size': self.max_size,
+                'abiertas': self._created,
+                'libres': len(self._idle),
+                'en_uso': self._created - len(self._idle),
+            }
+
 
 class DatabaseManager:
-    def __init__(self, db_name: str = "automotores.db"):
+    def __init__(self, db_name: str = "automotores.db", pool_size: int = 8,
+                 perfil: Union[str, Dict, None] = None,
+                 cache_size: int = 1024, cache_ttl: float = 30.0,
+                 datos_ejemplo: bool = False, metricas: Optional[Metricas] = None):
         self.db_name = db_name
-        self.init_database()
+        self.pragmas = resolver_perfil(perfil)
+        # metricas (ver metricas.py) mide cada sentencia SQL; None no agrega costo
+        self.metricas = metricas
+        # cache_size=0 desactiva la caché de lecturas (propietarios y vehículos)
+        self.cache = CacheLRU(cache_size, cache_ttl) if cache_size > 0 else None
+        # pool_size=0 desactiva el pool (una conexión nueva por operación)
+        self.pool = ConnectionPool(db_name, max_size=pool_size,
+                                   on_connect=self._configurar_conexion,
+                                   metricas=metricas) if pool_size > 0 else None
+        # Cola de escritura diferida (ver iniciar_cola_escritura); None = escritura directa
+        self.cola: Optional[ColaEscritura] = None
+        # datos_ejemplo=True carga propietarios, vehículos y mantenimientos de
+        # demostración si la base está vacía (desarrollo y benchmarks)
+        self.init_database(datos_ejemplo)
+    
+    def _configurar_conexion(self, conn: sqlite3.Connection):
+        """Aplica el perfil de rendimiento a una conexión nueva"""
+        aplicar_pragmas(conn, self.pragmas)
     
     def get_connection(self):
         """Obtiene una conexión a la base de datos"""
-        return sqlite3.connect(self.db_name)
+        if self.pool is not None:
+            return self.pool.acquire()
+        if self.metricas is not None:
+            return self.metricas.conectar(self.db_name, self._configurar_conexion)
+        conn = sqlite3.connect(self.db_name)
+        self._configurar_conexion(conn)
+        return conn
+    
+    def iniciar_cola_escritura(self, intervalo_ms: float = 0.0, max_ops: int = 256) -> ColaEscritura:
+        """Activa la escritura diferida de viajes con commit agrupado (ver cola_escritura.py)"""
+        if self.cola is None:
+            self.cola = ColaEscritura(self.get_connection, intervalo_ms=intervalo_ms,
+                                      max_ops=max_ops, al_confirmar=self._invalidar_viajes)
+        return self.cola
+
+    def get_operacion(self, op_id: int) -> Optional[Dict]:
+        """Estado de una operación encolada (None si no existe o ya salió del historial)"""
+        operacion = self.cola.get_operacion(op_id) if self.cola is not None else None
+        return operacion.estado() if operacion is not None else None
+
+    def close(self):
+        """Confirma las escrituras encoladas y cierra todas las conexiones del pool"""
+        if self.cola is not None:
+            self.cola.cerrar()
+            self.cola = None
+        if self.pool is not None:
+            self.pool.close_all()
     
-    def init_database(self):
-        """Inicializa la base de datos y crea las tablas necesarias"""
+    def _invalidar(self, *etiquetas: str):
+        """Descarta de la caché las lecturas afectadas por una escritura ya confirmada"""
+        if self.cache is not None:
+            self.cache.invalidar(*etiquetas)
+    
+    def init_database(self, datos_ejemplo: bool = False):
+        """Inicializa la base de datos aplicando las migraciones pendientes.
+
+        Con el esquema al día es una sola lectura de PRAGMA user_version.
+        """
         conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        # Crear tabla de propietarios
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS propietarios (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nombre TEXT NOT NULL,
-                apellido TEXT NOT NULL,
-                rut TEXT UNIQUE NOT NULL,
-                tipo_personal TEXT,
-                telefono TEXT,
-                email TEXT,
-                fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Agregar columna tipo_personal si no existe (para bases de datos existentes)
-        try:
-            cursor.execute('ALTER TABLE propietarios ADD COLUMN tipo_personal TEXT')
-        except sqlite3.OperationalError:
-            # La columna ya existe, no hacer nada
-            pass
         
-        # Crear tabla de vehículos
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS vehiculos (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                propietario_id INTEGER NOT NULL,
-                marca TEXT NOT NULL,
-                modelo TEXT NOT NULL,
-                año INTEGER,
-                color TEXT,
-                kilometraje INTEGER DEFAULT 0,
-                patente TEXT UNIQUE,
-                fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (propietario_id) REFERENCES propietarios (id)
-            )
-        ''')
-        
-        # Crear tabla de mantenimientos
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS mantenimientos (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                vehiculo_id INTEGER NOT NULL,
-                fecha_mantenimiento DATE NOT NULL,
-                tipo_mantenimiento TEXT NOT NULL,
-                kilometraje_anterior INTEGER,
-                kilometraje_actual INTEGER,
-                kilometros_recorridos INTEGER,
-                descripcion TEXT,
-                costo REAL,
-                taller TEXT,
-                foto_url TEXT,
-                fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (vehiculo_id) REFERENCES vehiculos (id)
-            )
-        ''')
-
-        # Agregar columna kilometros_recorridos si no existe (para bases existentes)
-        try:
-            cursor.execute('ALTER TABLE mantenimientos ADD COLUMN kilometros_recorridos INTEGER')
-        except sqlite3.OperationalError:
-            pass
-        
-        # Crear tabla de viajes
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS viajes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                vehiculo_id INTEGER NOT NULL,
-                propietario_id INTEGER NOT NULL,
-                tipo_personal TEXT,
-                destino TEXT NOT NULL,
-                fecha_salida DATE NOT NULL,
-                fecha_llegada DATE,
-                kilometraje_salida INTEGER NOT NULL,
-                kilometraje_llegada INTEGER,
-                combustible_inicial REAL,
-                combustible_final REAL,
-                combustible_consumido REAL,
-                costo_combustible REAL,
-                observaciones TEXT,
-                estado TEXT DEFAULT 'En curso',
-                fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (vehiculo_id) REFERENCES vehiculos (id),
-                FOREIGN KEY (propietario_id) REFERENCES propietarios (id)
-            )
-        ''')
-
-        # Crear tabla de tickets de rendición
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS tickets (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                fecha DATE NOT NULL,
-                sistema TEXT NOT NULL CHECK (sistema IN ('viajes','mantenimientos')),
-                referencia_id INTEGER,
-                descripcion TEXT,
-                fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Agregar columna tipo_personal si no existe (para bases de datos existentes)
-        try:
-            cursor.execute('ALTER TABLE viajes ADD COLUMN tipo_personal TEXT')
-        except sqlite3.OperationalError:
-            # La columna ya existe, no hacer nada
-            pass
-        
-        # Crear tabla de presupuesto
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS presupuesto (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                tipo_movimiento TEXT NOT NULL CHECK (tipo_movimiento IN ('ingreso', 'egreso')),
-                categoria TEXT NOT NULL,
-                descripcion TEXT NOT NULL,
-                monto REAL NOT NULL,
-                fecha_movimiento DATE NOT NULL,
-                metodo_pago TEXT,
-                referencia TEXT,
-                fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Crear tabla de información adicional de propietarios
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS propietarios_info (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                propietario_id INTEGER NOT NULL,
-                direccion TEXT,
-                fecha_nacimiento DATE,
-                profesion TEXT,
-                empresa TEXT,
-                telefono_emergencia TEXT,
-                contacto_emergencia TEXT,
-                notas TEXT,
-                fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (propietario_id) REFERENCES propietarios (id)
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        try:
+            aplicar_migraciones(conn)
+        finally:
+            conn.close()
         
-        # Insertar datos de ejemplo si las tablas están vacías
-        self.insert_sample_data()
+        if datos_ejemplo:
+            # Insertar datos de ejemplo si las tablas están vacías
+            self.insert_sample_data()
     
     def insert_sample_data(self):
         """Inserta datos de ejemplo si las tablas están vacías"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        # Verificar si ya hay datos
-        cursor.execute("SELECT COUNT(*) FROM propietarios")
-        if cursor.fetchone()[0] > 0:
+        # Verificar si ya hay datos (EXISTS no recorre la tabla como COUNT(*))
+        cursor.execute("SELECT EXISTS (SELECT 1 FROM propietarios)")
+        if cursor.fetchone()[0]:
             conn.close()
             return
         
@@ -226,9 +584,172 @@ class DatabaseManager:
         conn.commit()
         conn.close()
     
+    # Paginación por cursor (keyset)
+    def _paginacion(self, coleccion: str, limit: int = None, after: str = None):
+        """Arma la condición de keyset, el ORDER BY/LIMIT y sus parámetros.
+
+        Devuelve (condición o '', 'ORDER BY ... [LIMIT n]', parámetros).
+        """
+        direccion, claves = ORDEN_PAGINACION[coleccion]
+        expresiones = [expr for expr, _campo in claves]
+        sentido = 'DESC' if direccion == 'desc' else 'ASC'
+        orden = 'ORDER BY ' + ', '.join(f"{expr} {sentido}" for expr in expresiones)
+        if limit is not None:
+            orden += f" LIMIT {int(limit)}"
+
+        if not after:
+            return '', orden, []
+
+        valores = decodificar_cursor(after, len(claves))
+        operador = '<' if direccion == 'desc' else '>'
+        marcadores = ', '.join('?' for _ in claves)
+        condicion = f"({', '.join(expresiones)}) {operador} ({marcadores})"
+        return condicion, orden, valores
+    
+    def _listado(self, coleccion: str, columna_id: str = None, limit: int = None,
+                 after: str = None, q: str = None, filtros: Dict[str, str] = None):
+        """Partes variables de un listado paginable, con búsqueda de texto y filtros.
+
+        Devuelve (columna de relevancia, JOIN, WHERE, ORDER BY, parámetros). Con q
+        el listado se limita a las filas que coinciden en el índice FTS5 y se
+        ordena por relevancia en lugar del orden habitual. Los filtros se
+        compilan con compilar_filtros.
+        """
+        condiciones, params = compilar_filtros(coleccion, filtros or {})
+        relevancia = busqueda = ''
+        if q:
+            indice = f'busqueda_{coleccion}'
+            relevancia = ', b.rank as relevancia'
+            busqueda = f'JOIN {indice} b ON b.rowid = {columna_id}'
+            condiciones.insert(0, f'b.{indice} MATCH ?')
+            params.insert(0, consulta_fts(q))
+            coleccion = indice
+        condicion, orden, params_cursor = self._paginacion(coleccion, limit, after)
+        if condicion:
+            condiciones.append(condicion)
+        where = 'WHERE ' + ' AND '.join(condiciones) if condiciones else ''
+        return relevancia, busqueda, where, orden, params + params_cursor
+    
+    def cursor_siguiente(self, coleccion: str, filas: List[Dict], limit: int = None,
+                         q: str = None) -> Optional[str]:
+        """Token para pedir la página siguiente, o None si no hay más filas"""
+        if limit is None or len(filas) < limit or not filas:
+            return None
+        _direccion, claves = ORDEN_PAGINACION[f'busqueda_{coleccion}' if q else coleccion]
+        ultima = filas[-1]
+        return codificar_cursor([ultima[campo] for _expr, campo in claves])
+    
+    def _iterar_consulta(self, sql: str, params=(), batch_size: int = 1000) -> Iterator[Dict]:
+        """Recorre el resultado de una consulta en bloques de fetchmany.
+
+        Solo mantiene en memoria un bloque de filas a la vez; la conexión queda
+        prestada hasta que se agota o se cierra el generador.
+        """
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            columns = [description[0] for description in cursor.description]
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from filas_a_dict(columns, rows)
+        finally:
+            conn.close()
+    
+    # Altas masivas
+    def _existentes(self, cursor: sqlite3.Cursor, tabla: str, columna: str, valores: set) -> set:
+        """Subconjunto de valores que ya existen en tabla.columna"""
+        valores = list(valores)
+        existentes = set()
+        for inicio in range(0, len(valores), _BLOQUE_VALIDACION):
+            bloque = valores[inicio:inicio + _BLOQUE_VALIDACION]
+            marcadores = ', '.join('?' for _ in bloque)
+            cursor.execute(f"SELECT {columna} FROM {tabla} WHERE {columna} IN ({marcadores})", bloque)
+            existentes.update(row[0] for row in cursor.fetchall())
+        return existentes
+
+    def crear_lote(self, coleccion: str, filas: List[Dict]) -> List[int]:
+        """Inserta muchas filas de una colección en una sola transacción.
+
+        Valida todas las filas antes de escribir (campos obligatorios,
+        referencias existentes y valores únicos); si alguna falla lanza
+        ErrorLote y no se inserta nada. Devuelve los IDs en el orden recibido.
+        """
+        spec = ALTAS_MASIVAS[coleccion]
+        columnas = spec['obligatorios'] + list(spec['opcionales'])
+
+        errores = []
+        valores = []
+        for i, fila in enumerate(filas):
+            if not isinstance(fila, dict):
+                errores.append({'fila': i, 'error': 'La fila debe ser un objeto JSON'})
+                continue
+            faltantes = [campo for campo in spec['obligatorios'] if not fila.get(campo)]
+            if faltantes:
+                errores.append({'fila': i, 'error': f'El campo {faltantes[0]} es obligatorio'})
+                continue
+            valores.append((i, tuple(fila.get(c, spec['opcionales'].get(c)) for c in columnas)))
+
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            # BEGIN IMMEDIATE: nadie más escribe entre la validación y el INSERT,
+            # y los IDs AUTOINCREMENT del lote quedan consecutivos
+            cursor.execute("BEGIN IMMEDIATE")
+
+            for columna, tabla in spec['referencias'].items():
+                posicion = columnas.index(columna)
+                existentes = self._existentes(cursor, tabla, 'id', {v[posicion] for _i, v in valores})
+                for i, v in valores:
+                    if v[posicion] not in existentes:
+                        errores.append({'fila': i, 'error': f'No existe {columna} = {v[posicion]}'})
+
+            for columna, mensaje in spec['unicos'].items():
+                posicion = columnas.index(columna)
+                existentes = self._existentes(cursor, spec['tabla'], columna,
+                                              {v[posicion] for _i, v in valores if v[posicion]})
+                vistos = set()
+                for i, v in valores:
+                    valor = v[posicion]
+                    if valor and (valor in existentes or valor in vistos):
+                        errores.append({'fila': i, 'error': mensaje})
+                    vistos.add(valor)
+
+            if errores:
+                conn.rollback()
+                raise ErrorLote(sorted(errores, key=lambda e: e['fila']))
+
+            cursor.executemany(f'''
+                INSERT INTO {spec['tabla']} ({', '.join(columnas)})
+                VALUES ({', '.join('?' for _ in columnas)})
+            ''', [v for _i, v in valores])
+            ultimo = cursor.execute("SELECT last_insert_rowid()").fetchone()[0]
+            conn.commit()
+        except sqlite3.IntegrityError as e:
+            conn.rollback()
+            raise ValueError(str(e))
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        if coleccion == 'vehiculos':
+            posicion = columnas.index('propietario_id')
+            self._invalidar('vehiculos', 'propietarios',
+                            *{f'vehiculos_de:{v[posicion]}' for _i, v in valores})
+        elif coleccion == 'mantenimientos':
+            self._invalidar('conteo_mantenimientos', 'analitica')
+        elif coleccion == 'viajes':
+            self._invalidar('analitica')
+        return list(range(ultimo - len(valores) + 1, ultimo + 1))
+    
     # CRUD para Propietarios
     def create_propietario(self, nombre: str, apellido: str, rut: str, tipo_personal: str = None, telefono: str = None, email: str = None) -> int:
-        """Crea un nuevo propietario"""
+        """Crea un nuevo propietario (el RUT se guarda normalizado, ver rut.py)"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
@@ -236,51 +757,80 @@ class DatabaseManager:
             cursor.execute('''
                 INSERT INTO propietarios (nombre, apellido, rut, tipo_personal, telefono, email)
                 VALUES (?, ?, ?, ?, ?, ?)
-            ''', (nombre, apellido, rut, tipo_personal, telefono, email))
+            ''', (nombre, apellido, normalizar_rut(rut), tipo_personal, telefono, email))
             
             propietario_id = cursor.lastrowid
             conn.commit()
+            self._invalidar('propietarios')
             return propietario_id
         except sqlite3.IntegrityError:
             raise ValueError("Ya existe un propietario con ese RUT")
         finally:
             conn.close()
     
-    def get_propietarios(self) -> List[Dict]:
-        """Obtiene todos los propietarios"""
+    @cacheado('propietarios')
+    def get_propietarios(self, limit: int = None, after: str = None, q: str = None) -> List[Dict]:
+        """Obtiene todos los propietarios (o una página si se indica limit/after).
+
+        Con q devuelve solo los que coinciden por nombre, apellido, RUT o email.
+        """
+        relevancia, busqueda, where, orden, params = self._listado('propietarios', 'p.id', limit, after, q)
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('''
-            SELECT p.*, COUNT(v.id) as total_vehiculos
-            FROM propietarios p
-            LEFT JOIN vehiculos v ON p.id = v.propietario_id
-            GROUP BY p.id
-            ORDER BY p.nombre, p.apellido
-        ''')
-        
-        columns = [description[0] for description in cursor.description]
-        propietarios = [dict(zip(columns, row)) for row in cursor.fetchall()]
-        
-        conn.close()
-        return propietarios
+        try:
+            cursor.execute(f'''
+                SELECT p.*,
+                       (SELECT COUNT(*) FROM vehiculos v WHERE v.propietario_id = p.id) as total_vehiculos
+                       {relevancia}
+                FROM propietarios p
+                {busqueda}
+                {where}
+                {orden}
+            ''', params)
+
+            columns = [description[0] for description in cursor.description]
+            propietarios = filas_a_dict(columns, cursor.fetchall())
+
+            return propietarios
+        finally:
+            conn.close()
     
+    @cacheado('propietario:{propietario_id}')
     def get_propietario_by_id(self, propietario_id: int) -> Optional[Dict]:
         """Obtiene un propietario por ID"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute("SELECT * FROM propietarios WHERE id = ?", (propietario_id,))
-        row = cursor.fetchone()
-        
-        if row:
-            columns = [description[0] for description in cursor.description]
-            propietario = dict(zip(columns, row))
+        try:
+            cursor.execute("SELECT * FROM propietarios WHERE id = ?", (propietario_id,))
+            row = cursor.fetchone()
+
+            if row:
+                columns = [description[0] for description in cursor.description]
+                propietario = filas_a_dict(columns, [row])[0]
+                return propietario
+
+            return None
+        finally:
             conn.close()
-            return propietario
+    
+    def get_propietario_by_rut(self, rut: str) -> Optional[Dict]:
+        """Obtiene un propietario por RUT, escrito con o sin puntos (usa el índice único de rut)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
         
-        conn.close()
-        return None
+        try:
+            cursor.execute("SELECT * FROM propietarios WHERE rut = ?", (normalizar_rut(rut),))
+            row = cursor.fetchone()
+
+            if row:
+                columns = [description[0] for description in cursor.description]
+                return filas_a_dict(columns, [row])[0]
+
+            return None
+        finally:
+            conn.close()
     
     def update_propietario(self, propietario_id: int, nombre: str, apellido: str, rut: str, tipo_personal: str = None, telefono: str = None, email: str = None) -> bool:
         """Actualiza un propietario"""
@@ -292,9 +842,13 @@ class DatabaseManager:
                 UPDATE propietarios 
                 SET nombre = ?, apellido = ?, rut = ?, tipo_personal = ?, telefono = ?, email = ?
                 WHERE id = ?
-            ''', (nombre, apellido, rut, tipo_personal, telefono, email, propietario_id))
+            ''', (nombre, apellido, normalizar_rut(rut), tipo_personal, telefono, email, propietario_id))
             
             conn.commit()
+            # El nombre aparece también en los listados de vehículos
+            self._invalidar('propietarios', f'propietario:{propietario_id}',
+                            f'propietario_info:{propietario_id}', 'vehiculos',
+                            f'vehiculos_de:{propietario_id}', 'conteo_mantenimientos', 'analitica')
             return cursor.rowcount > 0
         except sqlite3.IntegrityError:
             raise ValueError("Ya existe un propietario con ese RUT")
@@ -322,6 +876,9 @@ class DatabaseManager:
             cursor.execute("DELETE FROM propietarios WHERE id = ?", (propietario_id,))
             
             conn.commit()
+            self._invalidar('propietarios', f'propietario:{propietario_id}',
+                            f'propietario_info:{propietario_id}', 'vehiculos',
+                            f'vehiculos_de:{propietario_id}', 'conteo_mantenimientos', 'analitica')
             return cursor.rowcount > 0
         finally:
             conn.close()
@@ -341,54 +898,68 @@ class DatabaseManager:
             
             vehiculo_id = cursor.lastrowid
             conn.commit()
+            # total_vehiculos del propietario cambia
+            self._invalidar('vehiculos', 'propietarios', f'vehiculos_de:{propietario_id}')
             return vehiculo_id
         except sqlite3.IntegrityError:
             raise ValueError("Ya existe un vehículo con esa patente")
         finally:
             conn.close()
     
+    @cacheado('vehiculos_de:{propietario_id}', 'propietario:{propietario_id}', 'conteo_mantenimientos')
     def get_vehiculos_by_propietario(self, propietario_id: int) -> List[Dict]:
         """Obtiene todos los vehículos de un propietario"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('''
-            SELECT v.*, p.nombre || ' ' || p.apellido as propietario_nombre,
-                   COUNT(m.id) as total_mantenimientos
-            FROM vehiculos v
-            JOIN propietarios p ON v.propietario_id = p.id
-            LEFT JOIN mantenimientos m ON v.id = m.vehiculo_id
-            WHERE v.propietario_id = ?
-            GROUP BY v.id
-            ORDER BY v.marca, v.modelo
-        ''', (propietario_id,))
-        
-        columns = [description[0] for description in cursor.description]
-        vehiculos = [dict(zip(columns, row)) for row in cursor.fetchall()]
-        
-        conn.close()
-        return vehiculos
+        try:
+            cursor.execute('''
+                SELECT v.*, p.nombre || ' ' || p.apellido as propietario_nombre,
+                       COUNT(m.id) as total_mantenimientos
+                FROM vehiculos v
+                JOIN propietarios p ON v.propietario_id = p.id
+                LEFT JOIN mantenimientos m ON v.id = m.vehiculo_id
+                WHERE v.propietario_id = ?
+                GROUP BY v.id
+                ORDER BY v.marca, v.modelo
+            ''', (propietario_id,))
+
+            columns = [description[0] for description in cursor.description]
+            vehiculos = filas_a_dict(columns, cursor.fetchall())
+
+            return vehiculos
+        finally:
+            conn.close()
     
-    def get_all_vehiculos(self) -> List[Dict]:
-        """Obtiene todos los vehículos"""
+    @cacheado('vehiculos', 'conteo_mantenimientos')
+    def get_all_vehiculos(self, limit: int = None, after: str = None, q: str = None) -> List[Dict]:
+        """Obtiene todos los vehículos (o una página si se indica limit/after).
+
+        Con q devuelve solo los que coinciden por marca, modelo o patente.
+        """
+        relevancia, busqueda, where, orden, params = self._listado('vehiculos', 'v.id', limit, after, q)
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('''
-            SELECT v.*, p.nombre || ' ' || p.apellido as propietario_nombre,
-                   COUNT(m.id) as total_mantenimientos
-            FROM vehiculos v
-            JOIN propietarios p ON v.propietario_id = p.id
-            LEFT JOIN mantenimientos m ON v.id = m.vehiculo_id
-            GROUP BY v.id
-            ORDER BY p.nombre, v.marca, v.modelo
-        ''')
-        
-        columns = [description[0] for description in cursor.description]
-        vehiculos = [dict(zip(columns, row)) for row in cursor.fetchall()]
-        
-        conn.close()
-        return vehiculos
+        try:
+            # propietario_nombre es parte de la clave de paginación
+            cursor.execute(f'''
+                SELECT v.*, p.nombre || ' ' || p.apellido as propietario_nombre,
+                       (SELECT COUNT(*) FROM mantenimientos m WHERE m.vehiculo_id = v.id) as total_mantenimientos
+                       {relevancia}
+                FROM vehiculos v
+                {busqueda}
+                JOIN propietarios p ON v.propietario_id = p.id
+                {where}
+                {orden}
+            ''', params)
+
+            columns = [description[0] for description in cursor.description]
+            vehiculos = filas_a_dict(columns, cursor.fetchall())
+
+            return vehiculos
+        finally:
+            conn.close()
     
     def update_vehiculo(self, vehiculo_id: int, marca: str, modelo: str, año: int = None,
                        color: str = None, kilometraje: int = 0, patente: str = None) -> bool:
@@ -402,28 +973,58 @@ class DatabaseManager:
                 SET marca = ?, modelo = ?, año = ?, color = ?, kilometraje = ?, patente = ?
                 WHERE id = ?
             ''', (marca, modelo, año, color, kilometraje, patente, vehiculo_id))
+            actualizado = cursor.rowcount > 0
             
+            cursor.execute("SELECT propietario_id FROM vehiculos WHERE id = ?", (vehiculo_id,))
+            row = cursor.fetchone()
             conn.commit()
-            return cursor.rowcount > 0
+            self._invalidar('vehiculos', 'analitica', *([f'vehiculos_de:{row[0]}'] if row else []))
+            return actualizado
         except sqlite3.IntegrityError:
             raise ValueError("Ya existe un vehículo con esa patente")
         finally:
             conn.close()
     
+    def actualizar_kilometraje(self, vehiculo_id: int, kilometraje: int) -> bool:
+        """Sube el kilometraje de un vehículo; nunca lo reduce"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('''
+                UPDATE vehiculos SET kilometraje = ?
+                WHERE id = ? AND COALESCE(kilometraje, 0) <= ?
+            ''', (kilometraje, vehiculo_id, kilometraje))
+            actualizado = cursor.rowcount > 0
+            
+            cursor.execute("SELECT propietario_id FROM vehiculos WHERE id = ?", (vehiculo_id,))
+            row = cursor.fetchone()
+            conn.commit()
+            self._invalidar('vehiculos', *([f'vehiculos_de:{row[0]}'] if row else []))
+            return actualizado
+        finally:
+            conn.close()
+    
     def delete_vehiculo(self, vehiculo_id: int) -> bool:
         """Elimina un vehículo y todos sus mantenimientos"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
         try:
+            cursor.execute("SELECT propietario_id FROM vehiculos WHERE id = ?", (vehiculo_id,))
+            row = cursor.fetchone()
+            
             # Eliminar mantenimientos del vehículo
             cursor.execute("DELETE FROM mantenimientos WHERE vehiculo_id = ?", (vehiculo_id,))
             
             # Eliminar el vehículo
             cursor.execute("DELETE FROM vehiculos WHERE id = ?", (vehiculo_id,))
+            eliminado = cursor.rowcount > 0
             
             conn.commit()
-            return cursor.rowcount > 0
+            self._invalidar('vehiculos', 'propietarios', 'analitica',
+                            *([f'vehiculos_de:{row[0]}'] if row else []))
+            return eliminado
         finally:
             conn.close()
     
@@ -448,57 +1049,112 @@ class DatabaseManager:
             # Ya no se actualiza el kilometraje del vehículo desde mantenimiento personalizado
             
             conn.commit()
+            # Los listados de vehículos incluyen total_mantenimientos
+            self._invalidar('conteo_mantenimientos', 'analitica')
             return mantenimiento_id
         finally:
             conn.close()
     
+    def create_mantenimiento_con_kilometraje(self, vehiculo_id: int, fecha_mantenimiento: str,
+                                            tipo_mantenimiento: str, kilometraje_actual: int,
+                                            descripcion: str = None, costo: float = None,
+                                            taller: str = None) -> int:
+        """Registra un mantenimiento y sube el odómetro del vehículo en una sola transacción.
+
+        El kilometraje anterior es el leído dentro de la transacción; se guarda
+        junto con el actual (el plan preventivo usa kilometraje_actual) y con
+        los kilómetros recorridos. Lanza ValueError si el vehículo no existe o si el
+        kilometraje es menor al registrado.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            # BEGIN IMMEDIATE: nadie mueve el odómetro entre leerlo y escribirlo
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("SELECT COALESCE(kilometraje, 0), propietario_id FROM vehiculos WHERE id = ?",
+                           (vehiculo_id,))
+            row = cursor.fetchone()
+            if row is None:
+                raise ValueError(f"Vehículo no encontrado: {vehiculo_id}")
+            kilometraje_anterior, propietario_id = row
+            if kilometraje_actual < kilometraje_anterior:
+                raise ValueError("El kilometraje actual no puede ser menor al registrado anteriormente")
+            
+            cursor.execute('''
+                INSERT INTO mantenimientos (vehiculo_id, fecha_mantenimiento, tipo_mantenimiento,
+                                          kilometraje_anterior, kilometraje_actual,
+                                          kilometros_recorridos, descripcion, costo, taller)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (vehiculo_id, fecha_mantenimiento, tipo_mantenimiento,
+                  kilometraje_anterior, kilometraje_actual,
+                  kilometraje_actual - kilometraje_anterior, descripcion, costo, taller))
+            mantenimiento_id = cursor.lastrowid
+            cursor.execute("UPDATE vehiculos SET kilometraje = ? WHERE id = ?",
+                           (kilometraje_actual, vehiculo_id))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        self._invalidar('conteo_mantenimientos', 'analitica', 'vehiculos',
+                        f'vehiculos_de:{propietario_id}')
+        return mantenimiento_id
+    
     def get_mantenimiento_by_id(self, mantenimiento_id: int) -> Optional[Dict]:
         """Obtiene un mantenimiento por ID"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('''
-            SELECT m.*, v.marca || ' ' || v.modelo as vehiculo_info,
-                   p.nombre || ' ' || p.apellido as propietario_nombre
-            FROM mantenimientos m
-            JOIN vehiculos v ON m.vehiculo_id = v.id
-            JOIN propietarios p ON v.propietario_id = p.id
-            WHERE m.id = ?
-        ''', (mantenimiento_id,))
-        
-        row = cursor.fetchone()
-        
-        if row:
-            columns = [description[0] for description in cursor.description]
-            mantenimiento = dict(zip(columns, row))
+        try:
+            cursor.execute('''
+                SELECT m.*, v.marca || ' ' || v.modelo as vehiculo_info,
+                       p.nombre || ' ' || p.apellido as propietario_nombre
+                FROM mantenimientos m
+                JOIN vehiculos v ON m.vehiculo_id = v.id
+                JOIN propietarios p ON v.propietario_id = p.id
+                WHERE m.id = ?
+            ''', (mantenimiento_id,))
+
+            row = cursor.fetchone()
+
+            if row:
+                columns = [description[0] for description in cursor.description]
+                mantenimiento = filas_a_dict(columns, [row])[0]
+                return mantenimiento
+
+            return None
+        finally:
             conn.close()
-            return mantenimiento
-        
-        conn.close()
-        return None
     
     def get_mantenimientos_by_vehiculo(self, vehiculo_id: int) -> List[Dict]:
         """Obtiene todos los mantenimientos de un vehículo"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('''
-            SELECT m.*, v.marca || ' ' || v.modelo as vehiculo_info
-            FROM mantenimientos m
-            JOIN vehiculos v ON m.vehiculo_id = v.id
-            WHERE m.vehiculo_id = ?
-            ORDER BY m.fecha_mantenimiento DESC
-        ''', (vehiculo_id,))
-        
-        columns = [description[0] for description in cursor.description]
-        mantenimientos = [dict(zip(columns, row)) for row in cursor.fetchall()]
-        
-        conn.close()
-        return mantenimientos
+        try:
+            cursor.execute('''
+                SELECT m.*, v.marca || ' ' || v.modelo as vehiculo_info
+                FROM mantenimientos m
+                JOIN vehiculos v ON m.vehiculo_id = v.id
+                WHERE m.vehiculo_id = ?
+                ORDER BY m.fecha_mantenimiento DESC
+            ''', (vehiculo_id,))
+
+            columns = [description[0] for description in cursor.description]
+            mantenimientos = filas_a_dict(columns, cursor.fetchall())
+
+            return mantenimientos
+        finally:
+            conn.close()
+
     # CRUD para Tickets de Rendición
     def create_ticket(self, fecha: str, sistema: str, referencia_id: int = None, descripcion: str = None) -> int:
         conn = self.get_connection()
         cursor = conn.cursor()
+        
         try:
             cursor.execute('''
                 INSERT INTO tickets (fecha, sistema, referencia_id, descripcion)
@@ -510,36 +1166,68 @@ class DatabaseManager:
         finally:
             conn.close()
 
-    def get_all_tickets(self) -> List[Dict]:
+    def get_all_tickets(self, limit: int = None, after: str = None,
+                        filtros: Dict[str, str] = None) -> List[Dict]:
+        _relevancia, _busqueda, where, orden, params = self._listado('tickets', limit=limit, after=after,
+                                                                     filtros=filtros)
         conn = self.get_connection()
         cursor = conn.cursor()
-        cursor.execute('''
-            SELECT * FROM tickets ORDER BY fecha DESC, id DESC
-        ''')
-        columns = [d[0] for d in cursor.description]
-        rows = cursor.fetchall()
-        conn.close()
-        return [dict(zip(columns, r)) for r in rows]
+        
+        try:
+            cursor.execute(f'''
+                SELECT * FROM tickets {where} {orden}
+            ''', params)
+            columns = [d[0] for d in cursor.description]
+            rows = cursor.fetchall()
+            return filas_a_dict(columns, rows)
+        finally:
+            conn.close()
     
-    def get_all_mantenimientos(self) -> List[Dict]:
-        """Obtiene todos los mantenimientos"""
+    def get_all_mantenimientos(self, limit: int = None, after: str = None, q: str = None,
+                               filtros: Dict[str, str] = None) -> List[Dict]:
+        """Obtiene todos los mantenimientos (o una página si se indica limit/after).
+
+        Con q devuelve solo los que coinciden por tipo, descripción o taller;
+        filtros admite los campos de FILTROS_LISTADOS['mantenimientos'].
+        """
+        relevancia, busqueda, where, orden, params = self._listado('mantenimientos', 'm.id', limit, after,
+                                                                   q, filtros)
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('''
+        try:
+            cursor.execute(f'''
+                SELECT m.*, v.marca || ' ' || v.modelo as vehiculo_info,
+                       p.nombre || ' ' || p.apellido as propietario_nombre
+                       {relevancia}
+                FROM mantenimientos m
+                {busqueda}
+                JOIN vehiculos v ON m.vehiculo_id = v.id
+                JOIN propietarios p ON v.propietario_id = p.id
+                {where}
+                {orden}
+            ''', params)
+
+            columns = [description[0] for description in cursor.description]
+            mantenimientos = filas_a_dict(columns, cursor.fetchall())
+
+            return mantenimientos
+        finally:
+            conn.close()
+    
+    def iter_all_mantenimientos(self, batch_size: int = 1000,
+                                filtros: Dict[str, str] = None) -> Iterator[Dict]:
+        """Recorre todos los mantenimientos sin cargarlos completos en memoria"""
+        _relevancia, _busqueda, where, orden, params = self._listado('mantenimientos', filtros=filtros)
+        return self._iterar_consulta(f'''
             SELECT m.*, v.marca || ' ' || v.modelo as vehiculo_info,
                    p.nombre || ' ' || p.apellido as propietario_nombre
             FROM mantenimientos m
             JOIN vehiculos v ON m.vehiculo_id = v.id
             JOIN propietarios p ON v.propietario_id = p.id
-            ORDER BY m.fecha_mantenimiento DESC
-        ''')
-        
-        columns = [description[0] for description in cursor.description]
-        mantenimientos = [dict(zip(columns, row)) for row in cursor.fetchall()]
-        
-        conn.close()
-        return mantenimientos
+            {where}
+            {orden}
+        ''', params, batch_size=batch_size)
     
     def update_mantenimiento(self, mantenimiento_id: int, vehiculo_id: int, fecha_mantenimiento: str,
                            tipo_mantenimiento: str, kilometros_recorridos: int,
@@ -561,6 +1249,7 @@ class DatabaseManager:
             # Ya no se actualiza el kilometraje del vehículo desde mantenimiento personalizado
             
             conn.commit()
+            self._invalidar('conteo_mantenimientos', 'analitica')
             return cursor.rowcount > 0
         finally:
             conn.close()
@@ -573,6 +1262,7 @@ class DatabaseManager:
         try:
             cursor.execute("DELETE FROM mantenimientos WHERE id = ?", (mantenimiento_id,))
             conn.commit()
+            self._invalidar('conteo_mantenimientos', 'analitica')
             return cursor.rowcount > 0
         finally:
             conn.close()
@@ -604,102 +1294,416 @@ class DatabaseManager:
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('''
-            SELECT v.*, ve.marca || ' ' || ve.modelo as vehiculo_info,
-                   p.nombre || ' ' || p.apellido as propietario_nombre
-            FROM viajes v
-            JOIN vehiculos ve ON v.vehiculo_id = ve.id
-            JOIN propietarios p ON v.propietario_id = p.id
-            WHERE v.vehiculo_id = ?
-            ORDER BY v.fecha_salida DESC
-        ''', (vehiculo_id,))
-        
-        columns = [description[0] for description in cursor.description]
-        viajes = [dict(zip(columns, row)) for row in cursor.fetchall()]
-        
-        conn.close()
-        return viajes
+        try:
+            cursor.execute('''
+                SELECT v.*, ve.marca || ' ' || ve.modelo as vehiculo_info,
+                       p.nombre || ' ' || p.apellido as propietario_nombre
+                FROM viajes v
+                JOIN vehiculos ve ON v.vehiculo_id = ve.id
+                JOIN propietarios p ON v.propietario_id = p.id
+                WHERE v.vehiculo_id = ?
+                ORDER BY v.fecha_salida DESC
+            ''', (vehiculo_id,))
+
+            columns = [description[0] for description in cursor.description]
+            viajes = filas_a_dict(columns, cursor.fetchall())
+
+            return viajes
+        finally:
+            conn.close()
     
-    def get_all_viajes(self) -> List[Dict]:
-        """Obtiene todos los viajes"""
+    def get_all_viajes(self, limit: int = None, after: str = None,
+                       filtros: Dict[str, str] = None) -> List[Dict]:
+        """Obtiene todos los viajes (o una página si se indica limit/after).
+
+        filtros admite los campos de FILTROS_LISTADOS['viajes'].
+        """
+        _relevancia, _busqueda, where, orden, params = self._listado('viajes', limit=limit, after=after,
+                                                                     filtros=filtros)
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('''
+        try:
+            cursor.execute(f'''
+                SELECT v.*, ve.marca || ' ' || ve.modelo as vehiculo_info,
+                       p.nombre || ' ' || p.apellido as propietario_nombre
+                FROM viajes v
+                JOIN vehiculos ve ON v.vehiculo_id = ve.id
+                JOIN propietarios p ON v.propietario_id = p.id
+                {where}
+                {orden}
+            ''', params)
+
+            columns = [description[0] for description in cursor.description]
+            viajes = filas_a_dict(columns, cursor.fetchall())
+
+            return viajes
+        finally:
+            conn.close()
+    
+    def iter_all_viajes(self, batch_size: int = 1000,
+                        filtros: Dict[str, str] = None) -> Iterator[Dict]:
+        """Recorre todos los viajes sin cargarlos completos en memoria"""
+        _relevancia, _busqueda, where, orden, params = self._listado('viajes', filtros=filtros)
+        return self._iterar_consulta(f'''
             SELECT v.*, ve.marca || ' ' || ve.modelo as vehiculo_info,
                    p.nombre || ' ' || p.apellido as propietario_nombre
             FROM viajes v
             JOIN vehiculos ve ON v.vehiculo_id = ve.id
             JOIN propietarios p ON v.propietario_id = p.id
-            ORDER BY v.fecha_salida DESC
-        ''')
-        
-        columns = [description[0] for description in cursor.description]
-        viajes = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            {where}
+            {orden}
+        ''', params, batch_size=batch_size)
+    
+    def get_resumen_viajes(self, filtros: Dict[str, str] = None) -> Dict:
+        """Totales de los viajes que cumplen los filtros (los mismos de get_all_viajes)"""
+        condiciones, params = compilar_filtros('viajes', filtros or {})
+        where = 'WHERE ' + ' AND '.join(condiciones) if condiciones else ''
+        conn = self.get_connection()
+        cursor = conn.cursor()
         
-        conn.close()
-        return viajes
+        try:
+            cursor.execute(f'''
+                SELECT COUNT(*) AS total_viajes,
+                       COALESCE(SUM(v.estado = 'En curso'), 0) AS viajes_en_curso,
+                       COALESCE(SUM(v.estado = 'Completado'), 0) AS viajes_completados,
+                       COALESCE(SUM(v.kilometraje_llegada - v.kilometraje_salida), 0) AS total_kilometros
+                FROM viajes v
+                {where}
+            ''', params)
+            
+            columns = [description[0] for description in cursor.description]
+            return filas_a_dict(columns, [cursor.fetchone()])[0]
+        finally:
+            conn.close()
     
     def update_viaje(self, viaje_id: int, fecha_llegada: str = None, 
                     kilometraje_llegada: int = None, combustible_final: float = None,
                     combustible_consumido: float = None, costo_combustible: float = None,
                     observaciones: str = None, estado: str = None, tipo_personal: str = None) -> bool:
-        """Actualiza un viaje"""
+        """Actualiza un viaje.
+
+        Con kilometraje_llegada, el odómetro del vehículo (kilometraje y
+        ultimo_viaje_id) avanza en la misma transacción. El odómetro nunca
+        retrocede.
+        """
+        campos = dict(fecha_llegada=fecha_llegada, kilometraje_llegada=kilometraje_llegada,
+                      combustible_final=combustible_final, combustible_consumido=combustible_consumido,
+                      costo_combustible=costo_combustible, observaciones=observaciones,
+                      estado=estado, tipo_personal=tipo_personal)
+        if self.cola is not None:
+            # Con la cola activa, las actualizaciones de viajes se serializan en su escritor
+            # (altas, bajas y crear_lote('viajes') confirman por su cuenta)
+            return self.cola.ejecutar(self._actualizar_viaje, viaje_id, campos) is not None
+
         conn = self.get_connection()
         cursor = conn.cursor()
         
         try:
-            # Construir la consulta dinámicamente
-            updates = []
-            params = []
-            
-            if fecha_llegada:
-                updates.append("fecha_llegada = ?")
-                params.append(fecha_llegada)
-            if kilometraje_llegada:
-                updates.append("kilometraje_llegada = ?")
-                params.append(kilometraje_llegada)
-            if combustible_final is not None:
-                updates.append("combustible_final = ?")
-                params.append(combustible_final)
-            if combustible_consumido is not None:
-                updates.append("combustible_consumido = ?")
-                params.append(combustible_consumido)
-            if costo_combustible is not None:
-                updates.append("costo_combustible = ?")
-                params.append(costo_combustible)
-            if observaciones:
-                updates.append("observaciones = ?")
-                params.append(observaciones)
-            if estado:
-                updates.append("estado = ?")
-                params.append(estado)
-            if tipo_personal:
-                updates.append("tipo_personal = ?")
-                params.append(tipo_personal)
-            
-            if updates:
-                params.append(viaje_id)
-                query = f"UPDATE viajes SET {', '.join(updates)} WHERE id = ?"
-                cursor.execute(query, params)
-                conn.commit()
-                return cursor.rowcount > 0
-            
-            return False
+            # BEGIN IMMEDIATE: entre validar el odómetro y escribirlo nadie más
+            # cierra un viaje del mismo vehículo
+            cursor.execute("BEGIN IMMEDIATE")
+            resultado = self._actualizar_viaje(cursor, viaje_id, campos)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
         finally:
             conn.close()
+
+        if resultado is None:
+            return False
+        self._invalidar_viajes([resultado])
+        return True
+
+    def encolar_update_viaje(self, viaje_id: int, **campos) -> Operacion:
+        """Encola la actualización de un viaje sin esperar el COMMIT (requiere la cola)"""
+        if self.cola is None:
+            raise RuntimeError("La cola de escritura no está activa")
+        return self.cola.encolar(self._actualizar_viaje_encolado, viaje_id, campos)
+
+    def _actualizar_viaje_encolado(self, cursor: sqlite3.Cursor, viaje_id: int, campos: Dict) -> Dict:
+        # Sin respuesta HTTP que devolver, "no encontrado" queda como error de la operación
+        resultado = self._actualizar_viaje(cursor, viaje_id, campos)
+        if resultado is None:
+            raise LookupError(f"Viaje no encontrado o sin campos que actualizar: {viaje_id}")
+        return resultado
+
+    def _actualizar_viaje(self, cursor: sqlite3.Cursor, viaje_id: int, campos: Dict) -> Optional[Dict]:
+        """Aplica la actualización dentro de la transacción del llamador.
+
+        Devuelve None si el viaje no existe o no hay campos que actualizar.
+        """
+        kilometraje_llegada = campos.get('kilometraje_llegada')
+        # Construir la consulta dinámicamente
+        updates = []
+        params = []
+        
+        if campos.get('fecha_llegada'):
+            updates.append("fecha_llegada = ?")
+            params.append(campos['fecha_llegada'])
+        if kilometraje_llegada:
+            kilometraje_llegada = int(kilometraje_llegada)
+            updates.append("kilometraje_llegada = ?")
+            params.append(kilometraje_llegada)
+        for campo in ('combustible_final', 'combustible_consumido', 'costo_combustible'):
+            if campos.get(campo) is not None:
+                updates.append(f"{campo} = ?")
+                params.append(campos[campo])
+        for campo in ('observaciones', 'estado', 'tipo_personal'):
+            if campos.get(campo):
+                updates.append(f"{campo} = ?")
+                params.append(campos[campo])
+        
+        if not updates:
+            return None
+
+        cursor.execute('''
+            SELECT vi.vehiculo_id, vi.kilometraje_salida, ve.kilometraje, ve.ultimo_viaje_id,
+                   ve.propietario_id
+            FROM viajes vi
+            LEFT JOIN vehiculos ve ON ve.id = vi.vehiculo_id
+            WHERE vi.id = ?
+        ''', (viaje_id,))
+        viaje = cursor.fetchone()
+        if viaje is None:
+            return None
+        vehiculo_id, kilometraje_salida, odometro, ultimo_viaje_id, propietario_id = viaje
+
+        if kilometraje_llegada:
+            if kilometraje_llegada < kilometraje_salida:
+                raise ValueError(f"El kilometraje de llegada ({kilometraje_llegada:,}) no puede ser "
+                                 f"menor al de salida ({kilometraje_salida:,})")
+            # Corregir a la baja el viaje que fijó el odómetro lo haría retroceder
+            if ultimo_viaje_id == viaje_id and kilometraje_llegada < (odometro or 0):
+                raise ValueError(f"El kilometraje de llegada no puede ser menor al odómetro "
+                                 f"actual del vehículo ({odometro:,} km)")
+
+        params.append(viaje_id)
+        cursor.execute(f"UPDATE viajes SET {', '.join(updates)} WHERE id = ?", params)
+
+        avanzo = False
+        if kilometraje_llegada:
+            cursor.execute('''
+                UPDATE vehiculos SET kilometraje = ?, ultimo_viaje_id = ?
+                WHERE id = ? AND COALESCE(kilometraje, 0) <= ?
+            ''', (kilometraje_llegada, viaje_id, vehiculo_id, kilometraje_llegada))
+            avanzo = cursor.rowcount > 0
+        return {'viaje_id': viaje_id, 'vehiculo_id': vehiculo_id,
+                'propietario_id': propietario_id, 'odometro_avanzo': avanzo}
+
+    def _invalidar_viajes(self, resultados: List[Dict]):
+        """Invalida la caché tras confirmar actualizaciones de viajes"""
+        # Cerrar un viaje suma su aporte al resumen de flota (trigger)
+        etiquetas = {'analitica'}
+        for resultado in resultados:
+            if resultado and resultado['odometro_avanzo']:
+                etiquetas.update(('vehiculos', f"vehiculos_de:{resultado['propietario_id']}"))
+        self._invalidar(*etiquetas)
     
     def delete_viaje(self, viaje_id: int) -> bool:
-        """Elimina un viaje"""
+        """Elimina un viaje.
+
+        El odómetro del vehículo se conserva; si el viaje era el último, el
+        puntero pasa al viaje cerrado con mayor kilometraje de llegada.
+        """
         conn = self.get_connection()
         cursor = conn.cursor()
         
         try:
+            cursor.execute("BEGIN IMMEDIATE")
             cursor.execute("DELETE FROM viajes WHERE id = ?", (viaje_id,))
+            eliminado = cursor.rowcount > 0
+            cursor.execute('''
+                UPDATE vehiculos SET ultimo_viaje_id = (
+                    SELECT vi.id FROM viajes vi
+                    WHERE vi.vehiculo_id = vehiculos.id AND vi.kilometraje_llegada IS NOT NULL
+                    ORDER BY vi.kilometraje_llegada DESC, vi.id DESC LIMIT 1)
+                WHERE ultimo_viaje_id = ?
+            ''', (viaje_id,))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        self._invalidar('analitica')
+        return eliminado
+
+    def get_odometro(self, vehiculo_id: int) -> Optional[Dict]:
+        """Kilometraje vigente del vehículo y su último viaje cerrado (una sola fila)"""
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT ve.id AS vehiculo_id, ve.kilometraje, ve.ultimo_viaje_id,
+                       vi.fecha_llegada AS fecha_ultimo_viaje, vi.destino AS destino_ultimo_viaje
+                FROM vehiculos ve
+                LEFT JOIN viajes vi ON vi.id = ve.ultimo_viaje_id
+                WHERE ve.id = ?
+            ''', (vehiculo_id,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            return filas_a_dict([description[0] for description in cursor.description], [row])[0]
+        finally:
+            conn.close()
+
+    # Analítica de flota (se lee de resumen_flota_mensual, ver analitica.py)
+    @cacheado('analitica')
+    def get_analitica_vehiculos(self, desde: str = None, hasta: str = None) -> List[Dict]:
+        """Km, L/100 km y costo por km de cada vehículo entre los meses desde y hasta (AAAA-MM)"""
+        conn = self.get_connection()
+        try:
+            return analitica.indicadores_por_vehiculo(conn.cursor(), desde, hasta)
+        finally:
+            conn.close()
+
+    @cacheado('analitica')
+    def get_analitica_mensual(self, vehiculo_id: int = None, desde: str = None,
+                              hasta: str = None) -> List[Dict]:
+        """Serie mensual de un vehículo, o de toda la flota si vehiculo_id es None"""
+        conn = self.get_connection()
+        try:
+            return analitica.serie_mensual(conn.cursor(), vehiculo_id, desde, hasta)
+        finally:
+            conn.close()
+
+    # Mantenimiento preventivo (plan mantenido por triggers, ver preventivo.py).
+    # Sin caché: el resultado depende de la fecha del día.
+    def get_mantenimientos_pendientes(self, dias: int = 30, km: int = 1000,
+                                      limit: int = None) -> List[Dict]:
+        """Servicios vencidos o que vencen dentro de dias o km, del más urgente al menos"""
+        conn = self.get_connection()
+        try:
+            return preventivo.pendientes(conn.cursor(), dias, km, limit=limit)
+        finally:
+            conn.close()
+
+    def get_reglas_mantenimiento(self) -> List[Dict]:
+        """Reglas de mantenimiento preventivo por tipo"""
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT tipo_mantenimiento, cada_km, cada_meses
+                FROM reglas_mantenimiento ORDER BY tipo_mantenimiento
+            ''')
+            columns = [description[0] for description in cursor.description]
+            return filas_a_dict(columns, cursor.fetchall())
+        finally:
+            conn.close()
+
+    def update_regla_mantenimiento(self, tipo_mantenimiento: str, cada_km: int = None,
+                                   cada_meses: int = None) -> bool:
+        """Crea o reemplaza la regla de un tipo; devuelve True si la regla es nueva"""
+        tipo_mantenimiento = (tipo_mantenimiento or '').strip()
+        if not tipo_mantenimiento:
+            raise ValueError("El tipo de mantenimiento es obligatorio")
+        cada_km, cada_meses = preventivo.validar_regla(cada_km, cada_meses)
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            # UPDATE y luego INSERT (no INSERT OR REPLACE): así corre el trigger de
+            # actualización y el plan del tipo se recalcula una sola vez
+            cursor.execute('''
+                UPDATE reglas_mantenimiento SET cada_km = ?, cada_meses = ?
+                WHERE tipo_mantenimiento = ?
+            ''', (cada_km, cada_meses, tipo_mantenimiento))
+            nueva = cursor.rowcount == 0
+            if nueva:
+                cursor.execute('''
+                    INSERT INTO reglas_mantenimiento (tipo_mantenimiento, cada_km, cada_meses)
+                    VALUES (?, ?, ?)
+                ''', (tipo_mantenimiento, cada_km, cada_meses))
+            conn.commit()
+            return nueva
+        finally:
+            conn.close()
+
+    def delete_regla_mantenimiento(self, tipo_mantenimiento: str) -> bool:
+        """Elimina una regla y sus filas del plan"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute("DELETE FROM reglas_mantenimiento WHERE tipo_mantenimiento = ?",
+                           (tipo_mantenimiento,))
             conn.commit()
             return cursor.rowcount > 0
         finally:
             conn.close()
+
+    # Búsqueda de texto
+    def buscar(self, q: str, limit: int = 10) -> Dict[str, List[Dict]]:
+        """Primera página de resultados de q en cada colección, por relevancia"""
+        listados = {
+            'propietarios': self.get_propietarios,
+            'vehiculos': self.get_all_vehiculos,
+            'mantenimientos': self.get_all_mantenimientos,
+        }
+        return {coleccion: listados[coleccion](limit=limit, q=q) for coleccion in INDICES_BUSQUEDA}
+
+    # Versiones de tablas (para ETag / Last-Modified)
+    def get_versiones_tablas(self, tablas: List[str]) -> Dict[str, tuple]:
+        """Devuelve {tabla: (version, modificado)} según los contadores de cambios"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            marcadores = ', '.join('?' for _ in tablas)
+            cursor.execute(f'''
+                SELECT tabla, version, modificado FROM versiones_tablas
+                WHERE tabla IN ({marcadores})
+            ''', list(tablas))
+            return {tabla: (version, modificado) for tabla, version, modificado in cursor.fetchall()}
+        finally:
+            conn.close()
+
+    # Estadísticas generales
+    def get_estadisticas_generales(self) -> Dict:
+        """Obtiene los contadores del dashboard desde las tablas de resumen"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('''
+                SELECT (SELECT valor FROM resumen_contadores WHERE clave = 'propietarios') AS total_propietarios,
+                       (SELECT valor FROM resumen_contadores WHERE clave = 'vehiculos') AS total_vehiculos,
+                       (SELECT valor FROM resumen_contadores WHERE clave = 'mantenimientos') AS total_mantenimientos,
+                       COALESCE((SELECT marca FROM resumen_vehiculos_marca
+                                 ORDER BY cantidad DESC, marca LIMIT 1), 'N/A') AS marca_mas_comun,
+                       COALESCE((SELECT cantidad FROM resumen_vehiculos_marca
+                                 ORDER BY cantidad DESC, marca LIMIT 1), 0) AS vehiculos_por_marca,
+                       (SELECT valor FROM resumen_contadores WHERE clave = 'costo_mantenimientos') AS costo_total_mantenimientos
+            ''')
+            
+            columns = [description[0] for description in cursor.description]
+            return filas_a_dict(columns, [cursor.fetchone()])[0]
+        finally:
+            conn.close()
+    
+    def verificar_resumenes(self, reparar: bool = False) -> Dict[str, int]:
+        """Compara las tablas de resumen con las tablas base.
+
+        Devuelve las filas distintas por tabla de resumen; con reparar=True
+        las reconstruye si hay diferencias.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            # Lectura y reparación sobre la misma foto de la base
+            cursor.execute("BEGIN IMMEDIATE")
+            diferencias = verificar_resumenes(cursor)
+            if reparar and any(diferencias.values()):
+                reconstruir_resumenes(cursor)
+            conn.commit()
+            return diferencias
+        finally:
+            conn.close()
     
     # CRUD para Presupuesto
     def create_movimiento_presupuesto(self, tipo_movimiento: str, categoria: str, 
@@ -723,74 +1727,71 @@ class DatabaseManager:
         finally:
             conn.close()
     
-    def get_movimientos_presupuesto(self, tipo_movimiento: str = None) -> List[Dict]:
-        """Obtiene movimientos de presupuesto"""
+    def get_movimientos_presupuesto(self, tipo_movimiento: str = None,
+                                    limit: int = None, after: str = None,
+                                    filtros: Dict[str, str] = None) -> List[Dict]:
+        """Obtiene movimientos de presupuesto (o una página si se indica limit/after).
+
+        filtros admite los campos de FILTROS_LISTADOS['presupuesto'].
+        """
+        filtros = dict(filtros or {})
+        if tipo_movimiento:
+            filtros['tipo_movimiento'] = tipo_movimiento
+        _relevancia, _busqueda, where, orden, params = self._listado('presupuesto', limit=limit, after=after,
+                                                                     filtros=filtros)
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        if tipo_movimiento:
-            cursor.execute('''
-                SELECT * FROM presupuesto 
-                WHERE tipo_movimiento = ?
-                ORDER BY fecha_movimiento DESC
-            ''', (tipo_movimiento,))
-        else:
-            cursor.execute('''
+        try:
+            cursor.execute(f'''
                 SELECT * FROM presupuesto 
-                ORDER BY fecha_movimiento DESC
-            ''')
-        
-        columns = [description[0] for description in cursor.description]
-        movimientos = [dict(zip(columns, row)) for row in cursor.fetchall()]
-        
-        conn.close()
-        return movimientos
+                {where}
+                {orden}
+            ''', params)
+
+            columns = [description[0] for description in cursor.description]
+            movimientos = filas_a_dict(columns, cursor.fetchall())
+
+            return movimientos
+        finally:
+            conn.close()
     
     def get_estadisticas_presupuesto(self) -> Dict:
-        """Obtiene estadísticas del presupuesto"""
+        """Obtiene estadísticas del presupuesto desde las tablas de resumen"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        # Total ingresos
-        cursor.execute("SELECT COALESCE(SUM(monto), 0) FROM presupuesto WHERE tipo_movimiento = 'ingreso'")
-        total_ingresos = cursor.fetchone()[0]
-        
-        # Total egresos
-        cursor.execute("SELECT COALESCE(SUM(monto), 0) FROM presupuesto WHERE tipo_movimiento = 'egreso'")
-        total_egresos = cursor.fetchone()[0]
-        
-        # Balance
-        balance = total_ingresos - total_egresos
-        
-        # Ingresos por categoría
-        cursor.execute('''
-            SELECT categoria, SUM(monto) as total
-            FROM presupuesto 
-            WHERE tipo_movimiento = 'ingreso'
-            GROUP BY categoria
-            ORDER BY total DESC
-        ''')
-        ingresos_por_categoria = [dict(zip(['categoria', 'total'], row)) for row in cursor.fetchall()]
-        
-        # Egresos por categoría
-        cursor.execute('''
-            SELECT categoria, SUM(monto) as total
-            FROM presupuesto 
-            WHERE tipo_movimiento = 'egreso'
-            GROUP BY categoria
-            ORDER BY total DESC
-        ''')
-        egresos_por_categoria = [dict(zip(['categoria', 'total'], row)) for row in cursor.fetchall()]
-        
-        conn.close()
-        
-        return {
-            'total_ingresos': total_ingresos,
-            'total_egresos': total_egresos,
-            'balance': balance,
-            'ingresos_por_categoria': ingresos_por_categoria,
-            'egresos_por_categoria': egresos_por_categoria
-        }
+        try:
+            cursor.execute('''
+                SELECT clave, valor FROM resumen_contadores
+                WHERE clave IN ('ingresos', 'egresos')
+            ''')
+            totales = dict(cursor.fetchall())
+            total_ingresos = totales.get('ingresos', 0)
+            total_egresos = totales.get('egresos', 0)
+
+            # Balance
+            balance = total_ingresos - total_egresos
+
+            # Totales por tipo y categoría
+            cursor.execute('''
+                SELECT tipo_movimiento, categoria, total
+                FROM resumen_presupuesto_categoria
+                ORDER BY total DESC
+            ''')
+            por_categoria = {'ingreso': [], 'egreso': []}
+            for tipo, categoria, total in cursor.fetchall():
+                por_categoria[tipo].append({'categoria': categoria, 'total': total})
+
+            return {
+                'total_ingresos': total_ingresos,
+                'total_egresos': total_egresos,
+                'balance': balance,
+                'ingresos_por_categoria': por_categoria['ingreso'],
+                'egresos_por_categoria': por_categoria['egreso']
+            }
+        finally:
+            conn.close()
     
     def delete_movimiento_presupuesto(self, movimiento_id: int) -> bool:
         """Elimina un movimiento de presupuesto"""
@@ -824,26 +1825,29 @@ class DatabaseManager:
             
             info_id = cursor.lastrowid
             conn.commit()
+            self._invalidar(f'propietario_info:{propietario_id}')
             return info_id
         finally:
             conn.close()
     
+    @cacheado('propietario_info:{propietario_id}')
     def get_propietario_info(self, propietario_id: int) -> Optional[Dict]:
         """Obtiene información adicional de un propietario"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute("SELECT * FROM propietarios_info WHERE propietario_id = ?", (propietario_id,))
-        row = cursor.fetchone()
-        
-        if row:
-            columns = [description[0] for description in cursor.description]
-            info = dict(zip(columns, row))
+        try:
+            cursor.execute("SELECT * FROM propietarios_info WHERE propietario_id = ?", (propietario_id,))
+            row = cursor.fetchone()
+
+            if row:
+                columns = [description[0] for description in cursor.description]
+                info = filas_a_dict(columns, [row])[0]
+                return info
+
+            return None
+        finally:
             conn.close()
-            return info
-        
-        conn.close()
-        return None
     
     def update_propietario_info(self, propietario_id: int, direccion: str = None,
                               fecha_nacimiento: str = None, profesion: str = None,
@@ -873,6 +1877,55 @@ class DatabaseManager:
                   telefono_emergencia, contacto_emergencia, notas, propietario_id))
             
             conn.commit()
+            self._invalidar(f'propietario_info:{propietario_id}')
             return cursor.rowcount > 0
         finally:
             conn.close()
+
+
+class DatabaseManagerPorProceso:
+    """Un DatabaseManager por proceso, creado al primer uso.
+
+    Con servidores que hacen fork (prefork) cada worker abre su propio pool y
+    su propia cola de escritura después del fork; nada del proceso padre se
+    usa en el hijo. Los atributos y métodos se delegan al DatabaseManager del
+    proceso actual.
+    """
+
+    def __init__(self, fabrica: Callable[[], DatabaseManager]):
+        self._fabrica = fabrica
+        self._db: Optional[DatabaseManager] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def obtener(self) -> DatabaseManager:
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    # Tras un fork self._db es del padre: se abandona sin cerrarlo
+                    self._db = self._fabrica()
+                    self._pid = pid
+        return self._db
+
+    def preparar(self):
+        """Aplica migraciones y datos iniciales en el proceso actual y libera las conexiones.
+
+        Se llama en el proceso maestro antes del fork, para que los workers
+        encuentren la base lista y no hereden conexiones abiertas.
+        """
+        with self._lock:
+            db = self._fabrica()
+            db.close()
+            self._db = None
+            self._pid = None
+
+    def close(self):
+        with self._lock:
+            if self._db is not None and self._pid == os.getpid():
+                self._db.close()
+            self._db = None
+            self._pid = None
+
+    def __getattr__(self, nombre):
+        return getattr(self.obtener(), nombre)
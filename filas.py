@@ -0,0 +1,15 @@
+# ===========================================
+# FILAS A DICT - SISTEMA AUTOMOTORES
+# ===========================================
+#
+# Toda conversión de filas de un cursor a diccionarios (database.py,
+# analitica.py, preventivo.py) pasa por filas_a_dict, así el perfilado por
+# petición (perfilado.py) la mide como una sola entrada. No importa nada del
+# sistema para que cualquier módulo pueda usarla sin importaciones circulares.
+
+from typing import Dict, List
+
+
+def filas_a_dict(columnas: List[str], filas) -> List[Dict]:
+    """Convierte filas de un cursor en diccionarios por nombre de columna"""
+    return [dict(zip(columnas, fila)) for fila in filas]
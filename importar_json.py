@@ -0,0 +1,297 @@
+# ===========================================
+# IMPORTADOR DE DATOS LEGADOS - SISTEMA AUTOMOTORES
+# ===========================================
+#
+# Importa el archivo JSON del sistema de consola (main.py) a la base SQLite
+# de la versión web. El archivo se lee por partes con un parser incremental,
+# de modo que la memoria usada depende del tamaño de un propietario y no del
+# archivo completo. Los propietarios se insertan en lotes, cada uno en su
+# propia transacción; los RUT ya existentes (en la base o antes en el
+# archivo, comparados con normalizar_rut) se omiten junto con sus vehículos y mantenimientos, así que
+# repetir la importación después de un corte continúa donde quedó.
+#
+# Uso:
+#   python importar_json.py [datos_automotores.json] [--db automotores.db]
+#                           [--lote 1000] [--perfil throughput]
+
+import argparse
+import datetime
+import functools
+import json
+import os
+import sqlite3
+import sys
+import time
+from typing import Callable, Dict, Iterator, List, Optional, TextIO
+
+from database import aplicar_pragmas, resolver_perfil
+from migraciones import aplicar_migraciones
+from rut import normalizar_rut
+
+# Caracteres leídos del archivo en cada bloque
+TAMANO_BLOQUE = 1 << 20
+
+# Máximo de caracteres de un propietario (con sus vehículos y mantenimientos);
+# acota la memoria si el archivo está dañado, p. ej. una comilla sin cerrar
+MAX_OBJETO = 64 << 20
+
+# Un \uXXXX cortado por el bloque falla hasta 6 caracteres antes del final
+_COLA_INCOMPLETA = 6
+
+# Máximo de parámetros por consulta IN (...) al buscar RUT existentes
+_BLOQUE_RUT = 500
+
+_ESPACIOS = ' \t\n\r'
+
+
+def iterar_arreglo(archivo: TextIO, tam_bloque: int = TAMANO_BLOQUE,
+                   max_objeto: int = MAX_OBJETO) -> Iterator[Dict]:
+    """Recorre un arreglo JSON de objetos devolviendo un objeto a la vez.
+
+    Mantiene en memoria solo el bloque actual y el objeto que se está leyendo.
+    Un objeto inválido se informa apenas se lee completo, sin seguir leyendo.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    # Caracteres del archivo anteriores a buffer[0] (para ubicar los errores)
+    descartados = 0
+    fin_archivo = False
+
+    def leer_mas() -> bool:
+        nonlocal buffer, pos, descartados, fin_archivo
+        bloque = archivo.read(tam_bloque)
+        if not bloque:
+            fin_archivo = True
+            return False
+        descartados += pos
+        buffer = buffer[pos:] + bloque
+        pos = 0
+        return True
+
+    def siguiente_caracter() -> str:
+        """Salta espacios y devuelve el próximo carácter sin consumirlo ('' al final)"""
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in _ESPACIOS:
+                pos += 1
+            if pos < len(buffer):
+                return buffer[pos]
+            if fin_archivo or not leer_mas():
+                return ''
+
+    if siguiente_caracter() != '[':
+        raise ValueError("El archivo no contiene un arreglo JSON")
+    pos += 1
+
+    primero = True
+    while True:
+        caracter = siguiente_caracter()
+        if caracter == ']':
+            return
+        if not caracter:
+            raise ValueError("El archivo JSON termina antes de cerrar el arreglo")
+        if not primero:
+            if caracter != ',':
+                raise ValueError(f"Se esperaba ',' o ']' en la posición {pos} del bloque")
+            pos += 1
+            caracter = siguiente_caracter()
+        if caracter != '{':
+            raise ValueError("Cada elemento del arreglo debe ser un objeto JSON")
+
+        while True:
+            try:
+                objeto, pos = decoder.raw_decode(buffer, pos)
+                break
+            except json.JSONDecodeError as e:
+                incompleto = (e.pos >= len(buffer) - _COLA_INCOMPLETA
+                              or e.msg.startswith('Unterminated string'))
+                if not incompleto:
+                    raise ValueError(f"JSON inválido en el carácter {descartados + e.pos}: {e.msg}")
+                if len(buffer) - pos > max_objeto:
+                    raise ValueError(f"El elemento que empieza en el carácter {descartados + pos} "
+                                     f"supera los {max_objeto:,} caracteres")
+                # El objeto sigue en el próximo bloque
+                if fin_archivo or not leer_mas():
+                    raise ValueError("El archivo JSON termina antes de cerrar un objeto")
+        primero = False
+        yield objeto
+
+
+@functools.lru_cache(maxsize=4096)
+def _fecha_iso(fecha) -> Optional[str]:
+    """Convierte DD/MM/AAAA (formato de main.py) a AAAA-MM-DD.
+
+    Con caché: en un archivo grande las mismas fechas se repiten mucho y
+    convertirlas fila por fila era lo más lento de la importación.
+    """
+    if not fecha:
+        return None
+    try:
+        dia, mes, anio = (int(parte) for parte in str(fecha).strip().split('/'))
+        return datetime.date(anio, mes, dia).isoformat()
+    except ValueError:
+        return str(fecha)
+
+
+def _numero(valor) -> Optional[float]:
+    """Costos legados: número, texto numérico o 'No especificado'"""
+    if isinstance(valor, (int, float)):
+        return valor
+    try:
+        return float(str(valor).replace(',', '.'))
+    except (TypeError, ValueError):
+        return None
+
+
+def _ruts_existentes(cursor: sqlite3.Cursor, ruts: List[str]) -> set:
+    existentes = set()
+    for inicio in range(0, len(ruts), _BLOQUE_RUT):
+        bloque = ruts[inicio:inicio + _BLOQUE_RUT]
+        marcadores = ', '.join('?' for _ in bloque)
+        cursor.execute(f"SELECT rut FROM propietarios WHERE rut IN ({marcadores})", bloque)
+        existentes.update(row[0] for row in cursor.fetchall())
+    return existentes
+
+
+def _ids_insertados(cursor: sqlite3.Cursor, cantidad: int) -> List[int]:
+    """IDs del último executemany: consecutivos porque el lote corre en BEGIN IMMEDIATE"""
+    if not cantidad:
+        return []
+    ultimo = cursor.execute("SELECT last_insert_rowid()").fetchone()[0]
+    return list(range(ultimo - cantidad + 1, ultimo + 1))
+
+
+def importar_lote(conn: sqlite3.Connection, lote: List[Dict], totales: Dict[str, int]):
+    """Inserta un lote de propietarios legados con sus vehículos y mantenimientos"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+
+        ruts = [normalizar_rut(p.get('rut', '')) for p in lote]
+        vistos = _ruts_existentes(cursor, [r for r in ruts if r])
+        nuevos = []
+        for propietario, rut in zip(lote, ruts):
+            if not rut or not propietario.get('nombre') or not propietario.get('apellido'):
+                totales['invalidos'] += 1
+            elif rut in vistos:
+                totales['duplicados'] += 1
+            else:
+                vistos.add(rut)
+                nuevos.append((propietario, rut))
+
+        cursor.executemany('''
+            INSERT INTO propietarios (nombre, apellido, rut, tipo_personal, telefono, email)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [(p['nombre'], p['apellido'], rut, p.get('tipo_personal'), p.get('telefono'), p.get('email'))
+              for p, rut in nuevos])
+        propietario_ids = _ids_insertados(cursor, len(nuevos))
+
+        vehiculos = []
+        for (propietario, _rut), propietario_id in zip(nuevos, propietario_ids):
+            for vehiculo in propietario.get('vehiculos') or []:
+                if not vehiculo.get('marca') or not vehiculo.get('modelo'):
+                    totales['invalidos'] += 1
+                    continue
+                vehiculos.append((propietario_id, vehiculo))
+        cursor.executemany('''
+            INSERT INTO vehiculos (propietario_id, marca, modelo, año, color, kilometraje, patente,
+                                   fecha_registro)
+            VALUES (?, ?, ?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+        ''', [(pid, v['marca'], v['modelo'], v.get('año'), v.get('color'), v.get('kilometraje', 0),
+               v.get('patente'), _fecha_iso(v.get('fecha_registro'))) for pid, v in vehiculos])
+        vehiculo_ids = _ids_insertados(cursor, len(vehiculos))
+
+        # main.py identifica el vehículo de un mantenimiento como "Marca Modelo"
+        por_nombre = {}
+        for (propietario_id, vehiculo), vehiculo_id in zip(vehiculos, vehiculo_ids):
+            por_nombre.setdefault((propietario_id, f"{vehiculo['marca']} {vehiculo['modelo']}"), vehiculo_id)
+
+        mantenimientos = []
+        for (propietario, _rut), propietario_id in zip(nuevos, propietario_ids):
+            for mantenimiento in propietario.get('historial_mantenimiento') or []:
+                vehiculo_id = por_nombre.get((propietario_id, mantenimiento.get('vehiculo')))
+                if vehiculo_id is None or not mantenimiento.get('tipo_mantenimiento'):
+                    totales['invalidos'] += 1
+                    continue
+                anterior = mantenimiento.get('kilometraje_anterior')
+                actual = mantenimiento.get('kilometraje_actual')
+                recorridos = actual - anterior if isinstance(actual, int) and isinstance(anterior, int) else None
+                mantenimientos.append((
+                    vehiculo_id, _fecha_iso(mantenimiento.get('fecha')) or datetime.date.today().isoformat(),
+                    mantenimiento['tipo_mantenimiento'], anterior, actual, recorridos,
+                    mantenimiento.get('descripcion'), _numero(mantenimiento.get('costo')),
+                    mantenimiento.get('taller')))
+        cursor.executemany('''
+            INSERT INTO mantenimientos (vehiculo_id, fecha_mantenimiento, tipo_mantenimiento,
+                                        kilometraje_anterior, kilometraje_actual, kilometros_recorridos,
+                                        descripcion, costo, taller)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', mantenimientos)
+
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    totales['propietarios'] += len(nuevos)
+    totales['vehiculos'] += len(vehiculos)
+    totales['mantenimientos'] += len(mantenimientos)
+
+
+def importar(conn: sqlite3.Connection, archivo: TextIO, lote: int = 1000,
+             progreso: Optional[Callable[[Dict[str, int]], None]] = None) -> Dict[str, int]:
+    """Importa todos los propietarios del archivo; devuelve los totales"""
+    totales = {'leidos': 0, 'propietarios': 0, 'vehiculos': 0, 'mantenimientos': 0,
+               'duplicados': 0, 'invalidos': 0}
+    pendientes = []
+    for propietario in iterar_arreglo(archivo):
+        totales['leidos'] += 1
+        pendientes.append(propietario)
+        if len(pendientes) >= lote:
+            importar_lote(conn, pendientes, totales)
+            pendientes = []
+            if progreso:
+                progreso(totales)
+    if pendientes:
+        importar_lote(conn, pendientes, totales)
+    return totales
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('archivo', nargs='?', default='datos_automotores.json')
+    parser.add_argument('--db', default='automotores.db')
+    parser.add_argument('--lote', type=int, default=1000, help='propietarios por transacción')
+    parser.add_argument('--perfil', default='throughput', help='perfil de pragmas (durable o throughput)')
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    aplicar_pragmas(conn, resolver_perfil(args.perfil))
+    aplicar_migraciones(conn)
+
+    tamano_mb = os.path.getsize(args.archivo) / 1e6
+    inicio = time.perf_counter()
+
+    def progreso(totales: Dict[str, int]):
+        segundos = time.perf_counter() - inicio
+        print(f"  {totales['leidos']:,} propietarios leídos "
+              f"({totales['leidos'] / segundos:,.0f}/s)", file=sys.stderr)
+
+    try:
+        with open(args.archivo, 'r', encoding='utf-8') as f:
+            totales = importar(conn, f, args.lote, progreso)
+    finally:
+        conn.close()
+
+    segundos = time.perf_counter() - inicio
+    filas = totales['propietarios'] + totales['vehiculos'] + totales['mantenimientos']
+    print(f"✅ Importación de {args.archivo} ({tamano_mb:,.1f} MB) en {segundos:.1f}s")
+    print(f"   Propietarios: {totales['propietarios']:,}  Vehículos: {totales['vehiculos']:,}  "
+          f"Mantenimientos: {totales['mantenimientos']:,}")
+    print(f"   Omitidos: {totales['duplicados']:,} RUT repetidos, {totales['invalidos']:,} registros inválidos")
+    print(f"   Rendimiento: {filas / segundos:,.0f} filas/s, {tamano_mb / segundos:,.1f} MB/s")
+
+
+if __name__ == '__main__':
+    main()
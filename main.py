@@ -2,32 +2,202 @@
 # SISTEMA DE GESTIÓN DE AUTOMOTORES
 # ===========================================
 
+import argparse
 import datetime
 import json
 import os
 
-# Lista global para almacenar propietarios
+from rut import normalizar_rut
+
+# Almacenamiento: por defecto la base SQLite de la versión web (DatabaseManager);
+# con --json se usa el archivo JSON + diario del sistema original
+DB_FILE = "automotores.db"
+db = None
+
+# Propietarios por página en listar_propietarios
+TAMANO_PAGINA = 20
+
+# Lista global para almacenar propietarios (solo en modo JSON)
 propietarios = []
+# Índice RUT normalizado -> propietario (mismos objetos que la lista)
+propietarios_por_rut = {}
 DATA_FILE = "datos_automotores.json"
 
-def load_data():
-    """Carga los datos desde el archivo JSON si existe."""
-    global propietarios
-    if os.path.exists(DATA_FILE):
+# Cada cambio se agrega como una línea JSON al diario; cada COMPACTAR_CADA
+# cambios (y al salir) el diario se vuelca a DATA_FILE y se vacía
+JOURNAL_FILE = "datos_automotores.journal"
+COMPACTAR_CADA = 1000
+cambios_pendientes = 0
+# Si el snapshot o el diario no se pudieron aplicar, nada se vuelve a escribir:
+# compactar una carga parcial borraría el diario y los datos que no se leyeron
+carga_fallida = False
+
+def reconstruir_indice():
+    """Arma el índice por RUT desde la lista (ante RUT repetidos gana el primero)"""
+    global propietarios_por_rut
+    propietarios_por_rut = {}
+    for propietario in propietarios:
+        propietarios_por_rut.setdefault(normalizar_rut(propietario["rut"]), propietario)
+
+def buscar_propietario(rut):
+    """Devuelve el propietario con ese RUT (en cualquier formato) o None"""
+    if db is not None:
+        return db.get_propietario_by_rut(rut)
+    return propietarios_por_rut.get(normalizar_rut(rut))
+
+def hay_propietarios():
+    """Indica si hay al menos un propietario, sin cargar la lista"""
+    if db is not None:
+        return db.get_estadisticas_generales()['total_propietarios'] > 0
+    return bool(propietarios)
+
+def vehiculos_de(propietario):
+    """Vehículos de un propietario, en el orden en que se muestran al elegir"""
+    if db is not None:
+        return db.get_vehiculos_by_propietario(propietario['id'])
+    return propietario['vehiculos']
+
+def paginas_propietarios():
+    """Genera páginas de TAMANO_PAGINA propietarios con sus vehículos.
+
+    En modo base de datos cada página es una consulta paginada por cursor, así
+    que el listado no carga más propietarios que los que se muestran.
+    """
+    if db is None:
+        for inicio in range(0, len(propietarios), TAMANO_PAGINA):
+            yield [dict(p, total_mantenimientos=len(p['historial_mantenimiento']))
+                   for p in propietarios[inicio:inicio + TAMANO_PAGINA]]
+        return
+
+    after = None
+    while True:
+        pagina = db.get_propietarios(limit=TAMANO_PAGINA, after=after)
+        for propietario in pagina:
+            propietario['vehiculos'] = db.get_vehiculos_by_propietario(propietario['id'])
+            propietario['total_mantenimientos'] = sum(v['total_mantenimientos'] for v in propietario['vehiculos'])
+        if pagina:
+            yield pagina
+        after = db.cursor_siguiente('propietarios', pagina, TAMANO_PAGINA)
+        if not after:
+            return
+
+def agregar_propietario(propietario):
+    """Agrega un propietario a la lista y al índice"""
+    propietarios.append(propietario)
+    propietarios_por_rut[normalizar_rut(propietario["rut"])] = propietario
+
+def aplicar_cambio(cambio):
+    """Aplica un registro del diario sobre la lista de propietarios.
+
+    Es idempotente: cada registro indica la posición que ocupa su elemento,
+    así que aplicarlo dos veces (por ejemplo si se cortó la luz entre volcar
+    el snapshot y vaciar el diario) no duplica datos.
+    """
+    if cambio["op"] == "propietario":
+        if buscar_propietario(cambio["datos"]["rut"]) is None:
+            agregar_propietario(cambio["datos"])
+        return
+
+    propietario = buscar_propietario(cambio["rut"])
+    if propietario is None:
+        raise ValueError(f"El diario referencia un RUT inexistente: {cambio['rut']}")
+
+    if cambio["op"] == "vehiculo":
+        if len(propietario["vehiculos"]) == cambio["posicion"]:
+            propietario["vehiculos"].append(cambio["datos"])
+    elif cambio["op"] == "mantenimiento":
+        if len(propietario["historial_mantenimiento"]) == cambio["posicion"]:
+            propietario["historial_mantenimiento"].append(cambio["datos"])
+            vehiculo = propietario["vehiculos"][cambio["vehiculo"]]
+            vehiculo["kilometraje"] = cambio["datos"]["kilometraje_actual"]
+    else:
+        raise ValueError(f"Operación desconocida en el diario: {cambio['op']}")
+
+def leer_journal():
+    """Devuelve los cambios del diario, descartando una última línea incompleta"""
+    if not os.path.exists(JOURNAL_FILE):
+        return []
+    cambios = []
+    with open(JOURNAL_FILE, "r", encoding="utf-8") as f:
+        lineas = f.readlines()
+    for numero, linea in enumerate(lineas, 1):
         try:
+            cambios.append(json.loads(linea))
+        except ValueError:
+            if numero == len(lineas):
+                # Escritura interrumpida: el cambio nunca se confirmó
+                print("⚠️ Se descartó un cambio incompleto al final del diario.")
+                break
+            raise
+    return cambios
+
+def load_data():
+    """Carga el último snapshot y le aplica los cambios del diario.
+
+    Si alguno de los dos no se puede aplicar, deja DATA_FILE y JOURNAL_FILE
+    como están y termina el programa (SystemExit) en lugar de seguir con
+    datos incompletos.
+    """
+    global propietarios, cambios_pendientes, carga_fallida
+    propietarios = []
+    cambios_pendientes = 0
+    carga_fallida = False
+    try:
+        if os.path.exists(DATA_FILE):
             with open(DATA_FILE, "r", encoding="utf-8") as f:
                 propietarios = json.load(f)
-        except Exception as e:
-            print(f"⚠️ No se pudo cargar el archivo de datos: {e}")
-            propietarios = []
-    else:
-        propietarios = []
+        reconstruir_indice()
+        cambios = leer_journal()
+        for cambio in cambios:
+            aplicar_cambio(cambio)
+        cambios_pendientes = len(cambios)
+    except Exception as e:
+        carga_fallida = True
+        print(f"❌ No se pudieron cargar los datos: {e}")
+        print(f"   {DATA_FILE} y {JOURNAL_FILE} quedan sin cambios; revíselos antes de volver a abrir el sistema.")
+        raise SystemExit(1)
+    # Una línea incompleta quedaría en medio del diario al agregar la siguiente
+    if cambios_pendientes or os.path.exists(JOURNAL_FILE):
+        save_data()
+
+def registrar_cambio(cambio):
+    """Agrega un cambio al diario (O(tamaño del cambio)) y compacta cada tanto."""
+    global cambios_pendientes
+    if carga_fallida:
+        print("⚠️ No se guardó el cambio: los datos no se cargaron completos.")
+        return
+    try:
+        with open(JOURNAL_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps(cambio, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        cambios_pendientes += 1
+        if cambios_pendientes >= COMPACTAR_CADA:
+            save_data()
+    except Exception as e:
+        print(f"⚠️ No se pudo guardar el cambio: {e}")
 
 def save_data():
-    """Guarda los datos actuales en el archivo JSON."""
+    """Vuelca todos los datos a DATA_FILE (snapshot) y vacía el diario.
+
+    El snapshot se escribe en un archivo temporal que reemplaza al anterior
+    con os.replace, así un corte a mitad de escritura nunca deja un
+    DATA_FILE truncado.
+    """
+    global cambios_pendientes
+    if carga_fallida:
+        return
+    temporal = DATA_FILE + ".tmp"
     try:
-        with open(DATA_FILE, "w", encoding="utf-8") as f:
+        with open(temporal, "w", encoding="utf-8") as f:
             json.dump(propietarios, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, DATA_FILE)
+        # Si el corte ocurre aquí, el diario se vuelve a aplicar sin duplicar (ver aplicar_cambio)
+        if os.path.exists(JOURNAL_FILE):
+            os.remove(JOURNAL_FILE)
+        cambios_pendientes = 0
     except Exception as e:
         print(f"⚠️ No se pudo guardar el archivo de datos: {e}")
 
@@ -58,10 +228,14 @@ def registrar_propietario():
             return
         
         # Verificar si el RUT ya existe
-        for propietario in propietarios:
-            if propietario["rut"] == rut:
-                print(f"❌ Error: Ya existe un propietario con el RUT {rut}")
-                return
+        if buscar_propietario(rut) is not None:
+            print(f"❌ Error: Ya existe un propietario con el RUT {rut}")
+            return
+        
+        if db is not None:
+            db.create_propietario(nombre, apellido, rut)
+            print(f"✅ Propietario {nombre} {apellido} registrado exitosamente.")
+            return
         
         # Crear el propietario
         propietario = {
@@ -71,8 +245,8 @@ def registrar_propietario():
             "vehiculos": [],
             "historial_mantenimiento": []
         }
-        propietarios.append(propietario)
-        save_data()
+        agregar_propietario(propietario)
+        registrar_cambio({"op": "propietario", "datos": propietario})
         print(f"✅ Propietario {nombre} {apellido} registrado exitosamente.")
         
     except Exception as e:
@@ -82,7 +256,7 @@ def agregar_vehiculo():
     """Agrega un vehículo a un propietario existente"""
     print("\n--- AGREGAR VEHÍCULO ---")
     
-    if not propietarios:
+    if not hay_propietarios():
         print("❌ No hay propietarios registrados. Primero registre un propietario.")
         return
     
@@ -90,11 +264,7 @@ def agregar_vehiculo():
         rut = input("Ingrese el RUT del propietario: ").strip()
         
         # Buscar el propietario
-        propietario_encontrado = None
-        for propietario in propietarios:
-            if propietario["rut"] == rut:
-                propietario_encontrado = propietario
-                break
+        propietario_encontrado = buscar_propietario(rut)
         
         if not propietario_encontrado:
             print("❌ No se encontró el propietario con ese RUT.")
@@ -118,6 +288,11 @@ def agregar_vehiculo():
             print("❌ Error: El kilometraje debe ser un número válido.")
             return
         
+        if db is not None:
+            db.create_vehiculo(propietario_encontrado['id'], marca, modelo, kilometraje=kilometraje)
+            print(f"✅ Vehículo '{marca} {modelo}' (Kilometraje: {kilometraje:,} km) agregado exitosamente a {propietario_encontrado['nombre']} {propietario_encontrado['apellido']}.")
+            return
+        
         # Crear el vehículo
         vehiculo = {
             "marca": marca, 
@@ -127,7 +302,8 @@ def agregar_vehiculo():
         }
         
         propietario_encontrado["vehiculos"].append(vehiculo)
-        save_data()
+        registrar_cambio({"op": "vehiculo", "rut": propietario_encontrado["rut"],
+                          "posicion": len(propietario_encontrado["vehiculos"]) - 1, "datos": vehiculo})
         print(f"✅ Vehículo '{marca} {modelo}' (Kilometraje: {kilometraje:,} km) agregado exitosamente a {propietario_encontrado['nombre']} {propietario_encontrado['apellido']}.")
         
     except Exception as e:
@@ -137,32 +313,39 @@ def listar_propietarios():
     """Lista todos los propietarios y sus vehículos"""
     print("\n--- LISTADO DE PROPIETARIOS ---")
     
-    if not propietarios:
-        print("📭 No hay propietarios registrados.")
-        return
-    
-    for i, propietario in enumerate(propietarios, 1):
-        print(f"\n👤 Propietario {i}:")
-        print(f"   Nombre: {propietario['nombre']} {propietario['apellido']}")
-        print(f"   RUT: {propietario['rut']}")
-        
-        if propietario['vehiculos']:
-            print(f"   🚗 Vehículos ({len(propietario['vehiculos'])}):")
-            for j, vehiculo in enumerate(propietario['vehiculos'], 1):
-                print(f"      {j}. {vehiculo['marca']} {vehiculo['modelo']} - {vehiculo['kilometraje']:,} km (Registrado: {vehiculo['fecha_registro']})")
-        else:
-            print("   🚗 Sin vehículos registrados")
+    i = 0
+    for pagina in paginas_propietarios():
+        if i > 0:
+            respuesta = input("\nPresione Enter para ver más propietarios o 'q' para volver: ").strip().lower()
+            if respuesta == "q":
+                return
         
-        if propietario['historial_mantenimiento']:
-            print(f"   🔧 Mantenimientos registrados: {len(propietario['historial_mantenimiento'])}")
-        else:
-            print("   🔧 Sin mantenimientos registrados")
+        for propietario in pagina:
+            i += 1
+            print(f"\n👤 Propietario {i}:")
+            print(f"   Nombre: {propietario['nombre']} {propietario['apellido']}")
+            print(f"   RUT: {propietario['rut']}")
+            
+            if propietario['vehiculos']:
+                print(f"   🚗 Vehículos ({len(propietario['vehiculos'])}):")
+                for j, vehiculo in enumerate(propietario['vehiculos'], 1):
+                    print(f"      {j}. {vehiculo['marca']} {vehiculo['modelo']} - {vehiculo['kilometraje'] or 0:,} km (Registrado: {vehiculo['fecha_registro']})")
+            else:
+                print("   🚗 Sin vehículos registrados")
+            
+            if propietario['total_mantenimientos']:
+                print(f"   🔧 Mantenimientos registrados: {propietario['total_mantenimientos']}")
+            else:
+                print("   🔧 Sin mantenimientos registrados")
+    
+    if i == 0:
+        print("📭 No hay propietarios registrados.")
 
 def crear_historial_mantenimiento():
     """Crea un historial de mantenimiento para un vehículo"""
     print("\n--- CREAR HISTORIAL DE MANTENIMIENTO ---")
     
-    if not propietarios:
+    if not hay_propietarios():
         print("❌ No hay propietarios registrados.")
         return
     
@@ -170,36 +353,34 @@ def crear_historial_mantenimiento():
         rut = input("Ingrese el RUT del propietario: ").strip()
         
         # Buscar el propietario
-        propietario_encontrado = None
-        for propietario in propietarios:
-            if propietario["rut"] == rut:
-                propietario_encontrado = propietario
-                break
+        propietario_encontrado = buscar_propietario(rut)
         
         if not propietario_encontrado:
             print("❌ No se encontró el propietario con ese RUT.")
             return
         
-        if not propietario_encontrado['vehiculos']:
+        vehiculos = vehiculos_de(propietario_encontrado)
+        if not vehiculos:
             print("❌ Este propietario no tiene vehículos registrados.")
             return
         
         # Mostrar vehículos del propietario
         print(f"\nVehículos de {propietario_encontrado['nombre']} {propietario_encontrado['apellido']}:")
-        for i, vehiculo in enumerate(propietario_encontrado['vehiculos'], 1):
-            print(f"   {i}. {vehiculo['marca']} {vehiculo['modelo']} - {vehiculo['kilometraje']:,} km")
+        for i, vehiculo in enumerate(vehiculos, 1):
+            print(f"   {i}. {vehiculo['marca']} {vehiculo['modelo']} - {vehiculo['kilometraje'] or 0:,} km")
         
         # Seleccionar vehículo
         try:
             opcion_vehiculo = int(input("\nSeleccione el número del vehículo: ")) - 1
-            if opcion_vehiculo < 0 or opcion_vehiculo >= len(propietario_encontrado['vehiculos']):
+            if opcion_vehiculo < 0 or opcion_vehiculo >= len(vehiculos):
                 print("❌ Opción inválida.")
                 return
         except ValueError:
             print("❌ Por favor ingrese un número válido.")
             return
         
-        vehiculo_seleccionado = propietario_encontrado['vehiculos'][opcion_vehiculo]
+        vehiculo_seleccionado = vehiculos[opcion_vehiculo]
+        kilometraje_anterior = vehiculo_seleccionado['kilometraje'] or 0
         
         # Obtener información del mantenimiento
         fecha_mantenimiento = input("Ingrese la fecha del mantenimiento (DD/MM/AAAA) o presione Enter para hoy: ").strip()
@@ -207,12 +388,12 @@ def crear_historial_mantenimiento():
             fecha_mantenimiento = datetime.datetime.now().strftime("%d/%m/%Y")
         
         tipo_mantenimiento = input("Ingrese el tipo de mantenimiento (ej: Cambio de aceite, Revisión general, etc.): ").strip()
-        kilometraje_actual = input(f"Ingrese el kilometraje actual (actual: {vehiculo_seleccionado['kilometraje']:,} km): ").strip()
+        kilometraje_actual = input(f"Ingrese el kilometraje actual (actual: {kilometraje_anterior:,} km): ").strip()
         
         # Validar kilometraje
         try:
             kilometraje_actual = int(kilometraje_actual)
-            if kilometraje_actual < vehiculo_seleccionado['kilometraje']:
+            if kilometraje_actual < kilometraje_anterior:
                 print("❌ Error: El kilometraje actual no puede ser menor al registrado anteriormente.")
                 return
         except ValueError:
@@ -222,27 +403,47 @@ def crear_historial_mantenimiento():
         descripcion = input("Ingrese la descripción del trabajo realizado: ").strip()
         costo = input("Ingrese el costo del mantenimiento (opcional): ").strip()
         
-        # Crear el historial de mantenimiento
-        mantenimiento = {
-            "fecha": fecha_mantenimiento,
-            "vehiculo": f"{vehiculo_seleccionado['marca']} {vehiculo_seleccionado['modelo']}",
-            "kilometraje_anterior": vehiculo_seleccionado['kilometraje'],
-            "kilometraje_actual": kilometraje_actual,
-            "tipo_mantenimiento": tipo_mantenimiento,
-            "descripcion": descripcion,
-            "costo": costo if costo else "No especificado"
-        }
-        
-        # Actualizar el kilometraje del vehículo
-        vehiculo_seleccionado['kilometraje'] = kilometraje_actual
-        
-        propietario_encontrado['historial_mantenimiento'].append(mantenimiento)
-        save_data()
+        if db is not None:
+            try:
+                fecha_iso = datetime.datetime.strptime(fecha_mantenimiento, "%d/%m/%Y").strftime("%Y-%m-%d")
+            except ValueError:
+                print("❌ Error: La fecha debe tener el formato DD/MM/AAAA.")
+                return
+            try:
+                costo_numero = float(costo.replace(",", ".")) if costo else None
+            except ValueError:
+                costo_numero = None
+            try:
+                db.create_mantenimiento_con_kilometraje(vehiculo_seleccionado['id'], fecha_iso,
+                                                        tipo_mantenimiento, kilometraje_actual,
+                                                        descripcion, costo_numero)
+            except ValueError as e:
+                print(f"❌ Error: {e}.")
+                return
+        else:
+            # Crear el historial de mantenimiento
+            mantenimiento = {
+                "fecha": fecha_mantenimiento,
+                "vehiculo": f"{vehiculo_seleccionado['marca']} {vehiculo_seleccionado['modelo']}",
+                "kilometraje_anterior": kilometraje_anterior,
+                "kilometraje_actual": kilometraje_actual,
+                "tipo_mantenimiento": tipo_mantenimiento,
+                "descripcion": descripcion,
+                "costo": costo if costo else "No especificado"
+            }
+            
+            # Actualizar el kilometraje del vehículo
+            vehiculo_seleccionado['kilometraje'] = kilometraje_actual
+            
+            propietario_encontrado['historial_mantenimiento'].append(mantenimiento)
+            registrar_cambio({"op": "mantenimiento", "rut": propietario_encontrado["rut"], "vehiculo": opcion_vehiculo,
+                              "posicion": len(propietario_encontrado['historial_mantenimiento']) - 1,
+                              "datos": mantenimiento})
         
         print(f"\n✅ Historial de mantenimiento creado exitosamente:")
         print(f"   📅 Fecha: {fecha_mantenimiento}")
         print(f"   🚗 Vehículo: {vehiculo_seleccionado['marca']} {vehiculo_seleccionado['modelo']}")
-        print(f"   📊 Kilometraje: {vehiculo_seleccionado['kilometraje']:,} km → {kilometraje_actual:,} km")
+        print(f"   📊 Kilometraje: {kilometraje_anterior:,} km → {kilometraje_actual:,} km")
         print(f"   🔧 Tipo: {tipo_mantenimiento}")
         print(f"   📝 Descripción: {descripcion}")
         print(f"   💰 Costo: {costo if costo else 'No especificado'}")
@@ -250,9 +451,27 @@ def crear_historial_mantenimiento():
     except Exception as e:
         print(f"❌ Error al crear historial de mantenimiento: {e}")
     
-def main():
+def iniciar(modo_json=False, db_name=DB_FILE):
+    """Prepara el almacenamiento: abre la base SQLite o carga el JSON + diario"""
+    global db
+    if modo_json:
+        db = None
+        load_data()
+    else:
+        # Import diferido: el modo JSON no necesita la capa de base de datos
+        from database import DatabaseManager
+        db = DatabaseManager(db_name, pool_size=1)
+
+def cerrar():
+    """Guarda lo pendiente y libera el almacenamiento"""
+    if db is not None:
+        db.close()
+    elif cambios_pendientes:
+        save_data()
+
+def main(modo_json=False, db_name=DB_FILE):
     """Función principal que maneja el menú del sistema"""
-    load_data()
+    iniciar(modo_json, db_name)
     print("¡Bienvenido al Sistema de Gestión de Automotores! 🚗")
     
     while True:
@@ -270,6 +489,7 @@ def main():
             elif opcion == "4":
                 crear_historial_mantenimiento()
             elif opcion == "5":
+                cerrar()
                 print("\n👋 ¡Gracias por usar el Sistema de Gestión de Automotores!")
                 print("¡Hasta luego! 🚗")
                 break
@@ -277,6 +497,7 @@ def main():
                 print("❌ Opción inválida. Por favor seleccione una opción del 1 al 5.")
                 
         except KeyboardInterrupt:
+            cerrar()
             print("\n\n👋 Programa interrumpido por el usuario.")
             break
         except Exception as e:
@@ -284,4 +505,9 @@ def main():
 
 # Ejecutar el programa principal
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--json", action="store_true",
+                        help=f"usar {DATA_FILE} en lugar de la base SQLite")
+    parser.add_argument("--db", default=DB_FILE, help="archivo de la base SQLite")
+    args = parser.parse_args()
+    main(args.json, args.db)
@@ -0,0 +1,344 @@
+# ===========================================
+# MÉTRICAS - SISTEMA AUTOMOTORES
+# ===========================================
+#
+# Métricas de latencia pre-agregadas en histogramas de buckets fijos, que se
+# exponen en formato de texto de Prometheus (GET /metrics):
+#   - HTTP: latencia por ruta, peticiones por código de estado y tamaño de
+#     las respuestas (MedidorWSGI, incluye el tiempo de enviar un stream)
+#   - SQL: tiempo de cada sentencia y filas leídas, por método que la ejecuta
+#     (ConexionMedida/CursorMedido), y tiempo de apertura de conexiones
+#
+# Registrar una observación es una búsqueda binaria en los buckets y una suma
+# bajo un lock; no se guardan observaciones individuales.
+#
+# Opcionalmente se registran las consultas lentas con su EXPLAIN QUERY PLAN
+# en el logger "automotores.sql".
+#
+# Las métricas son del proceso: con varios workers cada uno expone las suyas.
+
+import bisect
+import logging
+import sqlite3
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Segundos
+BUCKETS_LATENCIA = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                    0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Bytes
+BUCKETS_TAMANO = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# Sentencias a las que se les puede pedir EXPLAIN QUERY PLAN
+_EXPLICABLES = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+registro_lentas = logging.getLogger('automotores.sql')
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _etiquetas(nombres: Sequence[str], valores: Tuple, extra: str = '') -> str:
+    pares = [f'{n}="{_escapar(v)}"' for n, v in zip(nombres, valores)]
+    if extra:
+        pares.append(extra)
+    return '{' + ','.join(pares) + '}' if pares else ''
+
+
+def _numero(valor: float) -> str:
+    if valor == float('inf'):
+        return '+Inf'
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class Contador:
+    """Contador monótono con etiquetas"""
+
+    tipo = 'counter'
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._valores: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def incrementar(self, *etiquetas, valor: float = 1):
+        with self._lock:
+            self._valores[etiquetas] = self._valores.get(etiquetas, 0) + valor
+
+    def muestras(self) -> List[str]:
+        with self._lock:
+            valores = list(self._valores.items())
+        return [f"{self.nombre}{_etiquetas(self.etiquetas, clave)} {_numero(valor)}"
+                for clave, valor in sorted(valores)]
+
+
+class Histograma:
+    """Histograma de buckets fijos con etiquetas (cuentas por bucket, suma y total)"""
+
+    tipo = 'histogram'
+
+    def __init__(self, nombre: str, ayuda: str, buckets: Sequence[float],
+                 etiquetas: Sequence[str] = ()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.buckets = tuple(buckets)
+        self.etiquetas = tuple(etiquetas)
+        # clave de etiquetas -> [cuentas por bucket (+Inf al final), suma]
+        self._series: Dict[Tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observar(self, valor: float, *etiquetas):
+        indice = bisect.bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(etiquetas)
+            if serie is None:
+                serie = self._series[etiquetas] = [[0] * (len(self.buckets) + 1), 0.0]
+            serie[0][indice] += 1
+            serie[1] += valor
+
+    def muestras(self) -> List[str]:
+        with self._lock:
+            series = [(clave, list(cuentas), suma) for clave, (cuentas, suma) in self._series.items()]
+        lineas = []
+        for clave, cuentas, suma in sorted(series):
+            acumulado = 0
+            for limite, cuenta in zip(self.buckets + (float('inf'),), cuentas):
+                acumulado += cuenta
+                le = _etiquetas(self.etiquetas, clave, f'le="{_numero(limite)}"')
+                lineas.append(f"{self.nombre}_bucket{le} {acumulado}")
+            etiquetas = _etiquetas(self.etiquetas, clave)
+            lineas.append(f"{self.nombre}_sum{etiquetas} {_numero(suma)}")
+            lineas.append(f"{self.nombre}_count{etiquetas} {acumulado}")
+        return lineas
+
+
+class Metricas:
+    """Métricas HTTP y SQL de un proceso.
+
+    sql_lento_ms: las sentencias que tarden más se registran con su plan en el
+    logger "automotores.sql" (None lo desactiva).
+    """
+
+    def __init__(self, sql_lento_ms: float = None):
+        self.sql_lento = sql_lento_ms / 1000.0 if sql_lento_ms is not None else None
+        self.http_segundos = Histograma(
+            'automotores_http_duracion_segundos', 'Latencia de las peticiones HTTP por ruta',
+            BUCKETS_LATENCIA, ('metodo', 'ruta'))
+        self.http_peticiones = Contador(
+            'automotores_http_peticiones_total', 'Peticiones HTTP por ruta y código de estado',
+            ('metodo', 'ruta', 'estado'))
+        self.http_bytes = Histograma(
+            'automotores_http_respuesta_bytes', 'Tamaño del cuerpo de las respuestas HTTP',
+            BUCKETS_TAMANO, ('metodo', 'ruta'))
+        self.sql_segundos = Histograma(
+            'automotores_sql_duracion_segundos',
+            'Tiempo de ejecución de cada sentencia SQL (hasta la primera fila) por método',
+            BUCKETS_LATENCIA, ('consulta',))
+        self.sql_lectura = Contador(
+            'automotores_sql_lectura_segundos_total', 'Tiempo leyendo filas (fetch) por método',
+            ('consulta',))
+        self.sql_filas = Contador(
+            'automotores_sql_filas_total', 'Filas leídas por método', ('consulta',))
+        self.sql_lentas = Contador(
+            'automotores_sql_lentas_total', 'Sentencias que superaron el umbral de consulta lenta',
+            ('consulta',))
+        self.conexiones = Histograma(
+            'automotores_db_conexion_apertura_segundos',
+            'Tiempo de abrir y configurar una conexión SQLite', BUCKETS_LATENCIA)
+
+    def todas(self) -> list:
+        return [self.http_segundos, self.http_peticiones, self.http_bytes, self.sql_segundos,
+                self.sql_lectura, self.sql_filas, self.sql_lentas, self.conexiones]
+
+    def conectar(self, db_name: str, configurar=None, **kwargs) -> sqlite3.Connection:
+        """sqlite3.connect con sentencias medidas.
+
+        Registra el tiempo de apertura incluido configurar(conn) (los pragmas).
+        """
+        inicio = time.perf_counter()
+        conn = sqlite3.connect(db_name, factory=ConexionMedida, **kwargs)
+        conn.metricas = self
+        if configurar is not None:
+            try:
+                configurar(conn)
+            except Exception:
+                conn.close()
+                raise
+        self.conexiones.observar(time.perf_counter() - inicio)
+        return conn
+
+    def observar_sentencia(self, cursor: "CursorMedido", consulta: str, sql: str,
+                           params, segundos: float):
+        self.sql_segundos.observar(segundos, consulta)
+        if self.sql_lento is not None and segundos >= self.sql_lento:
+            self.sql_lentas.incrementar(consulta)
+            self._registrar_lenta(cursor.connection, consulta, sql, params, segundos)
+
+    def _registrar_lenta(self, conn: sqlite3.Connection, consulta: str, sql: str,
+                         params, segundos: float):
+        plan = ''
+        if params is not None and sql.lstrip().upper().startswith(_EXPLICABLES):
+            try:
+                filas = conn.cursor(sqlite3.Cursor).execute(
+                    f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+                plan = '\n'.join(f"  {fila[3]}" for fila in filas)
+            except sqlite3.Error as e:
+                plan = f"  (sin plan: {e})"
+        # Los parámetros no se registran: pueden contener datos personales
+        registro_lentas.warning("Consulta lenta %.1f ms en %s: %s\n%s",
+                                segundos * 1000, consulta, ' '.join(sql.split()), plan)
+
+    def exportar(self, extra: List[str] = None) -> str:
+        """Texto en formato de exposición de Prometheus (versión 0.0.4)"""
+        lineas = []
+        for metrica in self.todas():
+            lineas.append(f"# HELP {metrica.nombre} {metrica.ayuda}")
+            lineas.append(f"# TYPE {metrica.nombre} {metrica.tipo}")
+            lineas.extend(metrica.muestras())
+        if extra:
+            lineas.extend(extra)
+        return '\n'.join(lineas) + '\n'
+
+
+def gauge(nombre: str, ayuda: str, valores: Dict[Tuple, float], etiquetas: Sequence[str] = ()) -> List[str]:
+    """Líneas de un gauge calculado al exportar (p. ej. estado del pool)"""
+    lineas = [f"# HELP {nombre} {ayuda}", f"# TYPE {nombre} gauge"]
+    lineas.extend(f"{nombre}{_etiquetas(etiquetas, clave)} {_numero(valor)}"
+                  for clave, valor in sorted(valores.items()))
+    return lineas
+
+
+class CursorMedido(sqlite3.Cursor):
+    """Cursor que mide cada sentencia y las filas leídas.
+
+    La etiqueta de cada sentencia es el nombre de la función que la ejecuta
+    (p. ej. get_all_vehiculos), así la cantidad de series queda acotada.
+    """
+
+    _consulta = '?'
+
+    def _medir(self, metodo, consulta: str, sql: str, params):
+        self._consulta = consulta
+        inicio = time.perf_counter()
+        try:
+            return metodo(self, sql, params)
+        finally:
+            # executemany: los parámetros son filas, no sirven para el plan
+            self.connection.metricas.observar_sentencia(
+                self, consulta, sql, params if metodo is sqlite3.Cursor.execute else None,
+                time.perf_counter() - inicio)
+
+    def execute(self, sql, params=()):
+        return self._medir(sqlite3.Cursor.execute, sys._getframe(1).f_code.co_name, sql, params)
+
+    def executemany(self, sql, params):
+        return self._medir(sqlite3.Cursor.executemany, sys._getframe(1).f_code.co_name,
+                           sql, params)
+
+    def _leer(self, filas, inicio: float):
+        metricas = self.connection.metricas
+        metricas.sql_lectura.incrementar(self._consulta, valor=time.perf_counter() - inicio)
+        metricas.sql_filas.incrementar(self._consulta, valor=filas)
+
+    def fetchone(self):
+        inicio = time.perf_counter()
+        fila = super().fetchone()
+        self._leer(0 if fila is None else 1, inicio)
+        return fila
+
+    def fetchmany(self, size=None):
+        inicio = time.perf_counter()
+        filas = super().fetchmany(self.arraysize if size is None else size)
+        self._leer(len(filas), inicio)
+        return filas
+
+    def fetchall(self):
+        inicio = time.perf_counter()
+        filas = super().fetchall()
+        self._leer(len(filas), inicio)
+        return filas
+
+
+class ConexionMedida(sqlite3.Connection):
+    """Conexión cuyos cursores son CursorMedido (ver Metricas.conectar)"""
+
+    metricas: Optional[Metricas] = None
+
+    def cursor(self, factory=CursorMedido):
+        return super().cursor(factory)
+
+    def execute(self, sql, params=()):
+        cursor = self.cursor()
+        return cursor._medir(sqlite3.Cursor.execute, sys._getframe(1).f_code.co_name, sql, params)
+
+    def executemany(self, sql, params):
+        cursor = self.cursor()
+        return cursor._medir(sqlite3.Cursor.executemany, sys._getframe(1).f_code.co_name,
+                             sql, params)
+
+
+class MedidorWSGI:
+    """Middleware WSGI que mide latencia, código y tamaño de cada respuesta.
+
+    La ruta es la regla de Flask (p. ej. /api/vehiculos/<int:vehiculo_id>) que
+    la aplicación deja en environ[CLAVE_RUTA]; sin regla se usa "sin_ruta",
+    así las URLs inexistentes no crean series nuevas. La medición termina al
+    cerrar la respuesta, de modo que incluye el envío de los streams.
+    """
+
+    CLAVE_RUTA = 'automotores.ruta'
+
+    def __init__(self, app, metricas: Metricas):
+        self.app = app
+        self.metricas = metricas
+
+    def __call__(self, environ, start_response):
+        inicio = time.perf_counter()
+        estado = ['500']
+
+        def start_response_medido(status, headers, exc_info=None):
+            estado[0] = status.split(' ', 1)[0]
+            return start_response(status, headers, exc_info)
+
+        try:
+            cuerpo = self.app(environ, start_response_medido)
+        except Exception:
+            self._registrar(environ, estado[0], 0, inicio)
+            raise
+        return _CuerpoMedido(cuerpo, self, environ, estado, inicio)
+
+    def _registrar(self, environ, estado: str, tamano: int, inicio: float):
+        metodo = environ.get('REQUEST_METHOD', '')
+        ruta = environ.get(self.CLAVE_RUTA, 'sin_ruta')
+        self.metricas.http_segundos.observar(time.perf_counter() - inicio, metodo, ruta)
+        self.metricas.http_peticiones.incrementar(metodo, ruta, estado)
+        self.metricas.http_bytes.observar(tamano, metodo, ruta)
+
+
+class _CuerpoMedido:
+    """Iterable de respuesta que cuenta bytes y registra al cerrarse"""
+
+    def __init__(self, cuerpo, medidor: MedidorWSGI, environ, estado: list, inicio: float):
+        self._cuerpo = cuerpo
+        self._medidor = medidor
+        self._environ = environ
+        self._estado = estado
+        self._inicio = inicio
+        self._tamano = 0
+
+    def __iter__(self):
+        for parte in self._cuerpo:
+            self._tamano += len(parte)
+            yield parte
+
+    def close(self):
+        try:
+            if hasattr(self._cuerpo, 'close'):
+                self._cuerpo.close()
+        finally:
+            self._medidor._registrar(self._environ, self._estado[0], self._tamano, self._inicio)
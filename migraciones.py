@@ -0,0 +1,368 @@
+# ===========================================
+# MIGRACIONES DE ESQUEMA - SISTEMA AUTOMOTORES
+# ===========================================
+#
+# Cada migración tiene un número de versión correlativo. La versión aplicada
+# se guarda en PRAGMA user_version, de modo que al iniciar solo se ejecutan
+# las migraciones pendientes, cada una en su propia transacción.
+
+import sqlite3
+from typing import Callable, List, Tuple
+
+from analitica import crear_analitica
+from busqueda import crear_indices_busqueda
+from preventivo import crear_preventivo
+from resumenes import crear_resumenes
+
+
+def _columnas(cursor: sqlite3.Cursor, tabla: str) -> List[str]:
+    cursor.execute(f"PRAGMA table_info({tabla})")
+    return [row[1] for row in cursor.fetchall()]
+
+
+def _agregar_columna(cursor: sqlite3.Cursor, tabla: str, columna: str, tipo: str):
+    """Agrega una columna solo si la tabla aún no la tiene"""
+    if columna not in _columnas(cursor, tabla):
+        cursor.execute(f"ALTER TABLE {tabla} ADD COLUMN {columna} {tipo}")
+
+
+def _migracion_001_esquema_base(cursor: sqlite3.Cursor):
+    """Tablas originales del sistema.
+
+    Usa IF NOT EXISTS y agrega las columnas incorporadas después, así sirve
+    tanto para bases nuevas como para bases creadas antes de las migraciones.
+    """
+    # Crear tabla de propietarios
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS propietarios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT NOT NULL,
+            apellido TEXT NOT NULL,
+            rut TEXT UNIQUE NOT NULL,
+            tipo_personal TEXT,
+            telefono TEXT,
+            email TEXT,
+            fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    _agregar_columna(cursor, 'propietarios', 'tipo_personal', 'TEXT')
+
+    # Crear tabla de vehículos
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS vehiculos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            propietario_id INTEGER NOT NULL,
+            marca TEXT NOT NULL,
+            modelo TEXT NOT NULL,
+            año INTEGER,
+            color TEXT,
+            kilometraje INTEGER DEFAULT 0,
+            patente TEXT UNIQUE,
+            fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (propietario_id) REFERENCES propietarios (id)
+        )
+    ''')
+
+    # Crear tabla de mantenimientos
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS mantenimientos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            vehiculo_id INTEGER NOT NULL,
+            fecha_mantenimiento DATE NOT NULL,
+            tipo_mantenimiento TEXT NOT NULL,
+            kilometraje_anterior INTEGER,
+            kilometraje_actual INTEGER,
+            kilometros_recorridos INTEGER,
+            descripcion TEXT,
+            costo REAL,
+            taller TEXT,
+            foto_url TEXT,
+            fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (vehiculo_id) REFERENCES vehiculos (id)
+        )
+    ''')
+    _agregar_columna(cursor, 'mantenimientos', 'kilometros_recorridos', 'INTEGER')
+
+    # Crear tabla de viajes
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS viajes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            vehiculo_id INTEGER NOT NULL,
+            propietario_id INTEGER NOT NULL,
+            tipo_personal TEXT,
+            destino TEXT NOT NULL,
+            fecha_salida DATE NOT NULL,
+            fecha_llegada DATE,
+            kilometraje_salida INTEGER NOT NULL,
+            kilometraje_llegada INTEGER,
+            combustible_inicial REAL,
+            combustible_final REAL,
+            combustible_consumido REAL,
+            costo_combustible REAL,
+            observaciones TEXT,
+            estado TEXT DEFAULT 'En curso',
+            fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (vehiculo_id) REFERENCES vehiculos (id),
+            FOREIGN KEY (propietario_id) REFERENCES propietarios (id)
+        )
+    ''')
+    _agregar_columna(cursor, 'viajes', 'tipo_personal', 'TEXT')
+
+    # Crear tabla de tickets de rendición
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS tickets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            fecha DATE NOT NULL,
+            sistema TEXT NOT NULL CHECK (sistema IN ('viajes','mantenimientos')),
+            referencia_id INTEGER,
+            descripcion TEXT,
+            fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Crear tabla de presupuesto
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS presupuesto (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tipo_movimiento TEXT NOT NULL CHECK (tipo_movimiento IN ('ingreso', 'egreso')),
+            categoria TEXT NOT NULL,
+            descripcion TEXT NOT NULL,
+            monto REAL NOT NULL,
+            fecha_movimiento DATE NOT NULL,
+            metodo_pago TEXT,
+            referencia TEXT,
+            fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Crear tabla de información adicional de propietarios
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS propietarios_info (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            propietario_id INTEGER NOT NULL,
+            direccion TEXT,
+            fecha_nacimiento DATE,
+            profesion TEXT,
+            empresa TEXT,
+            telefono_emergencia TEXT,
+            contacto_emergencia TEXT,
+            notas TEXT,
+            fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (propietario_id) REFERENCES propietarios (id)
+        )
+    ''')
+
+
+def _migracion_002_indices(cursor: sqlite3.Cursor):
+    """Índices sobre claves foráneas y columnas de ordenamiento"""
+    indices = [
+        # Listado de propietarios ordenado por nombre
+        "CREATE INDEX IF NOT EXISTS idx_propietarios_nombre ON propietarios (nombre, apellido)",
+        # get_vehiculos_by_propietario: filtro + orden por marca/modelo
+        "CREATE INDEX IF NOT EXISTS idx_vehiculos_propietario ON vehiculos (propietario_id, marca, modelo)",
+        # get_mantenimientos_by_vehiculo y conteo de mantenimientos por vehículo
+        "CREATE INDEX IF NOT EXISTS idx_mantenimientos_vehiculo_fecha ON mantenimientos (vehiculo_id, fecha_mantenimiento DESC)",
+        # get_all_mantenimientos ORDER BY fecha_mantenimiento DESC
+        "CREATE INDEX IF NOT EXISTS idx_mantenimientos_fecha ON mantenimientos (fecha_mantenimiento DESC)",
+        # get_viajes_by_vehiculo
+        "CREATE INDEX IF NOT EXISTS idx_viajes_vehiculo_fecha ON viajes (vehiculo_id, fecha_salida DESC)",
+        # get_all_viajes ORDER BY v.fecha_salida DESC
+        "CREATE INDEX IF NOT EXISTS idx_viajes_fecha_salida ON viajes (fecha_salida DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_viajes_propietario ON viajes (propietario_id)",
+        # get_movimientos_presupuesto (con y sin filtro por tipo)
+        "CREATE INDEX IF NOT EXISTS idx_presupuesto_fecha ON presupuesto (fecha_movimiento DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_presupuesto_tipo_fecha ON presupuesto (tipo_movimiento, fecha_movimiento DESC)",
+        # Cubre los totales por tipo y por categoría sin leer la tabla
+        "CREATE INDEX IF NOT EXISTS idx_presupuesto_tipo_categoria ON presupuesto (tipo_movimiento, categoria, monto)",
+        # get_all_tickets ORDER BY fecha DESC, id DESC
+        "CREATE INDEX IF NOT EXISTS idx_tickets_fecha ON tickets (fecha DESC, id DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_propietarios_info_propietario ON propietarios_info (propietario_id)",
+    ]
+    for sql in indices:
+        cursor.execute(sql)
+    cursor.execute("ANALYZE")
+
+
+def _migracion_003_indices_paginacion(cursor: sqlite3.Cursor):
+    """Índices ascendentes para el orden (fecha DESC, id DESC) de la paginación.
+
+    Un índice (fecha) ya lleva el rowid al final, así que recorrido hacia atrás
+    entrega exactamente fecha DESC, id DESC; los índices (fecha DESC) de la
+    migración 2 dejaban el id en sentido contrario y forzaban un ordenamiento.
+    """
+    indices = [
+        ('idx_mantenimientos_vehiculo_fecha', 'mantenimientos (vehiculo_id, fecha_mantenimiento)'),
+        ('idx_mantenimientos_fecha', 'mantenimientos (fecha_mantenimiento)'),
+        ('idx_viajes_vehiculo_fecha', 'viajes (vehiculo_id, fecha_salida)'),
+        ('idx_viajes_fecha_salida', 'viajes (fecha_salida)'),
+        ('idx_presupuesto_fecha', 'presupuesto (fecha_movimiento)'),
+        ('idx_presupuesto_tipo_fecha', 'presupuesto (tipo_movimiento, fecha_movimiento)'),
+        ('idx_tickets_fecha', 'tickets (fecha)'),
+    ]
+    for nombre, definicion in indices:
+        cursor.execute(f"DROP INDEX IF EXISTS {nombre}")
+        cursor.execute(f"CREATE INDEX {nombre} ON {definicion}")
+
+
+def _migracion_004_indices_estadisticas(cursor: sqlite3.Cursor):
+    """Índices que cubren los agregados de get_estadisticas_generales"""
+    # GROUP BY marca sin tabla temporal
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_vehiculos_marca ON vehiculos (marca)")
+    # SUM(costo) leyendo solo el índice
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_mantenimientos_costo ON mantenimientos (costo)")
+
+
+def _migracion_005_resumenes(cursor: sqlite3.Cursor):
+    """Tablas de resumen del dashboard mantenidas por triggers"""
+    crear_resumenes(cursor)
+
+
+# Tablas cuyas modificaciones cuentan para los ETag de la API
+TABLAS_VERSIONADAS = ['propietarios', 'vehiculos', 'mantenimientos', 'viajes',
+                      'tickets', 'presupuesto', 'propietarios_info']
+
+
+def _migracion_006_versiones_tablas(cursor: sqlite3.Cursor):
+    """Contador de cambios por tabla, incrementado por triggers.
+
+    Lo usa la API para responder 304 Not Modified sin consultar los datos.
+    Los triggers cubren también escrituras hechas fuera de DatabaseManager.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS versiones_tablas (
+            tabla TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0,
+            modificado TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    for tabla in TABLAS_VERSIONADAS:
+        cursor.execute("INSERT OR IGNORE INTO versiones_tablas (tabla) VALUES (?)", (tabla,))
+        for evento, sufijo in (('INSERT', 'ins'), ('UPDATE', 'upd'), ('DELETE', 'del')):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_version_{tabla}_{sufijo}
+                AFTER {evento} ON {tabla}
+                BEGIN
+                    UPDATE versiones_tablas
+                    SET version = version + 1, modificado = CURRENT_TIMESTAMP
+                    WHERE tabla = '{tabla}';
+                END
+            ''')
+
+
+def _migracion_007_busqueda(cursor: sqlite3.Cursor):
+    """Índices de texto completo para la búsqueda en el servidor"""
+    crear_indices_busqueda(cursor)
+
+
+def _migracion_008_indices_filtros(cursor: sqlite3.Cursor):
+    """Índices (columna filtrada, fecha) para los filtros de los listados.
+
+    Con igualdad en la primera columna el índice ya entrega el orden por fecha
+    de la paginación, así una página filtrada no ordena todas las coincidencias.
+    """
+    indices = [
+        "CREATE INDEX IF NOT EXISTS idx_viajes_estado_fecha ON viajes (estado, fecha_salida)",
+        "CREATE INDEX IF NOT EXISTS idx_mantenimientos_tipo_fecha ON mantenimientos (tipo_mantenimiento, fecha_mantenimiento)",
+        "CREATE INDEX IF NOT EXISTS idx_presupuesto_categoria_fecha ON presupuesto (categoria, fecha_movimiento)",
+        "CREATE INDEX IF NOT EXISTS idx_tickets_sistema_fecha ON tickets (sistema, fecha)",
+    ]
+    for sql in indices:
+        cursor.execute(sql)
+
+
+def _migracion_009_analitica(cursor: sqlite3.Cursor):
+    """Resumen mensual por vehículo para la analítica de flota"""
+    crear_analitica(cursor)
+
+
+def _migracion_010_preventivo(cursor: sqlite3.Cursor):
+    """Reglas de mantenimiento preventivo y plan de próximos servicios"""
+    crear_preventivo(cursor)
+
+
+def _migracion_011_kilometraje_vehiculos(cursor: sqlite3.Cursor):
+    """Puntero al último viaje cerrado y odómetro al día desde los viajes existentes.
+
+    vehiculos.kilometraje pasa a ser el odómetro vigente: cerrar un viaje lo
+    adelanta en la misma transacción (ver DatabaseManager.update_viaje).
+    """
+    _agregar_columna(cursor, 'vehiculos', 'ultimo_viaje_id', 'INTEGER')
+    cursor.execute('''
+        UPDATE vehiculos SET
+            ultimo_viaje_id = (
+                SELECT vi.id FROM viajes vi
+                WHERE vi.vehiculo_id = vehiculos.id AND vi.kilometraje_llegada IS NOT NULL
+                ORDER BY vi.kilometraje_llegada DESC, vi.id DESC LIMIT 1),
+            kilometraje = MAX(COALESCE(kilometraje, 0), COALESCE(
+                (SELECT MAX(vi.kilometraje_llegada) FROM viajes vi WHERE vi.vehiculo_id = vehiculos.id), 0))
+    ''')
+
+
+def _migracion_012_rut_normalizado(cursor: sqlite3.Cursor):
+    """RUT guardados sin puntos ni espacios y en mayúscula (ver rut.py).
+
+    Antes la API y la importación los guardaban tal como se escribían. Si dos
+    filas quedan con el mismo RUT, la segunda conserva el suyo (OR IGNORE)
+    para que el índice único no haga fallar la migración.
+    """
+    cursor.execute('''
+        UPDATE OR IGNORE propietarios
+        SET rut = UPPER(TRIM(REPLACE(REPLACE(rut, '.', ''), ' ', '')))
+        WHERE rut <> UPPER(TRIM(REPLACE(REPLACE(rut, '.', ''), ' ', '')))
+    ''')
+
+
+# (versión, descripción, función). Agregar siempre al final con versión correlativa.
+MIGRACIONES: List[Tuple[int, str, Callable[[sqlite3.Cursor], None]]] = [
+    (1, 'Esquema base', _migracion_001_esquema_base),
+    (2, 'Índices de claves foráneas y ordenamiento', _migracion_002_indices),
+    (3, 'Índices para paginación por cursor', _migracion_003_indices_paginacion),
+    (4, 'Índices para estadísticas generales', _migracion_004_indices_estadisticas),
+    (5, 'Resúmenes materializados para el dashboard', _migracion_005_resumenes),
+    (6, 'Contadores de cambios por tabla para ETag', _migracion_006_versiones_tablas),
+    (7, 'Índices FTS5 de búsqueda', _migracion_007_busqueda),
+    (8, 'Índices para filtros de listados', _migracion_008_indices_filtros),
+    (9, 'Resumen mensual de flota para analítica', _migracion_009_analitica),
+    (10, 'Mantenimiento preventivo por reglas', _migracion_010_preventivo),
+    (11, 'Odómetro y último viaje en vehículos', _migracion_011_kilometraje_vehiculos),
+    (12, 'RUT normalizados', _migracion_012_rut_normalizado),
+]
+
+VERSION_ESQUEMA = MIGRACIONES[-1][0]
+
+
+def version_actual(conn: sqlite3.Connection) -> int:
+    """Versión de esquema registrada en la base"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def aplicar_migraciones(conn: sqlite3.Connection) -> List[int]:
+    """Aplica las migraciones pendientes y devuelve las versiones aplicadas.
+
+    Con el esquema al día solo se lee user_version una vez: no se ejecuta DDL
+    ni se toma el bloqueo de escritura.
+    """
+    aplicadas = []
+    actual = version_actual(conn)
+    if actual >= VERSION_ESQUEMA:
+        return aplicadas
+    for version, _descripcion, migracion in MIGRACIONES:
+        if version <= actual:
+            continue
+        cursor = conn.cursor()
+        try:
+            # BEGIN IMMEDIATE: dos procesos arrancando a la vez no migran en paralelo
+            cursor.execute("BEGIN IMMEDIATE")
+            actual = version_actual(conn)
+            if version <= actual:
+                conn.rollback()
+                continue
+            migracion(cursor)
+            cursor.execute(f"PRAGMA user_version = {int(version)}")
+            conn.commit()
+            actual = version
+        except Exception:
+            conn.rollback()
+            raise
+        aplicadas.append(version)
+    return aplicadas
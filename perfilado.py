@@ -0,0 +1,336 @@
+# ===========================================
+# PERFILADO EN PRODUCCIÓN - SISTEMA AUTOMOTORES
+# ===========================================
+#
+# Dos modos, ambos desactivados si no se configura un secreto:
+#
+#   - Por petición: con la cabecera "X-Perfil: <secreto>" (o ?_perfil=<secreto>)
+#     la petición corre bajo cProfile, incluido el envío de la respuesta (los
+#     streams se consumen dentro del perfil). El resultado separa el tiempo en
+#     SQL, conversión de filas a dict (filas.filas_a_dict) y
+#     serialización JSON, y lista las funciones más costosas. Se guarda en
+#     memoria (cabecera X-Perfil-Id en la respuesta) o, con
+#     "X-Perfil-Modo: respuesta", se devuelve en lugar de la respuesta.
+#     Se perfila una petición por vez en cada proceso (desde Python 3.12 no
+#     puede haber dos cProfile activos): mientras una corre, otra petición
+#     con el secreto recibe 503 con Retry-After.
+#
+#   - Agregado: un hilo muestrea cada intervalo_ms las pilas de los hilos que
+#     están atendiendo peticiones y acumula cuántas veces aparece cada pila;
+#     las N más frecuentes son las pilas donde más tiempo se pasa. Su costo no
+#     depende de la cantidad de llamadas, así que sirve para dejarlo andando.
+#
+# Los perfiles son del proceso que atendió la petición.
+
+import cProfile
+import hmac
+import itertools
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode
+
+# Parámetros de la URL que usa el perfilado; se quitan antes de llegar a la aplicación
+PARAMETROS_PERFIL = ('_perfil', '_perfil_modo')
+
+# environ[CLAVE_AUTORIZADO] es True si la petición trae el secreto; las rutas
+# que consultan los perfiles (RUTA_PERFILES) lo usan y no se perfilan
+CLAVE_AUTORIZADO = 'automotores.perfil_autorizado'
+RUTA_PERFILES = '/api/perfiles'
+
+# Funciones de C del módulo sqlite3 (ejecutar sentencias, leer filas, commit...).
+# Con las métricas SQL activas cProfile las nombra por la subclase que las
+# sobrescribe ("<function CursorMedido.execute ...>").
+_SQLITE = ('sqlite3.Cursor', 'sqlite3.Connection', '_sqlite3.connect',
+           'function CursorMedido.', 'function ConexionMedida.')
+
+_SEPARADOR_JSON = os.path.join('json', '__init__.py')
+_ARCHIVO_FILAS = os.sep + 'filas.py'
+
+# Directorio de la aplicación: sus archivos se muestran sin ruta
+_RAIZ = os.path.dirname(os.path.abspath(__file__)) + os.sep
+
+
+def _nombre_funcion(archivo: str, linea: int, funcion: str) -> str:
+    if archivo == '~':
+        return funcion
+    if archivo.startswith(_RAIZ):
+        archivo = archivo[len(_RAIZ):]
+    return f"{archivo}:{linea}({funcion})"
+
+
+def _es_conversion_filas(archivo: str, funcion: str) -> bool:
+    """filas.filas_a_dict, por donde pasa toda conversión de filas a dict.
+
+    Se mide por nombre (y tiempo acumulado) porque desde Python 3.12 las
+    comprensiones no tienen marco propio y no aparecen en el perfil.
+    """
+    return funcion == 'filas_a_dict' and archivo.endswith(_ARCHIVO_FILAS)
+
+
+def desglosar(perfil: cProfile.Profile, total: float, top: int = 30) -> Dict:
+    """Reparte el tiempo del perfil en SQL, filas a dict, JSON y resto"""
+    estadisticas = pstats.Stats(perfil).stats
+    sql = filas = serializacion = 0.0
+    sentencias = 0
+    for (archivo, linea, funcion), (_cc, llamadas, propio, acumulado, _quienes) in estadisticas.items():
+        if archivo == '~' and any(modulo in funcion for modulo in _SQLITE):
+            sql += propio
+            if 'execute' in funcion:
+                sentencias += llamadas
+        elif _es_conversion_filas(archivo, funcion):
+            filas += acumulado
+        elif funcion == 'dumps' and archivo.endswith(_SEPARADOR_JSON):
+            serializacion += acumulado
+
+    funciones = sorted(estadisticas.items(), key=lambda item: item[1][3], reverse=True)[:top]
+    return {
+        'total_ms': round(total * 1000, 3),
+        'sql_ms': round(sql * 1000, 3),
+        'sentencias_sql': sentencias,
+        'filas_a_dict_ms': round(filas * 1000, 3),
+        'json_ms': round(serializacion * 1000, 3),
+        'resto_ms': round(max(total - sql - filas - serializacion, 0) * 1000, 3),
+        'funciones': [{
+            'funcion': _nombre_funcion(*clave),
+            'llamadas': llamadas,
+            'propio_ms': round(propio * 1000, 3),
+            'acumulado_ms': round(acumulado * 1000, 3),
+        } for clave, (_cc, llamadas, propio, acumulado, _quienes) in funciones],
+    }
+
+
+class Muestreador:
+    """Perfilador por muestreo de las pilas de los hilos que atienden peticiones"""
+
+    def __init__(self, intervalo_ms: float = 5.0, profundidad: int = 40, max_pilas: int = 5000):
+        if not 0 < intervalo_ms < float('inf'):
+            raise ValueError("intervalo_ms debe ser un número mayor que cero")
+        self.intervalo = intervalo_ms / 1000.0
+        self.profundidad = profundidad
+        self.max_pilas = max_pilas
+        self._pilas: Counter = Counter()
+        self._activos: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+        self.muestras = 0
+        self.inicio = time.time()
+        self._hilo = threading.Thread(target=self._muestrear, name='perfil-muestreo', daemon=True)
+        self._hilo.start()
+
+    def entrar(self):
+        """El hilo actual empieza a atender una petición"""
+        ident = threading.get_ident()
+        with self._lock:
+            self._activos[ident] = self._activos.get(ident, 0) + 1
+
+    def salir(self):
+        ident = threading.get_ident()
+        with self._lock:
+            if self._activos.get(ident, 0) <= 1:
+                self._activos.pop(ident, None)
+            else:
+                self._activos[ident] -= 1
+
+    def _pila(self, frame) -> str:
+        """Pila de afuera hacia adentro, en formato "colapsado" (a;b;c)"""
+        nombres = []
+        while frame is not None and len(nombres) < self.profundidad:
+            codigo = frame.f_code
+            nombres.append(_nombre_funcion(codigo.co_filename, codigo.co_firstlineno, codigo.co_name))
+            frame = frame.f_back
+        return ';'.join(reversed(nombres))
+
+    def _muestrear(self):
+        while not self._detener.wait(self.intervalo):
+            with self._lock:
+                activos = list(self._activos)
+            if not activos:
+                continue
+            frames = sys._current_frames()
+            pilas = [self._pila(frames[ident]) for ident in activos if ident in frames]
+            with self._lock:
+                self._pilas.update(pilas)
+                self.muestras += len(pilas)
+                if len(self._pilas) > self.max_pilas:
+                    # Acota la memoria: se descartan las pilas vistas una sola vez
+                    for pila in [p for p, n in self._pilas.items() if n <= 1]:
+                        del self._pilas[pila]
+
+    def top(self, n: int = 20) -> Dict:
+        with self._lock:
+            pilas = self._pilas.most_common(n)
+            muestras = self.muestras
+        return {
+            'intervalo_ms': self.intervalo * 1000,
+            'segundos': round(time.time() - self.inicio, 1),
+            'muestras': muestras,
+            'pilas': [{
+                'pila': pila.split(';'),
+                'muestras': cantidad,
+                'ms_aprox': round(cantidad * self.intervalo * 1000, 1),
+                'porcentaje': round(100.0 * cantidad / muestras, 2) if muestras else 0.0,
+            } for pila, cantidad in pilas],
+        }
+
+    def detener(self):
+        self._detener.set()
+        self._hilo.join()
+
+
+class PerfiladorWSGI:
+    """Middleware WSGI del perfilado por petición y del modo agregado.
+
+    Sin secreto configurado no hace nada más que delegar en la aplicación.
+    """
+
+    def __init__(self, app, secreto: str = None, guardar: int = 50):
+        self.app = app
+        self.secreto = secreto
+        self.guardar = guardar
+        self.muestreador: Optional[Muestreador] = None
+        self._perfiles: "OrderedDict[int, Dict]" = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        # Un solo cProfile activo por proceso
+        self._perfilando = threading.Lock()
+
+    def autorizado(self, valor: Optional[str]) -> bool:
+        """Compara en tiempo constante con el secreto (falso si no hay secreto)"""
+        if not self.secreto or not valor:
+            return False
+        return hmac.compare_digest(valor.encode('utf-8'), self.secreto.encode('utf-8'))
+
+    def __call__(self, environ, start_response):
+        if not self.secreto:
+            return self.app(environ, start_response)
+
+        parametros = parse_qsl(environ.get('QUERY_STRING', ''), keep_blank_values=True)
+        propios = {clave: valor for clave, valor in parametros if clave in PARAMETROS_PERFIL}
+        if propios:
+            environ['QUERY_STRING'] = urlencode(
+                [(clave, valor) for clave, valor in parametros if clave not in PARAMETROS_PERFIL])
+
+        muestreador = self.muestreador
+        autorizado = self.autorizado(environ.get('HTTP_X_PERFIL') or propios.get('_perfil'))
+        environ[CLAVE_AUTORIZADO] = autorizado
+        perfilar = autorizado and not environ.get('PATH_INFO', '').startswith(RUTA_PERFILES)
+        if muestreador is None and not perfilar:
+            return self.app(environ, start_response)
+
+        if muestreador is not None:
+            muestreador.entrar()
+        if perfilar:
+            try:
+                modo = environ.get('HTTP_X_PERFIL_MODO') or propios.get('_perfil_modo') or 'guardar'
+                return self._perfilar(environ, start_response, modo)
+            finally:
+                if muestreador is not None:
+                    muestreador.salir()
+        try:
+            return _CuerpoMuestreado(self.app(environ, start_response), muestreador)
+        except Exception:
+            muestreador.salir()
+            raise
+
+    def _perfilar(self, environ, start_response, modo: str):
+        if not self._perfilando.acquire(blocking=False):
+            cuerpo = json.dumps({'success': False, 'error': 'Ya hay una petición perfilándose'},
+                                ensure_ascii=False).encode('utf-8')
+            start_response('503 SERVICE UNAVAILABLE', [('Content-Type', 'application/json'),
+                                                       ('Content-Length', str(len(cuerpo))),
+                                                       ('Retry-After', '1')])
+            return [cuerpo]
+        try:
+            return self._perfilar_exclusivo(environ, start_response, modo)
+        finally:
+            self._perfilando.release()
+
+    def _perfilar_exclusivo(self, environ, start_response, modo: str):
+        respuesta = {}
+
+        def start_response_diferido(status, headers, exc_info=None):
+            respuesta.update(status=status, headers=list(headers))
+            return lambda dato: None
+
+        perfil = cProfile.Profile()
+        inicio = time.perf_counter()
+        perfil.enable()
+        try:
+            cuerpo = self.app(environ, start_response_diferido)
+            try:
+                partes = [parte for parte in cuerpo]
+            finally:
+                if hasattr(cuerpo, 'close'):
+                    cuerpo.close()
+        finally:
+            perfil.disable()
+        total = time.perf_counter() - inicio
+
+        datos = desglosar(perfil, total)
+        datos.update(metodo=environ.get('REQUEST_METHOD'), ruta=environ.get('PATH_INFO'),
+                     query=environ.get('QUERY_STRING', ''), estado=respuesta.get('status'),
+                     bytes=sum(len(parte) for parte in partes), fecha=time.time(),
+                     pid=os.getpid())
+        with self._lock:
+            datos['id'] = next(self._ids)
+            self._perfiles[datos['id']] = datos
+            while len(self._perfiles) > self.guardar:
+                self._perfiles.popitem(last=False)
+
+        if modo == 'respuesta':
+            cuerpo = json.dumps({'success': True, 'data': datos}, ensure_ascii=False).encode('utf-8')
+            start_response('200 OK', [('Content-Type', 'application/json'),
+                                      ('Content-Length', str(len(cuerpo))),
+                                      ('X-Perfil-Id', str(datos['id']))])
+            return [cuerpo]
+        headers = respuesta.get('headers', []) + [('X-Perfil-Id', str(datos['id']))]
+        start_response(respuesta.get('status', '500 INTERNAL SERVER ERROR'), headers)
+        return partes
+
+    # Perfiles guardados y modo agregado (los usan las rutas de app.py)
+    def listar(self) -> List[Dict]:
+        """Resumen de los perfiles guardados, del más reciente al más antiguo"""
+        with self._lock:
+            perfiles = list(self._perfiles.values())
+        return [{clave: valor for clave, valor in perfil.items() if clave != 'funciones'}
+                for perfil in reversed(perfiles)]
+
+    def obtener(self, perfil_id: int) -> Optional[Dict]:
+        with self._lock:
+            return self._perfiles.get(perfil_id)
+
+    def iniciar_agregado(self, intervalo_ms: float = 5.0) -> Muestreador:
+        """Activa (o reinicia) el muestreo de pilas"""
+        self.detener_agregado()
+        self.muestreador = Muestreador(intervalo_ms)
+        return self.muestreador
+
+    def detener_agregado(self):
+        muestreador, self.muestreador = self.muestreador, None
+        if muestreador is not None:
+            muestreador.detener()
+
+
+class _CuerpoMuestreado:
+    """Mantiene el hilo registrado en el muestreo hasta cerrar la respuesta"""
+
+    def __init__(self, cuerpo, muestreador: Optional[Muestreador]):
+        self._cuerpo = cuerpo
+        self._muestreador = muestreador
+
+    def __iter__(self):
+        return iter(self._cuerpo)
+
+    def close(self):
+        try:
+            if hasattr(self._cuerpo, 'close'):
+                self._cuerpo.close()
+        finally:
+            if self._muestreador is not None:
+                self._muestreador.salir()
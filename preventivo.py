@@ -0,0 +1,251 @@
+# ===========================================
+# MANTENIMIENTO PREVENTIVO - SISTEMA AUTOMOTORES
+# ===========================================
+#
+# Reglas por tipo de mantenimiento ("Cambio de aceite" cada 10.000 km o cada
+# 6 meses) y un plan por vehículo con el próximo servicio de cada tipo.
+#
+# El plan se mantiene con triggers:
+#   - al cerrar un viaje solo se sube km_actual de las filas del vehículo
+#     (no se recorre el historial);
+#   - al registrar, modificar o borrar un mantenimiento, o al cambiar una
+#     regla, se recalculan las filas afectadas desde su último servicio.
+#
+# km_restantes y proxima_fecha están indexados: los vencidos y próximos a
+# vencer se leen recorriendo el comienzo de cada índice, como una cola de
+# prioridad, sin revisar toda la flota.
+
+import argparse
+import datetime
+import sqlite3
+import sys
+from typing import Dict, List
+
+from filas import filas_a_dict
+
+# Reglas iniciales para los tipos que ya usan los datos de ejemplo
+REGLAS_INICIALES = [
+    ('Cambio de aceite', 10000, 6),
+    ('Revisión general', 20000, 12),
+    ('Mantenimiento preventivo', 15000, 12),
+    ('Cambio de neumáticos', 40000, 48),
+]
+
+TABLAS = [
+    '''
+    CREATE TABLE IF NOT EXISTS reglas_mantenimiento (
+        tipo_mantenimiento TEXT COLLATE NOCASE PRIMARY KEY,
+        cada_km INTEGER CHECK (cada_km IS NULL OR cada_km > 0),
+        cada_meses INTEGER CHECK (cada_meses IS NULL OR cada_meses > 0),
+        CHECK (cada_km IS NOT NULL OR cada_meses IS NOT NULL)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS plan_mantenimiento (
+        vehiculo_id INTEGER NOT NULL,
+        tipo_mantenimiento TEXT NOT NULL,
+        ultimo_mantenimiento_id INTEGER,          -- NULL: sin servicio registrado
+        ultimo_km INTEGER NOT NULL,
+        ultima_fecha DATE NOT NULL,
+        km_actual INTEGER NOT NULL,
+        proximo_km INTEGER,                       -- NULL si la regla no usa km
+        proxima_fecha DATE,                       -- NULL si la regla no usa meses
+        km_restantes INTEGER GENERATED ALWAYS AS (proximo_km - km_actual) STORED,
+        PRIMARY KEY (vehiculo_id, tipo_mantenimiento)
+    )
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_plan_km_restantes ON plan_mantenimiento (km_restantes)",
+    "CREATE INDEX IF NOT EXISTS idx_plan_proxima_fecha ON plan_mantenimiento (proxima_fecha)",
+]
+
+# Recalcula las filas del plan que cumplen {condicion} (sobre v = vehículo, r = regla).
+# Último servicio: el más reciente del tipo. Su kilometraje es kilometraje_actual si
+# se registró, si no la última llegada de un viaje que salió antes de esa fecha.
+# Sin servicio registrado se cuenta desde la primera lectura conocida del vehículo.
+_RECALCULAR = '''
+    INSERT OR REPLACE INTO plan_mantenimiento (vehiculo_id, tipo_mantenimiento, ultimo_mantenimiento_id,
+                                               ultimo_km, ultima_fecha, km_actual, proximo_km, proxima_fecha)
+    SELECT b.vehiculo_id, b.tipo_mantenimiento, b.ultimo_id, b.ultimo_km, b.ultima_fecha,
+           MAX(b.ultimo_km, b.km_actual),
+           b.ultimo_km + b.cada_km,
+           date(b.ultima_fecha, '+' || b.cada_meses || ' months')
+    FROM (
+        SELECT v.id AS vehiculo_id, r.tipo_mantenimiento, r.cada_km, r.cada_meses, u.id AS ultimo_id,
+               COALESCE(u.fecha_mantenimiento, date(v.fecha_registro)) AS ultima_fecha,
+               COALESCE(
+                   u.kilometraje_actual,
+                   (SELECT MAX(vi.kilometraje_llegada) FROM viajes vi
+                    WHERE vi.vehiculo_id = v.id AND vi.fecha_salida <= u.fecha_mantenimiento),
+                   (SELECT MIN(vi.kilometraje_salida) FROM viajes vi WHERE vi.vehiculo_id = v.id),
+                   v.kilometraje, 0) AS ultimo_km,
+               MAX(COALESCE(v.kilometraje, 0),
+                   COALESCE((SELECT MAX(vi.kilometraje_llegada) FROM viajes vi
+                             WHERE vi.vehiculo_id = v.id), 0)) AS km_actual
+        FROM vehiculos v
+        JOIN reglas_mantenimiento r
+        LEFT JOIN mantenimientos u ON u.id = (
+            SELECT m2.id FROM mantenimientos m2
+            WHERE m2.vehiculo_id = v.id AND r.tipo_mantenimiento = m2.tipo_mantenimiento
+            ORDER BY m2.fecha_mantenimiento DESC, m2.id DESC LIMIT 1)
+        WHERE {condicion}
+    ) b;
+'''
+
+_BORRAR_PLAN = "DELETE FROM plan_mantenimiento WHERE {condicion};"
+
+# Un viaje cerrado o un kilometraje nuevo solo pueden subir km_actual
+_SUBIR_KM = '''
+    UPDATE plan_mantenimiento SET km_actual = {km}
+    WHERE vehiculo_id = {vehiculo} AND km_actual < {km};
+'''
+
+# (nombre, evento, cuerpo)
+_TRIGGERS = [
+    ('trg_plan_viajes_ins', 'AFTER INSERT ON viajes WHEN NEW.kilometraje_llegada IS NOT NULL',
+     _SUBIR_KM.format(km='NEW.kilometraje_llegada', vehiculo='NEW.vehiculo_id')),
+    ('trg_plan_viajes_upd',
+     'AFTER UPDATE OF kilometraje_llegada ON viajes WHEN NEW.kilometraje_llegada IS NOT NULL',
+     _SUBIR_KM.format(km='NEW.kilometraje_llegada', vehiculo='NEW.vehiculo_id')),
+    ('trg_plan_vehiculos_km', 'AFTER UPDATE OF kilometraje ON vehiculos WHEN NEW.kilometraje IS NOT NULL',
+     _SUBIR_KM.format(km='NEW.kilometraje', vehiculo='NEW.id')),
+
+    ('trg_plan_vehiculos_ins', 'AFTER INSERT ON vehiculos',
+     _RECALCULAR.format(condicion='v.id = NEW.id')),
+    ('trg_plan_vehiculos_del', 'AFTER DELETE ON vehiculos',
+     _BORRAR_PLAN.format(condicion='vehiculo_id = OLD.id')),
+
+    ('trg_plan_mantenimientos_ins', 'AFTER INSERT ON mantenimientos',
+     _RECALCULAR.format(condicion='v.id = NEW.vehiculo_id AND r.tipo_mantenimiento = NEW.tipo_mantenimiento')),
+    ('trg_plan_mantenimientos_del', 'AFTER DELETE ON mantenimientos',
+     _RECALCULAR.format(condicion='v.id = OLD.vehiculo_id AND r.tipo_mantenimiento = OLD.tipo_mantenimiento')),
+    ('trg_plan_mantenimientos_upd',
+     'AFTER UPDATE OF vehiculo_id, tipo_mantenimiento, fecha_mantenimiento, kilometraje_actual ON mantenimientos',
+     _RECALCULAR.format(condicion='v.id = OLD.vehiculo_id AND r.tipo_mantenimiento = OLD.tipo_mantenimiento')
+     + _RECALCULAR.format(condicion='v.id = NEW.vehiculo_id AND r.tipo_mantenimiento = NEW.tipo_mantenimiento')),
+
+    ('trg_plan_reglas_ins', 'AFTER INSERT ON reglas_mantenimiento',
+     _RECALCULAR.format(condicion='r.tipo_mantenimiento = NEW.tipo_mantenimiento')),
+    ('trg_plan_reglas_upd', 'AFTER UPDATE ON reglas_mantenimiento',
+     _BORRAR_PLAN.format(condicion='tipo_mantenimiento = OLD.tipo_mantenimiento')
+     + _RECALCULAR.format(condicion='r.tipo_mantenimiento = NEW.tipo_mantenimiento')),
+    ('trg_plan_reglas_del', 'AFTER DELETE ON reglas_mantenimiento',
+     _BORRAR_PLAN.format(condicion='tipo_mantenimiento = OLD.tipo_mantenimiento')),
+]
+
+
+def crear_preventivo(cursor: sqlite3.Cursor):
+    """Crea reglas y plan con sus triggers; insertar las reglas iniciales llena el plan"""
+    for sql in TABLAS:
+        cursor.execute(sql)
+    for nombre, evento, cuerpo in _TRIGGERS:
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {nombre} {evento} BEGIN {cuerpo} END")
+    cursor.executemany('''
+        INSERT OR IGNORE INTO reglas_mantenimiento (tipo_mantenimiento, cada_km, cada_meses)
+        VALUES (?, ?, ?)
+    ''', REGLAS_INICIALES)
+
+
+def validar_regla(cada_km, cada_meses) -> tuple:
+    """Normaliza los intervalos de una regla: enteros positivos, al menos uno definido"""
+    valores = []
+    for nombre, valor in (('cada_km', cada_km), ('cada_meses', cada_meses)):
+        if valor is None or valor == '':
+            valores.append(None)
+            continue
+        try:
+            valor = int(valor)
+        except (TypeError, ValueError):
+            raise ValueError(f"{nombre} debe ser un número entero: {valor!r}")
+        if valor <= 0:
+            raise ValueError(f"{nombre} debe ser mayor que cero")
+        valores.append(valor)
+    if valores == [None, None]:
+        raise ValueError("La regla necesita cada_km, cada_meses o ambos")
+    return tuple(valores)
+
+
+def reconstruir_plan(cursor: sqlite3.Cursor):
+    """Recalcula todo el plan desde el historial (solo para reparar una base)"""
+    cursor.execute("DELETE FROM plan_mantenimiento")
+    cursor.execute(_RECALCULAR.format(condicion='1'))
+
+
+def verificar_plan(cursor: sqlite3.Cursor) -> int:
+    """Cantidad de filas del plan que difieren de recalcularlo desde el historial"""
+    consulta = "SELECT * FROM plan_mantenimiento ORDER BY vehiculo_id, tipo_mantenimiento"
+    guardados = cursor.execute(consulta).fetchall()
+    cursor.execute("SAVEPOINT verificar_plan")
+    try:
+        reconstruir_plan(cursor)
+        reales = cursor.execute(consulta).fetchall()
+    finally:
+        cursor.execute("ROLLBACK TO verificar_plan")
+        cursor.execute("RELEASE verificar_plan")
+    reales = {fila[:2]: fila for fila in reales}
+    guardados = {fila[:2]: fila for fila in guardados}
+    return sum(1 for clave in reales.keys() | guardados.keys() if reales.get(clave) != guardados.get(clave))
+
+
+def pendientes(cursor: sqlite3.Cursor, dias: int = 30, km: int = 1000,
+               hoy: datetime.date = None, limit: int = None) -> List[Dict]:
+    """Servicios vencidos o que vencen dentro de dias o km, del más urgente al menos.
+
+    urgencia es la fracción consumida del intervalo (la mayor entre km y tiempo):
+    1.0 vence hoy / en este km, más de 1.0 está vencido.
+    """
+    hoy = hoy or datetime.date.today()
+    limite_fecha = (hoy + datetime.timedelta(days=dias)).isoformat()
+    cursor.execute(f'''
+        WITH candidatos AS (
+            SELECT vehiculo_id, tipo_mantenimiento FROM plan_mantenimiento WHERE km_restantes <= :km
+            UNION
+            SELECT vehiculo_id, tipo_mantenimiento FROM plan_mantenimiento WHERE proxima_fecha <= :limite_fecha
+        ),
+        medidos AS (
+            SELECT p.*, v.marca || ' ' || v.modelo AS vehiculo_info, v.patente,
+                   r.cada_km, r.cada_meses,
+                   CAST(julianday(p.proxima_fecha) - julianday(:hoy) AS INTEGER) AS dias_restantes,
+                   MAX(COALESCE(1.0 * (p.km_actual - p.ultimo_km) / r.cada_km, 0),
+                       COALESCE((julianday(:hoy) - julianday(p.ultima_fecha))
+                                / NULLIF(julianday(p.proxima_fecha) - julianday(p.ultima_fecha), 0), 0)
+                   ) AS urgencia
+            FROM candidatos c
+            JOIN plan_mantenimiento p USING (vehiculo_id, tipo_mantenimiento)
+            JOIN vehiculos v ON v.id = p.vehiculo_id
+            JOIN reglas_mantenimiento r ON r.tipo_mantenimiento = p.tipo_mantenimiento
+        )
+        SELECT *, ROUND(urgencia, 3) AS urgencia,
+               CASE WHEN km_restantes <= 0 OR proxima_fecha <= :hoy THEN 'vencido' ELSE 'proximo' END AS estado
+        FROM medidos
+        ORDER BY urgencia DESC, vehiculo_id, tipo_mantenimiento
+        {'LIMIT :limit' if limit is not None else ''}
+    ''', {'km': km, 'limite_fecha': limite_fecha, 'hoy': hoy.isoformat(), 'limit': limit})
+    columnas = [d[0] for d in cursor.description]
+    return filas_a_dict(columnas, cursor.fetchall())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('db', nargs='?', default='automotores.db')
+    parser.add_argument('--reparar', action='store_true', help='reconstruye el plan si difiere')
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        distintas = verificar_plan(cursor)
+        print(f"{'✅' if not distintas else '❌'} plan_mantenimiento: {distintas} filas distintas")
+        if distintas and args.reparar:
+            reconstruir_plan(cursor)
+            print("🔧 Plan reconstruido")
+            distintas = 0
+        conn.commit()
+    finally:
+        conn.close()
+
+    sys.exit(1 if distintas else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,261 @@
+# ===========================================
+# RESÚMENES MATERIALIZADOS - SISTEMA AUTOMOTORES
+# ===========================================
+#
+# Tablas con los totales que consulta el dashboard, mantenidas por triggers
+# en cada INSERT/UPDATE/DELETE. Así las estadísticas se leen con búsquedas
+# por clave en lugar de recorrer las tablas.
+#
+# Verificar (y opcionalmente reconstruir) los resúmenes de una base:
+#   python resumenes.py [automotores.db] [--reparar]
+
+import argparse
+import sqlite3
+import sys
+from typing import Dict, List
+
+# Claves de resumen_contadores
+CONTADORES = ('propietarios', 'vehiculos', 'mantenimientos',
+              'costo_mantenimientos', 'ingresos', 'egresos')
+
+TABLAS = [
+    '''
+    CREATE TABLE IF NOT EXISTS resumen_contadores (
+        clave TEXT PRIMARY KEY,
+        valor NUMERIC NOT NULL DEFAULT 0
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS resumen_vehiculos_marca (
+        marca TEXT PRIMARY KEY,
+        cantidad INTEGER NOT NULL
+    )
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_resumen_marca_cantidad ON resumen_vehiculos_marca (cantidad DESC, marca)",
+    '''
+    CREATE TABLE IF NOT EXISTS resumen_presupuesto_categoria (
+        tipo_movimiento TEXT NOT NULL,
+        categoria TEXT NOT NULL,
+        total REAL NOT NULL,
+        cantidad INTEGER NOT NULL,
+        PRIMARY KEY (tipo_movimiento, categoria)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS resumen_mantenimiento_vehiculo (
+        vehiculo_id INTEGER PRIMARY KEY,
+        cantidad INTEGER NOT NULL,
+        costo_total REAL NOT NULL
+    )
+    ''',
+]
+
+# Fragmentos reutilizados por los triggers
+_SUMAR_MARCA = '''
+    INSERT INTO resumen_vehiculos_marca (marca, cantidad) VALUES ({fila}.marca, 1)
+    ON CONFLICT (marca) DO UPDATE SET cantidad = cantidad + 1;
+'''
+_RESTAR_MARCA = '''
+    UPDATE resumen_vehiculos_marca SET cantidad = cantidad - 1 WHERE marca = {fila}.marca;
+    DELETE FROM resumen_vehiculos_marca WHERE marca = {fila}.marca AND cantidad <= 0;
+'''
+_SUMAR_MANTENIMIENTO = '''
+    UPDATE resumen_contadores SET valor = valor + 1 WHERE clave = 'mantenimientos';
+    UPDATE resumen_contadores SET valor = valor + COALESCE({fila}.costo, 0) WHERE clave = 'costo_mantenimientos';
+    INSERT INTO resumen_mantenimiento_vehiculo (vehiculo_id, cantidad, costo_total)
+    VALUES ({fila}.vehiculo_id, 1, COALESCE({fila}.costo, 0))
+    ON CONFLICT (vehiculo_id) DO UPDATE SET cantidad = cantidad + 1,
+                                            costo_total = costo_total + excluded.costo_total;
+'''
+_RESTAR_MANTENIMIENTO = '''
+    UPDATE resumen_contadores SET valor = valor - 1 WHERE clave = 'mantenimientos';
+    UPDATE resumen_contadores SET valor = valor - COALESCE({fila}.costo, 0) WHERE clave = 'costo_mantenimientos';
+    UPDATE resumen_mantenimiento_vehiculo
+    SET cantidad = cantidad - 1, costo_total = costo_total - COALESCE({fila}.costo, 0)
+    WHERE vehiculo_id = {fila}.vehiculo_id;
+    DELETE FROM resumen_mantenimiento_vehiculo WHERE vehiculo_id = {fila}.vehiculo_id AND cantidad <= 0;
+'''
+_SUMAR_MOVIMIENTO = '''
+    UPDATE resumen_contadores SET valor = valor + {fila}.monto
+    WHERE clave = CASE {fila}.tipo_movimiento WHEN 'ingreso' THEN 'ingresos' ELSE 'egresos' END;
+    INSERT INTO resumen_presupuesto_categoria (tipo_movimiento, categoria, total, cantidad)
+    VALUES ({fila}.tipo_movimiento, {fila}.categoria, {fila}.monto, 1)
+    ON CONFLICT (tipo_movimiento, categoria) DO UPDATE SET total = total + excluded.total,
+                                                           cantidad = cantidad + 1;
+'''
+_RESTAR_MOVIMIENTO = '''
+    UPDATE resumen_contadores SET valor = valor - {fila}.monto
+    WHERE clave = CASE {fila}.tipo_movimiento WHEN 'ingreso' THEN 'ingresos' ELSE 'egresos' END;
+    UPDATE resumen_presupuesto_categoria
+    SET total = total - {fila}.monto, cantidad = cantidad - 1
+    WHERE tipo_movimiento = {fila}.tipo_movimiento AND categoria = {fila}.categoria;
+    DELETE FROM resumen_presupuesto_categoria
+    WHERE tipo_movimiento = {fila}.tipo_movimiento AND categoria = {fila}.categoria AND cantidad <= 0;
+'''
+
+# (nombre, evento, cuerpo)
+_TRIGGERS = [
+    ('trg_resumen_propietarios_ins', 'AFTER INSERT ON propietarios',
+     "UPDATE resumen_contadores SET valor = valor + 1 WHERE clave = 'propietarios';"),
+    ('trg_resumen_propietarios_del', 'AFTER DELETE ON propietarios',
+     "UPDATE resumen_contadores SET valor = valor - 1 WHERE clave = 'propietarios';"),
+
+    ('trg_resumen_vehiculos_ins', 'AFTER INSERT ON vehiculos',
+     "UPDATE resumen_contadores SET valor = valor + 1 WHERE clave = 'vehiculos';"
+     + _SUMAR_MARCA.format(fila='NEW')),
+    ('trg_resumen_vehiculos_del', 'AFTER DELETE ON vehiculos',
+     "UPDATE resumen_contadores SET valor = valor - 1 WHERE clave = 'vehiculos';"
+     + _RESTAR_MARCA.format(fila='OLD')),
+    ('trg_resumen_vehiculos_upd', 'AFTER UPDATE OF marca ON vehiculos WHEN OLD.marca IS NOT NEW.marca',
+     _RESTAR_MARCA.format(fila='OLD') + _SUMAR_MARCA.format(fila='NEW')),
+
+    ('trg_resumen_mantenimientos_ins', 'AFTER INSERT ON mantenimientos',
+     _SUMAR_MANTENIMIENTO.format(fila='NEW')),
+    ('trg_resumen_mantenimientos_del', 'AFTER DELETE ON mantenimientos',
+     _RESTAR_MANTENIMIENTO.format(fila='OLD')),
+    ('trg_resumen_mantenimientos_upd', 'AFTER UPDATE OF vehiculo_id, costo ON mantenimientos',
+     _RESTAR_MANTENIMIENTO.format(fila='OLD') + _SUMAR_MANTENIMIENTO.format(fila='NEW')),
+
+    ('trg_resumen_presupuesto_ins', 'AFTER INSERT ON presupuesto',
+     _SUMAR_MOVIMIENTO.format(fila='NEW')),
+    ('trg_resumen_presupuesto_del', 'AFTER DELETE ON presupuesto',
+     _RESTAR_MOVIMIENTO.format(fila='OLD')),
+    ('trg_resumen_presupuesto_upd', 'AFTER UPDATE OF tipo_movimiento, categoria, monto ON presupuesto',
+     _RESTAR_MOVIMIENTO.format(fila='OLD') + _SUMAR_MOVIMIENTO.format(fila='NEW')),
+]
+
+
+def crear_resumenes(cursor: sqlite3.Cursor):
+    """Crea las tablas de resumen y sus triggers, y calcula los valores iniciales"""
+    for sql in TABLAS:
+        cursor.execute(sql)
+    for nombre, evento, cuerpo in _TRIGGERS:
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {nombre} {evento} BEGIN {cuerpo} END")
+    reconstruir_resumenes(cursor)
+
+
+def _valores_reales(cursor: sqlite3.Cursor) -> Dict[str, List]:
+    """Calcula los resúmenes desde las tablas base (recorrido completo)"""
+    cursor.execute('''
+        SELECT (SELECT COUNT(*) FROM propietarios),
+               (SELECT COUNT(*) FROM vehiculos),
+               (SELECT COUNT(*) FROM mantenimientos),
+               (SELECT COALESCE(SUM(costo), 0) FROM mantenimientos),
+               (SELECT COALESCE(SUM(monto), 0) FROM presupuesto WHERE tipo_movimiento = 'ingreso'),
+               (SELECT COALESCE(SUM(monto), 0) FROM presupuesto WHERE tipo_movimiento = 'egreso')
+    ''')
+    contadores = sorted(zip(CONTADORES, cursor.fetchone()))
+    cursor.execute("SELECT marca, COUNT(*) FROM vehiculos GROUP BY marca ORDER BY marca")
+    marcas = cursor.fetchall()
+    cursor.execute('''
+        SELECT tipo_movimiento, categoria, SUM(monto), COUNT(*)
+        FROM presupuesto GROUP BY tipo_movimiento, categoria ORDER BY tipo_movimiento, categoria
+    ''')
+    categorias = cursor.fetchall()
+    cursor.execute('''
+        SELECT vehiculo_id, COUNT(*), COALESCE(SUM(costo), 0)
+        FROM mantenimientos GROUP BY vehiculo_id ORDER BY vehiculo_id
+    ''')
+    por_vehiculo = cursor.fetchall()
+    return {
+        'resumen_contadores': contadores,
+        'resumen_vehiculos_marca': marcas,
+        'resumen_presupuesto_categoria': categorias,
+        'resumen_mantenimiento_vehiculo': por_vehiculo,
+    }
+
+
+def _valores_guardados(cursor: sqlite3.Cursor) -> Dict[str, List]:
+    consultas = {
+        'resumen_contadores': "SELECT clave, valor FROM resumen_contadores ORDER BY clave",
+        'resumen_vehiculos_marca': "SELECT marca, cantidad FROM resumen_vehiculos_marca ORDER BY marca",
+        'resumen_presupuesto_categoria': '''
+            SELECT tipo_movimiento, categoria, total, cantidad
+            FROM resumen_presupuesto_categoria ORDER BY tipo_movimiento, categoria
+        ''',
+        'resumen_mantenimiento_vehiculo': '''
+            SELECT vehiculo_id, cantidad, costo_total
+            FROM resumen_mantenimiento_vehiculo ORDER BY vehiculo_id
+        ''',
+    }
+    valores = {}
+    for tabla, sql in consultas.items():
+        cursor.execute(sql)
+        valores[tabla] = cursor.fetchall()
+    return valores
+
+
+def _filas_iguales(a: tuple, b: tuple) -> bool:
+    """Compara filas tolerando el error de redondeo de sumas incrementales"""
+    if len(a) != len(b):
+        return False
+    for x, y in zip(a, b):
+        if isinstance(x, (int, float)) and isinstance(y, (int, float)):
+            if abs(x - y) > 1e-6 * max(1.0, abs(x), abs(y)):
+                return False
+        elif x != y:
+            return False
+    return True
+
+
+def verificar_resumenes(cursor: sqlite3.Cursor) -> Dict[str, int]:
+    """Devuelve, por tabla de resumen, cuántas filas difieren de los valores reales"""
+    reales = _valores_reales(cursor)
+    guardados = _valores_guardados(cursor)
+    diferencias = {}
+    for tabla, filas_reales in reales.items():
+        filas_guardadas = guardados[tabla]
+        distintas = abs(len(filas_reales) - len(filas_guardadas))
+        distintas += sum(1 for a, b in zip(filas_reales, filas_guardadas) if not _filas_iguales(a, b))
+        diferencias[tabla] = distintas
+    return diferencias
+
+
+def reconstruir_resumenes(cursor: sqlite3.Cursor):
+    """Recalcula todas las tablas de resumen desde las tablas base"""
+    reales = _valores_reales(cursor)
+    cursor.execute("DELETE FROM resumen_contadores")
+    cursor.executemany("INSERT INTO resumen_contadores (clave, valor) VALUES (?, ?)",
+                       reales['resumen_contadores'])
+    cursor.execute("DELETE FROM resumen_vehiculos_marca")
+    cursor.executemany("INSERT INTO resumen_vehiculos_marca (marca, cantidad) VALUES (?, ?)",
+                       reales['resumen_vehiculos_marca'])
+    cursor.execute("DELETE FROM resumen_presupuesto_categoria")
+    cursor.executemany('''
+        INSERT INTO resumen_presupuesto_categoria (tipo_movimiento, categoria, total, cantidad)
+        VALUES (?, ?, ?, ?)
+    ''', reales['resumen_presupuesto_categoria'])
+    cursor.execute("DELETE FROM resumen_mantenimiento_vehiculo")
+    cursor.executemany('''
+        INSERT INTO resumen_mantenimiento_vehiculo (vehiculo_id, cantidad, costo_total)
+        VALUES (?, ?, ?)
+    ''', reales['resumen_mantenimiento_vehiculo'])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('db', nargs='?', default='automotores.db')
+    parser.add_argument('--reparar', action='store_true', help='reconstruye los resúmenes si difieren')
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        cursor = conn.cursor()
+        # BEGIN IMMEDIATE: tablas base y resúmenes se leen (y reparan) sin escrituras en medio
+        cursor.execute("BEGIN IMMEDIATE")
+        diferencias = verificar_resumenes(cursor)
+        for tabla, distintas in diferencias.items():
+            print(f"{'✅' if not distintas else '❌'} {tabla}: {distintas} filas distintas")
+        if any(diferencias.values()) and args.reparar:
+            reconstruir_resumenes(cursor)
+            print("🔧 Resúmenes reconstruidos")
+            diferencias = {}
+        conn.commit()
+    finally:
+        conn.close()
+
+    sys.exit(1 if any(diferencias.values()) else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,15 @@
+# ===========================================
+# RUT - SISTEMA AUTOMOTORES
+# ===========================================
+#
+# Forma única en que se guardan y comparan los RUT, la misma en la consola
+# (main.py), la API (DatabaseManager) e importar_json.py. No importa nada
+# del resto del sistema: main.py la usa también en modo JSON.
+
+
+def normalizar_rut(rut):
+    """RUT sin puntos ni espacios y con el dígito verificador en mayúscula.
+
+    Así '12.345.678-k' y '12345678-K' se consideran el mismo propietario.
+    """
+    return str(rut).replace(".", "").replace(" ", "").strip().upper()
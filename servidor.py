@@ -0,0 +1,158 @@
+# ===========================================
+# SERVIDOR DE PRODUCCIÓN - SISTEMA AUTOMOTORES
+# ===========================================
+#
+# Servidor prefork sin dependencias extra: el proceso maestro carga la
+# aplicación (wsgi.py: migraciones incluidas), abre el socket y crea los
+# workers con fork. Cada worker atiende el socket compartido con un pool
+# de hilos y abre su propia base de datos al primer uso. Si un worker
+# termina inesperadamente, el maestro lo reemplaza.
+#
+# En sistemas sin fork (Windows) corre un solo proceso con hilos.
+#
+# Uso:
+#   python servidor.py [--host 0.0.0.0] [--port 5000] [--workers 4] [--hilos 8] [--log]
+# Variables de entorno: AUTOMOTORES_WORKERS, AUTOMOTORES_HILOS (más las de crear_app)
+
+import argparse
+import os
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+
+class _Handler(WSGIRequestHandler):
+    """Sin registro de cada petición (salvo --log): en carga alta pesa más que la petición"""
+    registrar = False
+
+    def log_request(self, *args, **kwargs):
+        if self.registrar:
+            super().log_request(*args, **kwargs)
+
+
+class ServidorWSGI(BaseWSGIServer):
+    """Servidor WSGI que atiende cada conexión en un pool acotado de hilos.
+
+    Con todos los hilos ocupados no vuelve a hacer accept: la conexión queda en
+    el socket compartido y la toma otro worker libre, en vez de esperar en la
+    cola de este detrás de una petición lenta.
+    """
+
+    def __init__(self, host: str, port: int, app, hilos: int, handler=_Handler):
+        super().__init__(host, port, app, handler=handler)
+        self.hilos = hilos
+        self._ejecutor = None
+        self._libres = None
+
+    def process_request(self, request, client_address):
+        # El pool se crea en el worker, después del fork
+        if self._ejecutor is None:
+            self._ejecutor = ThreadPoolExecutor(self.hilos, thread_name_prefix='http')
+            self._libres = threading.BoundedSemaphore(self.hilos)
+        self._libres.acquire()
+        self._ejecutor.submit(self._atender, request, client_address)
+
+    def _atender(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._libres.release()
+
+    def terminar(self):
+        """Espera a que terminen las peticiones en curso"""
+        if self._ejecutor is not None:
+            self._ejecutor.shutdown(wait=True)
+
+
+def _worker(servidor: ServidorWSGI):
+    """Cuerpo de un worker: atiende hasta recibir SIGTERM"""
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        servidor.serve_forever()
+    finally:
+        try:
+            # Termina las peticiones en curso antes de cerrar la base
+            servidor.terminar()
+            # Confirma las escrituras encoladas y cierra el pool de este worker
+            import app as aplicacion
+            aplicacion.db.close()
+        finally:
+            os._exit(0)
+
+
+def _lanzar(servidor: ServidorWSGI) -> int:
+    pid = os.fork()
+    if pid == 0:
+        _worker(servidor)
+    return pid
+
+
+def servir(app, host: str, port: int, workers: int, hilos: int):
+    servidor = ServidorWSGI(host, port, app, hilos)
+    print(f"🌐 Sirviendo en http://{host}:{servidor.server_port} - {workers} worker(s) x {hilos} hilos")
+    sys.stdout.flush()
+
+    if workers <= 1 or not hasattr(os, 'fork'):
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        servidor.terminar()
+        return
+
+    activos = {_lanzar(servidor) for _ in range(workers)}
+    deteniendo = False
+
+    def detener(*_):
+        nonlocal deteniendo
+        deteniendo = True
+        for pid in activos:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, detener)
+    signal.signal(signal.SIGINT, detener)
+
+    while activos:
+        try:
+            pid, _estado = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        activos.discard(pid)
+        if not deteniendo:
+            # Un worker murió solo: se reemplaza tras una pausa breve
+            time.sleep(0.5)
+            activos.add(_lanzar(servidor))
+    servidor.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int,
+                        default=int(os.environ.get('AUTOMOTORES_WORKERS', os.cpu_count() or 1)))
+    parser.add_argument('--hilos', type=int, default=int(os.environ.get('AUTOMOTORES_HILOS', 8)))
+    parser.add_argument('--log', action='store_true', help='registra cada petición')
+    args = parser.parse_args()
+
+    _Handler.registrar = args.log
+    # Carga única en el maestro (preload): los workers la heredan con el fork
+    from wsgi import app
+    servir(app, args.host, args.port, args.workers, args.hilos)
+
+
+if __name__ == '__main__':
+    main()
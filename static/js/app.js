@@ -7,8 +7,25 @@ let currentSection = 'dashboard'; // Sección: Facultad de Agronomía
 let propietarios = []; // FAUBA
 let vehiculos = [];
 let mantenimientos = [];
+let todosLosVehiculos = []; // Lista completa para los selects
 let estadisticas = {};
 
+// Paginación por cursor de las tablas
+const PAGE_SIZE = 50;
+const nextCursors = {
+    propietarios: null,
+    vehiculos: null,
+    mantenimientos: null
+};
+
+// Texto de búsqueda de cada tabla (se filtra en el servidor con ?q=)
+const SEARCH_DELAY_MS = 250;
+const searchTerms = {
+    propietarios: '',
+    vehiculos: '',
+    mantenimientos: ''
+};
+
 // ===========================================
 // INICIALIZACIÓN
 // ===========================================
@@ -74,7 +91,7 @@ function showSection(section) {
 async function loadDashboard() {
     try {
         // Cargar estadísticas
-        const response = await fetch('/api/estadisticas');
+        const response = await apiGet('/api/estadisticas');
         const data = await response.json();
         
         if (data.success) {
@@ -100,14 +117,16 @@ function updateStatsCards() {
 // PROPIETARIOS
 // ===========================================
 
-async function loadPropietarios() {
+async function loadPropietarios(append = false) {
     try {
-        const response = await fetch('/api/propietarios');
+        const response = await apiGet(pageUrl('/api/propietarios', append ? nextCursors.propietarios : null, PAGE_SIZE, searchTerms.propietarios));
         const data = await response.json();
         
         if (data.success) {
-            propietarios = data.data;
+            propietarios = append ? propietarios.concat(data.data) : data.data;
+            nextCursors.propietarios = data.next_cursor;
             renderPropietariosTable();
+            updateLoadMore('propietarios');
         }
     } catch (error) {
         console.error('Error cargando propietarios:', error);
@@ -252,15 +271,20 @@ async function deletePropietario(id) {
 // VEHÍCULOS
 // ===========================================
 
-async function loadVehiculos() {
+async function loadVehiculos(append = false) {
     try {
-        const response = await fetch('/api/vehiculos');
+        const response = await apiGet(pageUrl('/api/vehiculos', append ? nextCursors.vehiculos : null, PAGE_SIZE, searchTerms.vehiculos));
         const data = await response.json();
         
         if (data.success) {
-            vehiculos = data.data;
+            vehiculos = append ? vehiculos.concat(data.data) : data.data;
+            nextCursors.vehiculos = data.next_cursor;
             renderVehiculosTable();
-            updateVehiculoSelects();
+            updateLoadMore('vehiculos');
+            // Una búsqueda no cambia la lista completa de los selects
+            if (!append && !searchTerms.vehiculos) {
+                updateVehiculoSelects();
+            }
         }
     } catch (error) {
         console.error('Error cargando vehículos:', error);
@@ -310,15 +334,18 @@ function updateVehiculoSelects() {
     const select = document.getElementById('vehiculo-propietario');
     const mantenimientoSelect = document.getElementById('mantenimiento-vehiculo');
     
-    // Cargar propietarios para el select
-    loadPropietarios().then(() => {
+    // Los selects necesitan la lista completa, no solo las páginas cargadas en la tabla
+    fetchAllPages('/api/propietarios').then(todos => {
         select.innerHTML = '<option value="">Seleccionar propietario...</option>' +
-            propietarios.map(p => `<option value="${p.id}">${p.nombre} ${p.apellido}</option>`).join('');
-    });
+            todos.map(p => `<option value="${p.id}">${p.nombre} ${p.apellido}</option>`).join('');
+    }).catch(error => console.error('Error cargando propietarios:', error));
     
     // Cargar vehículos para mantenimiento
-    mantenimientoSelect.innerHTML = '<option value="">Seleccionar vehículo...</option>' +
-        vehiculos.map(v => `<option value="${v.id}">${v.marca} ${v.modelo} - ${v.propietario_nombre}</option>`).join('');
+    fetchAllPages('/api/vehiculos').then(todos => {
+        todosLosVehiculos = todos;
+        mantenimientoSelect.innerHTML = '<option value="">Seleccionar vehículo...</option>' +
+            todos.map(v => `<option value="${v.id}">${v.marca} ${v.modelo} - ${v.propietario_nombre}</option>`).join('');
+    }).catch(error => console.error('Error cargando vehículos:', error));
 }
 
 function showVehiculoModal(vehiculo = null) {
@@ -425,14 +452,16 @@ async function deleteVehiculo(id) {
 // MANTENIMIENTOS
 // ===========================================
 
-async function loadMantenimientos() {
+async function loadMantenimientos(append = false) {
     try {
-        const response = await fetch('/api/mantenimientos');
+        const response = await apiGet(pageUrl('/api/mantenimientos', append ? nextCursors.mantenimientos : null, PAGE_SIZE, searchTerms.mantenimientos));
         const data = await response.json();
         
         if (data.success) {
-            mantenimientos = data.data;
+            mantenimientos = append ? mantenimientos.concat(data.data) : data.data;
+            nextCursors.mantenimientos = data.next_cursor;
             renderMantenimientosTable();
+            updateLoadMore('mantenimientos');
         }
     } catch (error) {
         console.error('Error cargando mantenimientos:', error);
@@ -518,7 +547,7 @@ async function saveMantenimiento() {
     const vehiculoId = parseInt(document.getElementById('mantenimiento-vehiculo').value);
     
     // Obtener el kilometraje actual del vehículo seleccionado
-    const vehiculo = vehiculos.find(v => v.id === vehiculoId);
+    const vehiculo = todosLosVehiculos.find(v => v.id === vehiculoId);
     const kilometrajeActual = vehiculo ? vehiculo.kilometraje : 0;
     
     const data = {
@@ -589,37 +618,66 @@ async function deleteMantenimiento(id) {
 // FUNCIONES AUXILIARES
 // ===========================================
 
+// GET condicional: el navegador envía If-None-Match con el ETag guardado y,
+// si el servidor responde 304, entrega la copia en caché sin volver a descargarla
+function apiGet(url) {
+    return fetch(url, { cache: 'no-cache' });
+}
+
+function pageUrl(url, after = null, limit = PAGE_SIZE, q = '') {
+    const params = new URLSearchParams({ limit: limit });
+    if (after) {
+        params.set('after', after);
+    }
+    if (q) {
+        params.set('q', q);
+    }
+    return `${url}?${params}`;
+}
+
+// Recorre todas las páginas de un listado (para selects que necesitan la lista completa)
+async function fetchAllPages(url) {
+    let items = [];
+    let after = null;
+    do {
+        const response = await apiGet(pageUrl(url, after, 500));
+        const data = await response.json();
+        if (!data.success) {
+            throw new Error(data.error);
+        }
+        items = items.concat(data.data);
+        after = data.next_cursor;
+    } while (after);
+    return items;
+}
+
+function updateLoadMore(section) {
+    const button = document.getElementById(`${section}-load-more`);
+    if (button) {
+        button.style.display = nextCursors[section] ? '' : 'none';
+    }
+}
+
 function setupSearch() {
-    // Búsqueda de propietarios
-    document.getElementById('search-propietarios').addEventListener('input', function() {
-        const searchTerm = this.value.toLowerCase();
-        const rows = document.querySelectorAll('#propietarios-tbody tr');
-        
-        rows.forEach(row => {
-            const text = row.textContent.toLowerCase();
-            row.style.display = text.includes(searchTerm) ? '' : 'none';
-        });
-    });
-    
-    // Búsqueda de vehículos
-    document.getElementById('search-vehiculos').addEventListener('input', function() {
-        const searchTerm = this.value.toLowerCase();
-        const rows = document.querySelectorAll('#vehiculos-tbody tr');
-        
-        rows.forEach(row => {
-            const text = row.textContent.toLowerCase();
-            row.style.display = text.includes(searchTerm) ? '' : 'none';
-        });
-    });
+    // Cada búsqueda vuelve a pedir la primera página al servidor, que busca en
+    // toda la tabla y no solo en las filas ya descargadas
+    const loaders = {
+        propietarios: loadPropietarios,
+        vehiculos: loadVehiculos,
+        mantenimientos: loadMantenimientos
+    };
     
-    // Búsqueda de mantenimientos
-    document.getElementById('search-mantenimientos').addEventListener('input', function() {
-        const searchTerm = this.value.toLowerCase();
-        const rows = document.querySelectorAll('#mantenimientos-tbody tr');
-        
-        rows.forEach(row => {
-            const text = row.textContent.toLowerCase();
-            row.style.display = text.includes(searchTerm) ? '' : 'none';
+    Object.keys(loaders).forEach(section => {
+        let timer = null;
+        document.getElementById(`search-${section}`).addEventListener('input', function() {
+            const searchTerm = this.value.trim();
+            clearTimeout(timer);
+            timer = setTimeout(() => {
+                if (searchTerm !== searchTerms[section]) {
+                    searchTerms[section] = searchTerm;
+                    loaders[section]();
+                }
+            }, SEARCH_DELAY_MS);
         });
     });
 }
@@ -634,7 +692,7 @@ function setupDateInputs() {
 document.getElementById('mantenimiento-vehiculo').addEventListener('change', function() {
     const vehiculoId = this.value;
     if (vehiculoId) {
-        const vehiculo = vehiculos.find(v => v.id == vehiculoId);
+        const vehiculo = todosLosVehiculos.find(v => v.id == vehiculoId);
         if (vehiculo) {
             document.getElementById('mantenimiento-kilometraje-anterior').value = vehiculo.kilometraje;
         }
@@ -0,0 +1,15 @@
+# ===========================================
+# PUNTO DE ENTRADA WSGI - SISTEMA AUTOMOTORES
+# ===========================================
+#
+# Para servidores WSGI con varios procesos, cargando la aplicación una sola
+# vez en el proceso maestro (preload):
+#   python servidor.py --workers 4 --hilos 8
+#   gunicorn --preload -w 4 --threads 8 -b 0.0.0.0:5000 wsgi:app
+#
+# Las migraciones se aplican aquí, antes del fork; cada worker abre después
+# su propio pool de conexiones (ver DatabaseManagerPorProceso).
+
+from app import crear_app
+
+app = crear_app(preparar=True)